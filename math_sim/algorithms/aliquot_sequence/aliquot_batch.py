@@ -0,0 +1,97 @@
+"""
+This module classifies the aliquot sequences of a whole range of starting numbers at once.
+"""
+
+import math
+import numpy as np
+from ... import memory_budget, metrics
+from .aliquot_sequence import AliquotOutcome
+
+def divisor_sum_table(limit):
+    """
+    Compute s(n), the sum of proper divisors, for every 0 <= n <= limit.
+
+    Divisor pairs (d, n / d) with d <= sqrt(n) are added with one vectorized
+    slice update per d, so only isqrt(limit) NumPy operations are needed.
+
+    :param limit: Largest n to include
+    :return: NumPy array where entry n is s(n)
+    """
+    # sigma(n) < 5.6 * n below 2**29, so uint32 is enough up to there
+    memory_budget.admit("divisor_sum_table", limit)
+    dtype = np.uint32 if limit < 2**29 else np.uint64
+    table = np.zeros(limit + 1, dtype=dtype)
+    with metrics.phase("aliquot.divisor_table"):
+        for d in range(1, math.isqrt(limit) + 1):
+            table[d * d] += d
+            cofactors = np.arange(d + 1, limit // d + 1, dtype=dtype)
+            table[d * (d + 1)::d] += d + cofactors
+        table -= np.arange(limit + 1, dtype=dtype)
+    # Every divisor pair (d, n / d) with d <= sqrt(n) is one update
+    metrics.count("aliquot.divisor_pairs", sum(limit // d - d + 1 for d in range(1, math.isqrt(limit) + 1)))
+    return table
+
+def classify_aliquot_range(start, count, bound=None):
+    """
+    Classify how the aliquot sequence of every number in [start, start + count) ends.
+
+    Next terms are looked up in a divisor_sum_table, and the outcome of every
+    term visited is memoized, so a sequence that merges into an already
+    resolved trajectory is classified as soon as it reaches a known term.
+    Sequences that climb above bound are classified as EXCEEDED_BOUND.
+
+    :param start: First starting number (at least 1)
+    :param count: Number of consecutive starting numbers
+    :param bound: Largest term followed, at least the last start; defaults to four times the last start
+    :return: Tuple of (uint8 array of AliquotOutcome values, one per start,
+             dict mapping the smallest member of every cycle found to the cycle)
+    """
+    if start < 1 or count < 0:
+        raise ValueError("Aliquot sequences start from a positive integer")
+    stop = start + count
+    if bound is None:
+        bound = 4 * stop
+    elif bound < stop - 1:
+        raise ValueError(f"bound must be at least the last start {stop - 1}, got {bound}")
+    memory_budget.admit("classify_aliquot_range", bound)
+    table = divisor_sum_table(bound)
+    outcomes = np.zeros(bound + 1, dtype=np.uint8)
+    outcomes[0] = AliquotOutcome.TERMINATED
+    cycles = {}
+    steps = 0
+
+    for n in range(start, stop):
+        if outcomes[n]:
+            continue
+        path = []
+        position = {}
+        term = n
+        while True:
+            if term > bound:
+                outcome = AliquotOutcome.EXCEEDED_BOUND
+                break
+            outcome = outcomes[term]
+            if outcome:
+                break
+            if term in position:
+                cycle = path[position[term]:]
+                outcome = AliquotOutcome.for_cycle(len(cycle))
+                first = cycle.index(min(cycle))
+                cycles[cycle[first]] = tuple(cycle[first:] + cycle[:first])
+                break
+            position[term] = len(path)
+            path.append(term)
+            term = int(table[term])
+        outcomes[path] = outcome
+        steps += len(path)
+    metrics.count("aliquot.steps", steps)
+
+    return outcomes[start:stop].copy(), cycles
+
+if __name__ == "__main__":
+    start, count = 1, 10**6
+    outcomes, cycles = classify_aliquot_range(start, count)
+    for outcome in AliquotOutcome:
+        if outcome:
+            print(f"{outcome.name}: {np.count_nonzero(outcomes == outcome)}")
+    print(f"Cycles found: {sorted(cycles.values())}")
@@ -2,31 +2,227 @@
 This module implements the Aliquot Sequence algorithm.
 """
 
-from math_sim.resource_monitor import ResourceMonitor
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import IntEnum
+from math_sim import metrics
+from math_sim.resource_monitor import ResourceMonitor, DEFAULT_SAMPLE_INTERVAL
+from math_sim.algorithms.prime_factorization.prime_factorization import FactorizationState, prime_factors
+
+class AliquotOutcome(IntEnum):
+    """
+    How an aliquot sequence ends. Values fit in a uint8 so outcomes for whole
+    ranges can be stored in NumPy arrays; 0 means not resolved yet.
+    """
+    UNRESOLVED = 0
+    TERMINATED = 1
+    PERFECT = 2
+    AMICABLE = 3
+    SOCIABLE = 4
+    EXCEEDED_BOUND = 5
+    STEP_LIMIT = 6
+
+    @classmethod
+    def for_cycle(cls, period):
+        """
+        Classify a cycle of the given length.
+        """
+        if period == 1:
+            return cls.PERFECT
+        if period == 2:
+            return cls.AMICABLE
+        return cls.SOCIABLE
+
+@dataclass
+class AliquotResult:
+    """
+    An aliquot sequence together with how it ended.
+
+    period is the length of the cycle the sequence ended in, or 0 if it did
+    not end in a cycle; the cycle itself is the last period terms.
+    """
+    sequence: list = field(default_factory=list)
+    outcome: AliquotOutcome = AliquotOutcome.UNRESOLVED
+    period: int = 0
+
+    @property
+    def cycle(self):
+        return self.sequence[-self.period:] if self.period else []
+
+def sum_of_proper_divisors(n, monitor=None, state=None, on_progress=None):
+    """
+    Compute s(n) = sigma(n) - n from the prime factorization of n.
+
+    For n = p1^e1 * ... * pk^ek, sigma(n) is the product of
+    (p^(e+1) - 1) / (p - 1) over the prime powers, so the cost is that of
+    factoring n rather than of scanning every candidate divisor.
+
+    :param n: Non-negative integer (s(0) and s(1) are taken to be 0)
+    :param monitor: Optional ResourceMonitor passed on to the factorization
+    :param state: Optional FactorizationState of n, passed on to the factorization
+    :param on_progress: Optional function called with state after every split
+    :return: Sum of the proper divisors of n
+    """
+    if n < 2:
+        return 0
+    metrics.count("aliquot.divisor_sums")
+    sigma = 1
+    for p, e in Counter(prime_factors(n, monitor, state, on_progress)).items():
+        sigma *= (p ** (e + 1) - 1) // (p - 1)
+    return sigma - n
+
+def _load_aliquot_checkpoint(checkpoint, n, bound, result):
+    saved = checkpoint.load()
+    if saved is None:
+        return None
+    meta, lists = saved
+    checkpoint.check(meta, algorithm="aliquot", bound=bound)
+    checkpoint.check({"start": lists["sequence"][0]}, start=n)
+    result.sequence[:] = lists["sequence"]
+    result.outcome = AliquotOutcome[meta["outcome"]]
+    result.period = meta["period"]
+    if not meta["factoring"]:
+        return None
+    return FactorizationState(result.sequence[-1], lists["factors"], lists["pending"])
+
+def _save_aliquot_checkpoint(checkpoint, n, bound, result, state):
+    # The number being factored is always the last term, so only a flag is stored
+    factoring = bool(state is not None and state.pending and state.n == result.sequence[-1])
+    meta = {"algorithm": "aliquot", "bound": bound, "outcome": result.outcome.name,
+            "period": result.period, "factoring": factoring}
+    lists = {"sequence": result.sequence}
+    if factoring:
+        lists.update(factors=state.factors, pending=state.pending)
+    checkpoint.save(meta, lists)
+
+def trace_aliquot(n, max_steps=1000, bound=None, checkpoint=None):
+    """
+    Generate the aliquot sequence for a given number and classify how it ends.
+
+    Terms are indexed in a dict as they are generated, so detecting a repeated
+    term costs O(1) per step and the index of the repeat gives the cycle length.
+    Step durations are recorded in the monitor's step_times and step totals.
+
+    With a checkpoint, the sequence so far and the partial factorization of
+    its last term are saved whenever checkpoint.interval has passed, when the
+    computation fails (e.g. on a resource limit) and when it ends. A sequence
+    with a saved checkpoint continues from it; one that already ended is
+    returned as saved, and one that hit the step limit takes up to max_steps
+    steps in all.
+
+    :param n: Starting number for the sequence (at least 1)
+    :param max_steps: Maximum number of steps to calculate
+    :param bound: Optional largest term to follow; a larger next term ends the sequence
+    :param checkpoint: Optional Checkpoint to resume from and save to
+    :return: Tuple of (AliquotResult, ResourceMonitor instance)
+    """
+    if n < 1:
+        raise ValueError(f"Aliquot sequences start from a positive integer, got {n}")
+    sequence = [n]
+    result = AliquotResult(sequence, AliquotOutcome.STEP_LIMIT)
+    state = on_progress = None
+    if checkpoint is not None:
+        state = _load_aliquot_checkpoint(checkpoint, n, bound, result)
+
+        def on_progress(progress):
+            if checkpoint.due():
+                _save_aliquot_checkpoint(checkpoint, n, bound, result, progress)
+    seen = {term: index for index, term in enumerate(sequence)}
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        try:
+            steps = range(len(sequence) - 1, max_steps) if result.outcome == AliquotOutcome.STEP_LIMIT else ()
+            for _ in steps:
+                monitor.check_resources()
+                if checkpoint is not None:
+                    if state is None or state.n != sequence[-1]:
+                        state = FactorizationState(sequence[-1])
+                    if checkpoint.due():
+                        _save_aliquot_checkpoint(checkpoint, n, bound, result, state)
+                step_start = time.perf_counter()
+                next_num = sum_of_proper_divisors(sequence[-1], monitor, state, on_progress)
+                step_time = time.perf_counter() - step_start
+                monitor.record_step(step_time)
+                metrics.record_time("aliquot.step", step_time)
+                if next_num == 0:
+                    sequence.append(next_num)
+                    result.outcome = AliquotOutcome.TERMINATED
+                    break
+                if next_num in seen:
+                    result.period = len(sequence) - seen[next_num]
+                    result.outcome = AliquotOutcome.for_cycle(result.period)
+                    break
+                if bound is not None and next_num > bound:
+                    result.outcome = AliquotOutcome.EXCEEDED_BOUND
+                    break
+                seen[next_num] = len(sequence)
+                sequence.append(next_num)
+        except BaseException:
+            if checkpoint is not None:
+                _save_aliquot_checkpoint(checkpoint, n, bound, result, state)
+            raise
+    if checkpoint is not None:
+        _save_aliquot_checkpoint(checkpoint, n, bound, result, None)
+    metrics.count("aliquot.sequences")
+    metrics.count("aliquot.steps", monitor.step_count)
+    metrics.count(f"aliquot.outcomes.{result.outcome.name.lower()}")
+    metrics.observe("aliquot.sequence_length", len(sequence))
+    return result, monitor
+
+def iter_aliquot(n, max_steps=1000, bound=None, monitor=None):
+    """
+    Generate the aliquot sequence of n one term at a time.
+
+    Yields the same terms as trace_aliquot, stopping at 0, just before the
+    first repeated term or before a term above bound. Only the set of terms
+    seen so far is kept, which is needed to recognise the first repeat.
+
+    :param n: Starting number for the sequence (at least 1)
+    :param max_steps: Maximum number of steps to calculate, or None for no limit
+    :param bound: Optional largest term to follow
+    :param monitor: Optional ResourceMonitor checked once per step
+    :return: Generator of the terms, starting with n
+    """
+    if n < 1:
+        raise ValueError(f"Aliquot sequences start from a positive integer, got {n}")
+    seen = {n}
+    yield n
+    step = 0
+    try:
+        while max_steps is None or step < max_steps:
+            if monitor is not None:
+                monitor.check_resources()
+            n = sum_of_proper_divisors(n, monitor)
+            step += 1
+            if n in seen or (bound is not None and n > bound):
+                return
+            yield n
+            if n == 0:
+                return
+            seen.add(n)
+    finally:
+        # Also counted when the consumer stops early
+        metrics.count("aliquot.steps", step)
 
 def aliquot_sequence(n, max_steps=1000):
     """
     Generate the aliquot sequence for a given number.
 
+    The sequence stops at 0 or just before its first repeated term.
+
     :param n: Starting number for the sequence
     :param max_steps: Maximum number of steps to calculate
     :return: Tuple of (sequence, ResourceMonitor instance)
     """
-    monitor = ResourceMonitor()
-    sequence = [n]
-    for _ in range(max_steps):
-        monitor.check_resources()
-        next_num = sum(i for i in range(1, sequence[-1]) if sequence[-1] % i == 0)
-        if next_num in sequence:
-            break
-        sequence.append(next_num)
-    return sequence, monitor
+    result, monitor = trace_aliquot(n, max_steps)
+    return result.sequence, monitor
 
 if __name__ == "__main__":
     start_number = 220  # You can change this to test different starting numbers
-    result, monitor = aliquot_sequence(start_number)
-    print(f"Aliquot sequence starting from {start_number}: {result}")
-    print(f"Sequence length: {len(result)}")
-    print(f"Final number in sequence: {result[-1]}")
+    result, monitor = trace_aliquot(start_number)
+    print(f"Aliquot sequence starting from {start_number}: {result.sequence}")
+    print(f"Sequence length: {len(result.sequence)}")
+    print(f"Outcome: {result.outcome.name}" + (f" (cycle {result.cycle})" if result.period else ""))
+    print(f"Total step time: {monitor.step_total:.6f}s, slowest step: {monitor.step_max:.6f}s")
     print(f"Max memory usage: {max(monitor.memory_usage):.2f}%")
-    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
\ No newline at end of file
+    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
@@ -5,14 +5,17 @@ This module provides visualization tools for the Aliquot Sequence algorithm.
 import matplotlib.pyplot as plt
 from math_sim.algorithms.aliquot_sequence.aliquot_sequence import aliquot_sequence
 
-def plot_aliquot_sequence(start_number, max_steps=1000):
+def plot_aliquot_sequence(start_number, max_steps=1000, sequence=None, monitor=None):
     """
     Generate and plot the Aliquot Sequence.
 
     :param start_number: The number to start the sequence from
     :param max_steps: Maximum number of steps to calculate
+    :param sequence: Optional precomputed sequence, plotted instead of generating it again
+    :param monitor: ResourceMonitor from the run that produced sequence
     """
-    sequence, monitor = aliquot_sequence(start_number, max_steps)
+    if sequence is None:
+        sequence, monitor = aliquot_sequence(start_number, max_steps)
     
     # Plot the sequence
     plt.figure(figsize=(12, 6))
@@ -44,7 +47,20 @@ def plot_aliquot_sequence(start_number, max_steps=1000):
     plt.savefig(f"aliquot_sequence_resource_usage_{start_number}.png")
     plt.close()
 
+    # Plot the cost of each step; the monitor keeps the latest ones
+    plt.figure(figsize=(12, 6))
+    first_step = monitor.step_count - len(monitor.step_times) + 1
+    plt.plot(range(first_step, monitor.step_count + 1), monitor.step_times, marker='o')
+    plt.title(f"Time per Aliquot Step starting from {start_number}")
+    plt.xlabel("Step")
+    plt.ylabel("Time (s)")
+    plt.yscale('log')
+    plt.grid(True)
+    plt.savefig(f"aliquot_step_times_{start_number}.png")
+    plt.close()
+
 if __name__ == "__main__":
     start_number = 220  # You can change this to visualize different starting numbers
     plot_aliquot_sequence(start_number)
-    print(f"Plots saved as 'aliquot_sequence_{start_number}.png' and 'aliquot_sequence_resource_usage_{start_number}.png'")
\ No newline at end of file
+    print(f"Plots saved as 'aliquot_sequence_{start_number}.png', 'aliquot_sequence_resource_usage_{start_number}.png' "
+          f"and 'aliquot_step_times_{start_number}.png'")
\ No newline at end of file
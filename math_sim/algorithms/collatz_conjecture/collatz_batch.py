@@ -0,0 +1,135 @@
+"""
+This module computes Collatz stopping times and peaks for whole ranges of starting numbers at once.
+"""
+
+import numpy as np
+from ... import memory_budget, metrics
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Largest odd value whose 3n + 1 still fits in a uint64
+_UINT64_SAFE = (2**64 - 2) // 3
+PEAK_OVERFLOW = np.iinfo(np.uint64).max
+
+def fill_stopping_times(steps, peaks, lo, chunk_size=DEFAULT_CHUNK_SIZE, overflow_peaks=None, odd_steps=None):
+    """
+    Fill in the total stopping time and peak of every n in [lo, len(steps)).
+
+    Entries 1 .. lo - 1 must already be filled in. Starting numbers are
+    processed in chunks, advancing all values of a chunk in lockstep; a value
+    that drops below the chunk start is finished by looking up the stopping
+    time and peak already computed for it. Values that would outgrow uint64
+    are finished with Python ints; their peak is stored as PEAK_OVERFLOW and
+    the exact value recorded in overflow_peaks.
+
+    :param steps: Integer array of stopping times, indexed by n
+    :param peaks: uint64 array of peaks (largest value reached), indexed by n
+    :param lo: First n to compute (at least 2)
+    :param chunk_size: Number of starting numbers advanced together
+    :param overflow_peaks: Optional dict receiving exact peaks beyond uint64
+    :param odd_steps: Optional integer array receiving the number of odd (3n + 1) steps, indexed by n
+    """
+    rounds = lockstep_steps = overflowed = 0
+    for chunk_lo in range(lo, len(steps), chunk_size):
+        chunk_hi = min(chunk_lo + chunk_size, len(steps))
+        start = np.arange(chunk_lo, chunk_hi, dtype=np.uint64)
+        value = start.copy()
+        peak = start.copy()
+        count = np.zeros(start.size, dtype=np.int64)
+        odd_count = np.zeros(start.size, dtype=np.int64)
+        while start.size:
+            done = value < chunk_lo
+            if done.any():
+                index = start[done].astype(np.int64)
+                known = value[done].astype(np.int64)
+                steps[index] = count[done] + steps[known]
+                peaks[index] = np.maximum(peak[done], peaks[known])
+                if odd_steps is not None:
+                    odd_steps[index] = odd_count[done] + odd_steps[known]
+                if overflow_peaks is not None:
+                    # A value joining an overflowed trajectory inherits its exact peak
+                    saturated = peaks[index] == PEAK_OVERFLOW
+                    for n, k in zip(index[saturated].tolist(), known[saturated].tolist()):
+                        overflow_peaks[n] = overflow_peaks.get(k, PEAK_OVERFLOW)
+                keep = ~done
+                start, value, peak, count, odd_count = (
+                    start[keep], value[keep], peak[keep], count[keep], odd_count[keep])
+
+            odd = (value & 1).astype(bool)
+            unsafe = odd & (value > _UINT64_SAFE)
+            if unsafe.any():
+                overflowed += int(np.count_nonzero(unsafe))
+                for n, v, p, c, o in zip(start[unsafe].tolist(), value[unsafe].tolist(), peak[unsafe].tolist(),
+                                         count[unsafe].tolist(), odd_count[unsafe].tolist()):
+                    _finish_with_python_ints(steps, peaks, odd_steps, n, v, p, c, o, chunk_lo, overflow_peaks)
+                keep = ~unsafe
+                start, value, peak, count, odd_count, odd = (
+                    start[keep], value[keep], peak[keep], count[keep], odd_count[keep], odd[keep])
+
+            # An odd step is always followed by a halving, so take both at once
+            raised = 3 * value + 1
+            np.maximum(peak, np.where(odd, raised, 0), out=peak)
+            value = np.where(odd, raised, value) >> 1
+            count += np.where(odd, 2, 1)
+            odd_count += odd
+            rounds += 1
+            lockstep_steps += value.size
+    metrics.count("collatz.batch_numbers", max(len(steps) - lo, 0))
+    metrics.count("collatz.batch_rounds", rounds)
+    metrics.count("collatz.batch_value_steps", lockstep_steps)
+    metrics.count("collatz.batch_python_fallbacks", overflowed)
+
+def _finish_with_python_ints(steps, peaks, odd_steps, n, value, peak, count, odd_count, chunk_lo, overflow_peaks):
+    while value >= chunk_lo:
+        if value % 2:
+            value = 3 * value + 1
+            peak = max(peak, value)
+            odd_count += 1
+        else:
+            value //= 2
+        count += 1
+    steps[n] = count + int(steps[value])
+    if odd_steps is not None:
+        odd_steps[n] = odd_count + int(odd_steps[value])
+    known_peak = int(peaks[value])
+    if known_peak == PEAK_OVERFLOW and overflow_peaks is not None:
+        known_peak = overflow_peaks.get(value, PEAK_OVERFLOW)
+    peak = max(peak, known_peak)
+    if peak > PEAK_OVERFLOW:
+        if overflow_peaks is not None:
+            overflow_peaks[n] = peak
+        peak = PEAK_OVERFLOW
+    peaks[n] = peak
+
+def collatz_stopping_times(limit, chunk_size=DEFAULT_CHUNK_SIZE, overflow_peaks=None, store=None):
+    """
+    Compute the total stopping time (steps to reach 1) and peak of every n below limit.
+
+    With a store, the results are served from it; a store that is writable and
+    does not cover limit yet is extended first, computing only the new range.
+
+    :param limit: Exclusive upper bound on the starting numbers
+    :param chunk_size: Number of starting numbers advanced together
+    :param overflow_peaks: Optional dict receiving exact peaks beyond uint64 (not used with a store)
+    :param store: Optional CollatzStore to read from and extend
+    :return: Tuple of (uint16 stopping times, uint64 peaks), both indexed by n;
+             entry 0 is unused
+    """
+    if store is not None:
+        if store.count < limit:
+            store.extend(limit, chunk_size)
+        return store.steps[:limit], store.peaks[:limit]
+    memory_budget.admit("collatz_stopping_times", limit, chunk_size)
+    steps = np.zeros(max(limit, 2), dtype=np.uint16)
+    peaks = np.zeros(max(limit, 2), dtype=np.uint64)
+    peaks[1] = 1
+    fill_stopping_times(steps, peaks, 2, chunk_size, overflow_peaks)
+    return steps[:limit], peaks[:limit]
+
+if __name__ == "__main__":
+    limit = 10**6
+    steps, peaks = collatz_stopping_times(limit)
+    longest = int(np.argmax(steps))
+    highest = int(np.argmax(peaks))
+    print(f"Longest stopping time below {limit}: {longest} ({steps[longest]} steps)")
+    print(f"Highest peak below {limit}: {highest} reaches {peaks[highest]}")
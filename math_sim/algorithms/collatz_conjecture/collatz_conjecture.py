@@ -2,26 +2,225 @@
 This module implements the Collatz Conjecture algorithm.
 """
 
-from ...resource_monitor import ResourceMonitor
+import functools
+from dataclasses import dataclass
+import numpy as np
+from ... import memory_budget, metrics
+from ...resource_monitor import ResourceMonitor, DEFAULT_SAMPLE_INTERVAL
+from .collatz_batch import PEAK_OVERFLOW
 
-def collatz_conjecture(n, max_steps=1000):
+DEFAULT_JUMP_BITS = 16
+
+# Steps between two looks at the checkpoint clock
+CHECKPOINT_STRIDE = 1024
+
+@dataclass
+class CollatzSummary:
+    """
+    Summary of a Collatz trajectory, counted in standard 3n + 1 and n / 2 steps.
+    """
+    start: int
+    steps: int = 0
+    peak: int = 0
+    odd_steps: int = 0
+    even_steps: int = 0
+
+def iter_collatz(n, max_steps=None, monitor=None):
+    """
+    Generate the Collatz sequence of n one term at a time, in constant memory.
+
+    :param n: Starting number for the sequence
+    :param max_steps: Optional maximum number of steps; without it the sequence runs until 1
+    :param monitor: Optional ResourceMonitor checked once per term
+    :return: Generator of the terms, starting with n
+    """
+    step = 0
+    try:
+        while True:
+            if monitor is not None:
+                monitor.check_resources()
+            yield n
+            if n == 1 or (max_steps is not None and step >= max_steps):
+                return
+            n = 3 * n + 1 if n % 2 else n // 2
+            step += 1
+    finally:
+        # Also counted when the consumer stops early
+        metrics.count("collatz.steps", step)
+
+def _collatz_checkpoint_meta(max_steps, sequence):
+    return {"algorithm": "collatz", "max_steps": max_steps,
+            "done": sequence[-1] == 1 or (max_steps is not None and len(sequence) > max_steps)}
+
+def collatz_conjecture(n, max_steps=1000, checkpoint=None):
     """
     Generate the Collatz Conjecture sequence for a given number.
 
+    With a checkpoint, the sequence so far is saved whenever checkpoint.interval
+    has passed (the clock is read every CHECKPOINT_STRIDE steps), when the
+    computation fails and when it ends, and a saved sequence is continued
+    instead of being recomputed.
+
     :param n: Starting number for the sequence
     :param max_steps: Maximum number of steps to calculate
+    :param checkpoint: Optional Checkpoint to resume from and save to
     :return: Tuple of (sequence, ResourceMonitor instance)
     """
-    monitor = ResourceMonitor()
+    if max_steps is not None:
+        memory_budget.admit("collatz", n, max_steps)
+    if checkpoint is None:
+        with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+            sequence = list(iter_collatz(n, max_steps, monitor))
+        return sequence, monitor
+
     sequence = [n]
-    for _ in range(max_steps):
-        monitor.check_resources()
-        if n == 1:
-            break
-        n = 3 * n + 1 if n % 2 else n // 2
-        sequence.append(n)
+    saved = checkpoint.load()
+    if saved is not None:
+        meta, lists = saved
+        checkpoint.check(meta, algorithm="collatz")
+        checkpoint.check({"start": lists["sequence"][0]}, start=n)
+        sequence = lists["sequence"]
+    remaining = None if max_steps is None else max(max_steps - (len(sequence) - 1), 0)
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        try:
+            if not _collatz_checkpoint_meta(max_steps, sequence)["done"]:
+                terms = iter_collatz(sequence[-1], remaining, monitor)
+                next(terms)
+                for step, term in enumerate(terms, start=1):
+                    sequence.append(term)
+                    if step % CHECKPOINT_STRIDE == 0 and checkpoint.due():
+                        checkpoint.save(_collatz_checkpoint_meta(max_steps, sequence), {"sequence": sequence})
+        finally:
+            checkpoint.save(_collatz_checkpoint_meta(max_steps, sequence), {"sequence": sequence})
     return sequence, monitor
 
+@functools.lru_cache(maxsize=4)
+def jump_table(k=DEFAULT_JUMP_BITS):
+    """
+    Precompute k steps of the shortcut map T(n) = n / 2 or (3n + 1) / 2 for every residue mod 2^k.
+
+    Writing n = a * 2^k + r, the parity of the first k steps depends only on r,
+    and after them n has become a * 3^c + d, where c is the number of odd
+    steps and d is where r itself ends up.
+
+    The peak inside the block is the largest 3m + 1 reached by an odd step,
+    which is a * A + B for one of at most k coefficient pairs. For large a the
+    pair with the largest A wins; threshold gives the smallest a for which
+    that is guaranteed, so smaller a fall back to single steps.
+
+    :param k: Number of steps per jump
+    :return: Tuple of lists (multiplier, addend, odd_count, peak_coefficient,
+             peak_addend, threshold), each indexed by r; peak_coefficient is 0
+             for blocks without an odd step
+    """
+    r = np.arange(1 << k, dtype=np.int64)
+    value = r.copy()
+    odd_count = np.zeros_like(r)
+    coefficients = np.zeros((k, r.size), dtype=np.int64)
+    addends = np.zeros((k, r.size), dtype=np.int64)
+    for j in range(1, k + 1):
+        odd = value % 2 == 1
+        value = np.where(odd, (3 * value + 1) // 2, value // 2)
+        odd_count += odd
+        # 3m + 1 = 2 * T(m), and T^j(n) = a * 3^c_j * 2^(k - j) + T^j(r)
+        coefficients[j - 1] = np.where(odd, 3**odd_count * 2**(k - j + 1), 0)
+        addends[j - 1] = np.where(odd, 2 * value, 0)
+
+    best = np.argmax(coefficients, axis=0)
+    columns = np.arange(r.size)
+    best_coefficient = coefficients[best, columns]
+    best_addend = addends[best, columns]
+    gain = best_coefficient - coefficients
+    excess = addends - best_addend
+    needs_more = (coefficients > 0) & (excess > 0)
+    threshold = np.where(needs_more, -(-excess // np.where(needs_more, gain, 1)), 0).max(axis=0)
+    multiplier = 3**odd_count
+    return (multiplier.tolist(), value.tolist(), odd_count.tolist(),
+            best_coefficient.tolist(), best_addend.tolist(), threshold.tolist())
+
+def _save_summary_checkpoint(checkpoint, start, n, peak, odd_steps, even_steps):
+    # Numbers go in the lists rather than the JSON header, which limits integers to 4300 digits
+    checkpoint.save({"algorithm": "collatz_summary", "done": n == 1},
+                    {"state": [start, n, peak, odd_steps, even_steps]})
+
+def collatz_summary(n, k=DEFAULT_JUMP_BITS, store=None, checkpoint=None):
+    """
+    Follow the Collatz trajectory of n to 1, keeping only its step counts and peak.
+
+    While n is large, k steps are applied at once with one multiply-add from
+    the jump_table, so trajectories of starting numbers with hundreds of digits
+    take about steps / k big-int operations and constant memory. With a
+    store, the trajectory is followed only until it drops below store.count,
+    and the rest is read from the stored record.
+
+    With a checkpoint, the current value, peak and step counts are saved
+    whenever checkpoint.interval has passed (the clock is read every
+    CHECKPOINT_STRIDE iterations), when the computation fails and when it
+    ends, and a saved trajectory is continued from where it stopped.
+
+    :param n: Starting number (at least 1)
+    :param k: Number of steps per jump
+    :param store: Optional CollatzStore consulted for small values
+    :param checkpoint: Optional Checkpoint to resume from and save to
+    :return: Tuple of (CollatzSummary, ResourceMonitor instance)
+    """
+    if n < 1:
+        raise ValueError(f"Collatz trajectories start from a positive integer, got {n}")
+    multiplier, addend, odd_count, peak_coefficient, peak_addend, threshold = jump_table(k)
+    mask = (1 << k) - 1
+    summary = CollatzSummary(start=n, peak=n)
+    odd_steps = even_steps = jumps = 0
+    peak = n
+    if checkpoint is not None:
+        saved = checkpoint.load()
+        if saved is not None:
+            meta, lists = saved
+            checkpoint.check(meta, algorithm="collatz_summary")
+            start, n, peak, odd_steps, even_steps = lists["state"]
+            checkpoint.check({"start": start}, start=summary.start)
+    stored_below = store.count if store is not None else 0
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        try:
+            while n > 1:
+                monitor.check_resources()
+                if n < stored_below:
+                    stored_steps, stored_odd, stored_peak = store.lookup(n)
+                    if stored_peak != PEAK_OVERFLOW:
+                        peak, odd_steps, even_steps, n = (
+                            max(peak, stored_peak), odd_steps + stored_odd, even_steps + stored_steps - stored_odd, 1)
+                        metrics.count("collatz.store_hits")
+                        break
+                    # Saturated peaks are not exact, so follow this trajectory instead
+                    stored_below = 0
+                # Each step updates n and its counts in one assignment, so an
+                # interrupted trajectory is checkpointed in a consistent state
+                a, r = n >> k, n & mask
+                if a and a >= threshold[r]:
+                    if peak_coefficient[r]:
+                        peak = max(peak, a * peak_coefficient[r] + peak_addend[r])
+                    n, odd_steps, even_steps = a * multiplier[r] + addend[r], odd_steps + odd_count[r], even_steps + k
+                    jumps += 1
+                    if checkpoint is not None and jumps % CHECKPOINT_STRIDE == 0 and checkpoint.due():
+                        _save_summary_checkpoint(checkpoint, summary.start, n, peak, odd_steps, even_steps)
+                elif n & 1:
+                    raised = 3 * n + 1
+                    peak = max(peak, raised)
+                    n, odd_steps = raised, odd_steps + 1
+                else:
+                    n, even_steps = n >> 1, even_steps + 1
+        finally:
+            if checkpoint is not None:
+                _save_summary_checkpoint(checkpoint, summary.start, n, peak, odd_steps, even_steps)
+    metrics.count("collatz.summaries")
+    metrics.count("collatz.jumps", jumps)
+    metrics.count("collatz.steps", odd_steps + even_steps)
+    metrics.observe("collatz.stopping_time", odd_steps + even_steps)
+    summary.peak = peak
+    summary.odd_steps = odd_steps
+    summary.even_steps = even_steps
+    summary.steps = odd_steps + even_steps
+    return summary, monitor
+
 if __name__ == "__main__":
     start_number = 27
     result, monitor = collatz_conjecture(start_number)
@@ -5,14 +5,17 @@ This module provides visualization tools for the Collatz Conjecture algorithm.
 import matplotlib.pyplot as plt
 from .collatz_conjecture import collatz_conjecture
 
-def plot_collatz_sequence(start_number, max_steps=1000):
+def plot_collatz_sequence(start_number, max_steps=1000, sequence=None, monitor=None):
     """
     Generate and plot the Collatz Conjecture sequence.
 
     :param start_number: The number to start the sequence from
     :param max_steps: Maximum number of steps to calculate
+    :param sequence: Optional precomputed sequence, plotted instead of generating it again
+    :param monitor: ResourceMonitor from the run that produced sequence
     """
-    sequence, monitor = collatz_conjecture(start_number, max_steps)
+    if sequence is None:
+        sequence, monitor = collatz_conjecture(start_number, max_steps)
     
     plt.figure(figsize=(12, 6))
     plt.plot(range(len(sequence)), sequence, marker='o')
@@ -0,0 +1,121 @@
+"""
+This module implements a persistent, memory-mapped store of Collatz stopping times and peaks.
+"""
+
+import os
+import numpy as np
+from .collatz_batch import DEFAULT_CHUNK_SIZE, PEAK_OVERFLOW, fill_stopping_times
+
+STORE_MAGIC = b"COLLATZ1"
+HEADER_SIZE = 64
+RECORD_DTYPE = np.dtype([("steps", "<u2"), ("odd", "<u2"), ("peak", "<u8")])
+
+class CollatzStore:
+    """
+    A file holding the stopping time, odd step count and peak of every n below count.
+
+    The file is a 64-byte header (magic and count) followed by one packed
+    12-byte record per n, so the record of n sits at a fixed offset and is
+    read straight from the memory map. Readers open the store read-only and
+    share its pages through the OS page cache. Only one process may extend a
+    store at a time; the header count is written last, so readers never see
+    records that are not complete.
+    """
+
+    def __init__(self, path, writable=False):
+        """
+        Open the store at path, creating an empty one if it is writable and missing.
+
+        :param path: Path of the store file
+        :param writable: Open the store for extending
+        """
+        self.path = path
+        self.writable = writable
+        if writable and not os.path.exists(path):
+            self._create()
+        self.refresh()
+
+    def _create(self):
+        records = np.zeros(2, dtype=RECORD_DTYPE)
+        records["peak"][1] = 1
+        with open(self.path, "wb") as handle:
+            handle.write(self._header(2))
+            handle.write(records.tobytes())
+
+    @staticmethod
+    def _header(count):
+        return STORE_MAGIC + np.uint64(count).tobytes() + bytes(HEADER_SIZE - len(STORE_MAGIC) - 8)
+
+    def refresh(self):
+        """
+        Re-read the header and remap the records, picking up growth by another process.
+        """
+        with open(self.path, "rb") as handle:
+            header = handle.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE or not header.startswith(STORE_MAGIC):
+            raise ValueError(f"{self.path} is not a Collatz store")
+        self.count = int(np.frombuffer(header, dtype="<u8", count=1, offset=len(STORE_MAGIC))[0])
+        self.records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r+" if self.writable else "r",
+                                 offset=HEADER_SIZE, shape=(self.count,))
+
+    @property
+    def steps(self):
+        """Stopping times indexed by n, as a view into the file."""
+        return self.records["steps"]
+
+    @property
+    def odd_steps(self):
+        """Odd (3n + 1) step counts indexed by n, as a view into the file."""
+        return self.records["odd"]
+
+    @property
+    def peaks(self):
+        """Peaks indexed by n, as a view into the file; PEAK_OVERFLOW if beyond uint64."""
+        return self.records["peak"]
+
+    def __contains__(self, n):
+        return 0 < n < self.count
+
+    def lookup(self, n):
+        """
+        Look up the record of a single starting number.
+
+        :param n: Starting number in [1, count)
+        :return: Tuple of (stopping time, odd step count, peak)
+        """
+        if n not in self:
+            raise KeyError(n)
+        steps, odd, peak = self.records[n].tolist()
+        return steps, odd, peak
+
+    def extend(self, limit, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Grow the store to cover every n below limit, computing only the new range.
+
+        :param limit: Exclusive upper bound on the starting numbers to cover
+        :param chunk_size: Number of starting numbers advanced together
+        """
+        if not self.writable:
+            raise PermissionError(f"{self.path} was opened read-only")
+        if limit <= self.count:
+            return
+        old_count = self.count
+        with open(self.path, "r+b") as handle:
+            handle.truncate(HEADER_SIZE + limit * RECORD_DTYPE.itemsize)
+        records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r+", offset=HEADER_SIZE, shape=(limit,))
+        steps, odd, peaks = records["steps"], records["odd"], records["peak"]
+        fill_stopping_times(steps, peaks, old_count, chunk_size, odd_steps=odd)
+        records.flush()
+        del records
+        with open(self.path, "r+b") as handle:
+            handle.write(self._header(limit))
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.refresh()
+
+if __name__ == "__main__":
+    path = "collatz_store.bin"
+    store = CollatzStore(path, writable=True)
+    store.extend(10**6)
+    print(f"Store covers n < {store.count}; record of 27: {store.lookup(27)}")
+    print(f"Overflowed peaks: {int(np.count_nonzero(store.peaks == PEAK_OVERFLOW))}")
@@ -2,21 +2,219 @@
 This module implements the Fibonacci Sequence algorithm.
 """
 
-from ...resource_monitor import ResourceMonitor
+import math
+import numpy as np
+from ... import memory_budget, metrics
+from ...resource_monitor import ResourceMonitor, DEFAULT_SAMPLE_INTERVAL
+from ..prime_factorization.prime_factorization import prime_factors
 
-def fibonacci_sequence(n):
+# Largest modulus whose residues can be multiplied in uint64 without overflow
+VECTOR_MODULUS_LIMIT = 1 << 32
+
+# F(k) fits in a float64 for every k below this
+FLOAT_TERMS = 1477
+
+def fibonacci_pair(n, modulus=None):
+    """
+    Compute F(n) and F(n + 1) by fast doubling.
+
+    Walks the bits of n from the top, using F(2k) = F(k) * (2F(k + 1) - F(k))
+    and F(2k + 1) = F(k)^2 + F(k + 1)^2, so it takes O(log n) multiplications.
+
+    :param n: Non-negative index
+    :param modulus: Optional modulus applied after every step
+    :return: Tuple of (F(n), F(n + 1)), reduced by modulus if given
+    """
+    if n < 0:
+        raise ValueError(f"Fibonacci index must be non-negative, got {n}")
+    metrics.count("fibonacci.doubling_steps", n.bit_length())
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        a, b = a * (2 * b - a), a * a + b * b
+        if modulus is not None:
+            a, b = a % modulus, b % modulus
+        if bit == "1":
+            a, b = b, a + b
+            if modulus is not None:
+                b %= modulus
+    if modulus is not None:
+        a, b = a % modulus, b % modulus
+    return a, b
+
+def pisano_period(m):
+    """
+    Compute the Pisano period of m, the period of the Fibonacci sequence modulo m.
+
+    The period of m is the lcm of the periods of its prime powers. The period of
+    a prime p divides p - 1 or 2(p + 1) depending on p mod 5, and is found by
+    dividing prime factors out of that bound; the period of p^k is the period
+    of p times a power of p.
+
+    :param m: Positive modulus
+    :return: The Pisano period
+    """
+    if m < 1:
+        raise ValueError(f"Modulus must be positive, got {m}")
+    period = 1
+    exponents = {}
+    for p in prime_factors(m):
+        exponents[p] = exponents.get(p, 0) + 1
+    for p, k in exponents.items():
+        if p == 2:
+            prime_period = 3
+        elif p == 5:
+            prime_period = 20
+        else:
+            prime_period = p - 1 if p % 5 in (1, 4) else 2 * (p + 1)
+            for q in set(prime_factors(prime_period)):
+                while prime_period % q == 0 and fibonacci_pair(prime_period // q, p) == (0, 1):
+                    prime_period //= q
+        power_period = prime_period
+        while fibonacci_pair(power_period, p**k) != (0, 1):
+            power_period *= p
+        period = math.lcm(period, power_period)
+    return period
+
+def fibonacci_log10(count):
+    """
+    Compute log10 F(k) for k in [0, count) without forming the terms.
+
+    Terms that fit in a float64 are summed directly; beyond them Binet's
+    formula F(k) = phi^k / sqrt(5) is exact to float precision.
+
+    :param count: Number of terms
+    :return: NumPy float64 array; entry 0 is -inf
+    """
+    head = np.zeros(min(count, FLOAT_TERMS))
+    if head.size > 1:
+        head[1] = 1.0
+        for k in range(2, head.size):
+            head[k] = head[k - 1] + head[k - 2]
+    with np.errstate(divide="ignore"):
+        head = np.log10(head)
+    tail = np.arange(head.size, count) * math.log10((1 + math.sqrt(5)) / 2) - math.log10(5) / 2
+    return np.concatenate([head, tail])
+
+def fibonacci_digits(n):
+    """
+    Count the decimal digits of F(n) without forming it.
+
+    Below FLOAT_TERMS the term itself is computed; beyond it log10 F(n) is
+    taken from Binet's formula, as in fibonacci_log10, for this one index.
+
+    :param n: Non-negative index
+    :return: Number of digits of F(n)
+    """
+    if n < FLOAT_TERMS:
+        value, _ = fibonacci_pair(n)
+        return len(str(value))
+    return int(n * math.log10((1 + math.sqrt(5)) / 2) - math.log10(5) / 2) + 1
+
+def iter_fibonacci(start=0, stop=None, modulus=None, monitor=None):
+    """
+    Generate the Fibonacci numbers F(start), F(start + 1), ... in constant memory.
+
+    :param start: Index of the first term
+    :param stop: Optional index after the last term; without it the generator is endless
+    :param modulus: Optional modulus for all terms
+    :param monitor: Optional ResourceMonitor checked once per term
+    :return: Generator of the terms
+    """
+    a, b = fibonacci_pair(start, modulus)
+    index = start
+    while stop is None or index < stop:
+        if monitor is not None:
+            monitor.check_resources()
+        yield a
+        a, b = b, a + b
+        if modulus is not None:
+            b %= modulus
+        index += 1
+
+def _vector_window(i, j, modulus, monitor):
+    # F(s + k) = F(s + 1) F(k) + F(s) F(k - 1) doubles the known prefix per pass
+    terms = np.zeros(max(j - i, 2), dtype=np.uint64)
+    first, second = fibonacci_pair(i, modulus)
+    terms[0], terms[1] = first, second
+    known = 2
+    while known < terms.size:
+        monitor.check_resources()
+        s = known - 1
+        f_s, f_s1 = (np.uint64(x) for x in fibonacci_pair(s, modulus))
+        new = min(s, terms.size - known)
+        m = np.uint64(modulus)
+        terms[known:known + new] = (f_s1 * terms[1:new + 1] % m + f_s * terms[:new] % m) % m
+        known += new
+    return terms[:j - i]
+
+def fibonacci_window(i, j, modulus=None, as_array=False):
+    """
+    Generate the terms F(i) .. F(j - 1) without computing the terms before them.
+
+    F(i) and F(i + 1) are found by fast doubling. With a modulus below 2^32 the
+    rest of the window is filled with uint64 NumPy arithmetic, doubling the
+    computed prefix per pass; otherwise terms are added one by one.
+
+    :param i: Index of the first term
+    :param j: Index after the last term
+    :param modulus: Optional modulus for all terms
+    :param as_array: Return a NumPy uint64 array (needs a modulus of at most 2^32)
+    :return: Tuple of (list or NumPy array of terms, ResourceMonitor instance)
+    """
+    if i < 0 or j < i:
+        raise ValueError(f"Invalid Fibonacci window [{i}, {j})")
+    if modulus is not None and modulus < 1:
+        raise ValueError(f"Modulus must be positive, got {modulus}")
+    vectorized = modulus is not None and modulus <= VECTOR_MODULUS_LIMIT
+    if as_array and not vectorized:
+        raise ValueError("as_array needs a modulus of at most 2^32")
+    memory_budget.admit("fibonacci", i, j, modulus)
+    metrics.count("fibonacci.terms", j - i)
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        if vectorized:
+            terms = _vector_window(i, j, modulus, monitor)
+            return (terms if as_array else terms.tolist()), monitor
+        terms = list(iter_fibonacci(i, j, modulus, monitor))
+    return terms, monitor
+
+def fibonacci_nth(n):
+    """
+    Compute the nth Fibonacci number by fast doubling.
+
+    :param n: Non-negative index
+    :return: Tuple of (F(n), ResourceMonitor instance)
+    """
+    memory_budget.admit("fibonacci_nth", n)
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        value, _ = fibonacci_pair(n)
+    return value, monitor
+
+def fibonacci_mod(n, m):
+    """
+    Compute F(n) mod m, reducing n by the Pisano period of m first.
+
+    All intermediate values stay below m^2, however large n is.
+
+    :param n: Non-negative index
+    :param m: Positive modulus
+    :return: Tuple of (F(n) mod m, ResourceMonitor instance)
+    """
+    if n < 0:
+        raise ValueError(f"Fibonacci index must be non-negative, got {n}")
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        value, _ = fibonacci_pair(n % pisano_period(m), m)
+    return value, monitor
+
+def fibonacci_sequence(n, modulus=None, as_array=False):
     """
     Generate the Fibonacci Sequence up to the nth term.
 
     :param n: Number of terms to generate
+    :param modulus: Optional modulus for all terms
+    :param as_array: Return a NumPy uint64 array (needs a modulus of at most 2^32)
     :return: Tuple of (sequence, ResourceMonitor instance)
     """
-    monitor = ResourceMonitor()
-    sequence = [0, 1]
-    for _ in range(2, n):
-        monitor.check_resources()
-        sequence.append(sequence[-1] + sequence[-2])
-    return sequence, monitor
+    return fibonacci_window(0, max(n, 2), modulus, as_array)
 
 if __name__ == "__main__":
     num_terms = 20
@@ -24,5 +222,6 @@ if __name__ == "__main__":
     print(f"Fibonacci sequence up to {num_terms} terms: {result}")
     print(f"Sequence length: {len(result)}")
     print(f"Final number in sequence: {result[-1]}")
+    print(f"F(10^6) mod 10^9 + 7: {fibonacci_mod(10**6, 10**9 + 7)[0]}")
     print(f"Max memory usage: {max(monitor.memory_usage):.2f}%")
-    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
\ No newline at end of file
+    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
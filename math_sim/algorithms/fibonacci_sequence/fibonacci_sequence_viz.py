@@ -3,22 +3,34 @@ This module provides visualization tools for the Fibonacci Sequence algorithm.
 """
 
 import matplotlib.pyplot as plt
-from .fibonacci_sequence import fibonacci_sequence
+from ...resource_monitor import ResourceMonitor, DEFAULT_SAMPLE_INTERVAL
+from .fibonacci_sequence import fibonacci_sequence, fibonacci_log10, FLOAT_TERMS
 
-def plot_fibonacci_sequence(num_terms):
+def plot_fibonacci_sequence(num_terms, sequence=None, monitor=None):
     """
     Generate and plot the Fibonacci Sequence.
 
+    Sequences whose terms overflow a float are plotted as log10 of each term,
+    computed without forming the terms themselves.
+
     :param num_terms: Number of terms to generate and plot
+    :param sequence: Optional precomputed sequence of num_terms terms, plotted instead of generating it again
+    :param monitor: ResourceMonitor from the run that produced sequence
     """
-    sequence, monitor = fibonacci_sequence(num_terms)
-    
     plt.figure(figsize=(12, 6))
-    plt.plot(range(len(sequence)), sequence, marker='o')
+    if num_terms <= FLOAT_TERMS:
+        if sequence is None:
+            sequence, monitor = fibonacci_sequence(num_terms)
+        plt.plot(range(len(sequence)), [float(term) for term in sequence], marker='o')
+        plt.ylabel("Value")
+        plt.yscale('log')  # Use log scale for y-axis due to exponential growth
+    else:
+        with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+            magnitudes = fibonacci_log10(num_terms)
+        plt.plot(range(num_terms), magnitudes)
+        plt.ylabel("log10(Value)")
     plt.title(f"Fibonacci Sequence ({num_terms} terms)")
     plt.xlabel("Term")
-    plt.ylabel("Value")
-    plt.yscale('log')  # Use log scale for y-axis due to exponential growth
     plt.grid(True)
     plt.savefig(f"fibonacci_sequence_{num_terms}.png")
     plt.close()
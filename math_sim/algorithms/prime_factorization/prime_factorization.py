@@ -0,0 +1,202 @@
+"""
+This module implements prime factorization by trial division, Miller-Rabin and Pollard's rho.
+"""
+
+import functools
+import itertools
+import math
+import random
+from dataclasses import dataclass, field
+from ... import metrics
+from ...resource_monitor import ResourceMonitor, DEFAULT_SAMPLE_INTERVAL
+
+# Trial division covers every prime below this, so cofactors below its square are prime
+SMALL_PRIME_LIMIT = 1 << 16
+
+# Miller-Rabin with these bases is deterministic for n < 3.3 * 10^24
+_DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_DETERMINISTIC_LIMIT = 3317044064679887385961981
+
+@dataclass
+class FactorizationState:
+    """
+    Progress of factoring n: the primes found so far and the cofactors still to split.
+
+    prime_factors keeps it up to date, so a factorization that is interrupted
+    can be continued from it instead of starting over.
+    """
+    n: int
+    factors: list = field(default_factory=list)
+    pending: list = field(default_factory=list)
+
+@functools.lru_cache(maxsize=1)
+def small_primes():
+    """
+    Primes below SMALL_PRIME_LIMIT, sieved once per process.
+
+    The table is small enough to sieve with a bytearray in a few milliseconds,
+    which keeps NumPy out of processes that only factor numbers.
+
+    :return: Tuple of primes
+    """
+    flags = bytearray([1]) * SMALL_PRIME_LIMIT
+    flags[:2] = b"\x00\x00"
+    for p in range(2, math.isqrt(SMALL_PRIME_LIMIT - 1) + 1):
+        if flags[p]:
+            flags[p * p::p] = bytes(len(range(p * p, SMALL_PRIME_LIMIT, p)))
+    return tuple(itertools.compress(range(SMALL_PRIME_LIMIT), flags))
+
+def is_probable_prime(n, rounds=16):
+    """
+    Test n for primality with the Miller-Rabin test.
+
+    The result is exact for n < 3.3 * 10^24, which includes every 64-bit
+    integer. Above that, rounds extra random bases are tried, so a composite
+    passes with probability at most 4^-rounds.
+
+    :param n: Integer to test
+    :param rounds: Number of random bases used beyond the deterministic range
+    :return: True if n is (probably) prime
+    """
+    if n < 2:
+        return False
+    metrics.count("factorize.primality_tests")
+    for p in _DETERMINISTIC_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    bases = list(_DETERMINISTIC_BASES)
+    if n >= _DETERMINISTIC_LIMIT:
+        bases += [random.randrange(2, n - 1) for _ in range(rounds)]
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def pollard_rho_brent(n, monitor=None):
+    """
+    Find a non-trivial factor of an odd composite n with Brent's variant of Pollard's rho.
+
+    Differences are multiplied together in batches so only one gcd is taken
+    per batch; if a batch overshoots, it is replayed one step at a time.
+
+    :param n: Odd composite integer
+    :param monitor: Optional ResourceMonitor checked once per batch
+    :return: A factor d with 1 < d < n
+    """
+    batch = 128
+    iterations = 0
+    while True:
+        metrics.count("factorize.pollard_rho_attempts")
+        y, c = random.randrange(1, n), random.randrange(1, n)
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                if monitor is not None:
+                    monitor.check_resources()
+                ys = y
+                for _ in range(min(batch, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += batch
+            iterations += r + min(k, r)
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            metrics.observe("factorize.pollard_rho_iterations", iterations)
+            return g
+
+def prime_factors(n, monitor=None, state=None, on_progress=None):
+    """
+    Factorize a number into its prime factors.
+
+    Small factors are removed by trial division over a cached prime table.
+    What is left is tested with Miller-Rabin and, if composite, split with
+    Pollard's rho until every part is prime.
+
+    :param n: Positive integer to factorize
+    :param monitor: Optional ResourceMonitor checked while factoring
+    :param state: Optional FactorizationState of n; if it has pending cofactors
+                  the factorization continues from it, and it is updated as
+                  cofactors are split
+    :param on_progress: Optional function called with state after every split
+    :return: List of prime factors in ascending order
+    """
+    if n < 1:
+        raise ValueError(f"Cannot factorize {n}: expected a positive integer")
+    if state is not None and state.n != n:
+        raise ValueError(f"Factorization state is for {state.n}, not {n}")
+    if state is not None and state.pending:
+        return _split_pending(state.factors, state.pending, monitor, state, on_progress)
+    factors = []
+    trial_divisions = 0
+    for trial_divisions, p in enumerate(small_primes(), start=1):
+        if p * p > n:
+            break
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+    metrics.count("factorize.numbers")
+    metrics.count("factorize.trial_divisions", trial_divisions)
+    if n == 1:
+        return factors
+    if n < SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT:
+        factors.append(n)
+        return factors
+
+    return _split_pending(factors, [n], monitor, state, on_progress)
+
+def _split_pending(factors, pending, monitor, state, on_progress):
+    factors, pending = list(factors), list(pending)
+    with metrics.phase("factorize.pollard_rho"):
+        while pending:
+            if state is not None:
+                state.factors, state.pending = list(factors), list(pending)
+                if on_progress is not None:
+                    on_progress(state)
+            m = pending.pop()
+            if is_probable_prime(m):
+                factors.append(m)
+            else:
+                d = pollard_rho_brent(m, monitor)
+                pending += [d, m // d]
+    if state is not None:
+        state.factors, state.pending = sorted(factors), []
+    return sorted(factors)
+
+def factorize(n):
+    """
+    Factorize a number into its prime factors.
+
+    :param n: Number to factorize
+    :return: Tuple of (list of prime factors, ResourceMonitor instance)
+    """
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        factors = prime_factors(n, monitor)
+    return factors, monitor
+
+if __name__ == "__main__":
+    number = 2**64 + 1
+    factors, monitor = factorize(number)
+    print(f"Factors of {number}: {factors}")
+    print(f"Max memory usage: {max(monitor.memory_usage):.2f}%")
+    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
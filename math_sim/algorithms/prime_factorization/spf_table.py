@@ -0,0 +1,132 @@
+"""
+This module implements bulk factorization of bounded integers with a smallest-prime-factor table.
+"""
+
+import math
+import os
+import numpy as np
+from ... import memory_budget
+from ..sieve_of_eratosthenes.sieve_of_eratosthenes import sieve_of_eratosthenes
+from .prime_factorization import prime_factors
+
+# Largest table built on demand when no table file is given (64 MiB)
+DEFAULT_SPF_LIMIT = 1 << 24
+
+def smallest_prime_factor_table(limit):
+    """
+    Build a table of the smallest prime factor of every n up to limit.
+
+    Base primes are applied in descending order, so the smallest prime
+    dividing n is the last one written to its entry. Entries left at zero are
+    primes and are set to themselves. Entries 0 and 1 are 0 and 1.
+
+    :param limit: Largest n in the table (below 2^32)
+    :return: NumPy uint32 array of length limit + 1
+    """
+    if not 0 <= limit < 2**32:
+        raise ValueError(f"SPF table limit must be in [0, 2^32), got {limit}")
+    memory_budget.admit("spf_table", limit)
+    table = np.zeros(limit + 1, dtype=np.uint32)
+    base, _ = sieve_of_eratosthenes(math.isqrt(limit), as_array=True)
+    for p in base[::-1].tolist():
+        table[p * p::p] = p
+    primes = np.flatnonzero(table == 0)
+    table[primes] = primes
+    return table
+
+def save_spf_table(table, path):
+    """
+    Save an SPF table as a .npy file that load_spf_table can memory-map.
+
+    :param table: Table from smallest_prime_factor_table
+    :param path: Destination file path
+    """
+    np.save(path, table, allow_pickle=False)
+
+def load_spf_table(path, mmap=True):
+    """
+    Load an SPF table saved with save_spf_table.
+
+    With mmap the file is mapped read-only, so every process that loads it
+    shares the same pages through the OS page cache instead of holding a copy.
+
+    :param path: Path of the .npy file
+    :param mmap: Memory-map the file instead of reading it into memory
+    :return: NumPy uint32 array (a read-only memmap if mmap is set)
+    """
+    return np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+def cached_spf_table(path, limit):
+    """
+    Load the SPF table at path if it covers limit, otherwise build and save it first.
+
+    :param path: Path of the .npy file
+    :param limit: Largest n the table must cover
+    :return: Memory-mapped NumPy uint32 array covering at least limit
+    """
+    if os.path.exists(path):
+        table = load_spf_table(path)
+        if table.size > limit:
+            return table
+    save_spf_table(smallest_prime_factor_table(limit), path)
+    return load_spf_table(path)
+
+def spf_factor_arrays(numbers, table):
+    """
+    Factor many integers at once by repeated SPF lookups.
+
+    Every pass looks up the smallest prime factor of all remaining cofactors
+    with one gather and divides it out, so the number of passes is the largest
+    number of prime factors of any input, at most log2 of the largest input.
+
+    :param numbers: Array-like of integers in [1, len(table))
+    :param table: Table from smallest_prime_factor_table or load_spf_table
+    :return: Tuple of (owner, factor) int64 arrays: factor[i] is a prime factor of
+             numbers[owner[i]], grouped by owner with factors in ascending order
+    """
+    remaining = np.asarray(numbers, dtype=np.int64)
+    if remaining.size and (remaining.min() < 1 or remaining.max() >= len(table)):
+        raise ValueError("Numbers must lie in [1, len(table))")
+    owners = np.arange(remaining.size)
+    owner_parts, factor_parts = [], []
+    while True:
+        active = remaining > 1
+        owners, remaining = owners[active], remaining[active]
+        if not remaining.size:
+            break
+        factors = table[remaining].astype(np.int64)
+        owner_parts.append(owners)
+        factor_parts.append(factors)
+        remaining = remaining // factors
+    if not owner_parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    owner = np.concatenate(owner_parts)
+    factor = np.concatenate(factor_parts)
+    order = np.argsort(owner, kind="stable")
+    return owner[order].astype(np.int64), factor[order]
+
+def factorize_batch(numbers, table):
+    """
+    Factorize many integers, using the SPF table for those it covers.
+
+    Numbers beyond the table are handed to the general prime_factors engine.
+
+    :param numbers: Iterable of positive integers
+    :param table: Table from smallest_prime_factor_table or load_spf_table
+    :return: Dictionary mapping each distinct input to its list of prime factors
+    """
+    distinct = sorted(set(numbers))
+    in_range = [n for n in distinct if 0 < n < len(table)]
+    factor_lists = [[] for _ in in_range]
+    owner, factor = spf_factor_arrays(in_range, table)
+    for i, p in zip(owner.tolist(), factor.tolist()):
+        factor_lists[i].append(p)
+    results = dict(zip(in_range, factor_lists))
+    for n in distinct:
+        if n not in results:
+            results[n] = prime_factors(n)
+    return results
+
+if __name__ == "__main__":
+    table = smallest_prime_factor_table(10**6)
+    print(factorize_batch([84, 100, 123, 999983, 10**6, 2**64 + 1], table))
@@ -0,0 +1,54 @@
+"""
+This module implements prime counting without sieving the whole range, using the Lucy_Hedgehog method.
+"""
+
+import math
+import numpy as np
+from ... import memory_budget, metrics
+from .sieve_of_eratosthenes import sieve_of_eratosthenes
+
+def prime_count(x, monitor=None):
+    """
+    Count the primes up to x in O(x^(3/4)) time and O(sqrt(x)) memory.
+
+    S(v) starts as the number of integers in [2, v] and, after processing
+    each prime p up to sqrt(x), the multiples of p with no smaller prime
+    factor are removed: S(v) -= S(v // p) - S(p - 1) for every v >= p^2.
+    Only the O(sqrt(x)) values v = x // i are ever needed. They are kept in
+    two arrays, large[i] = S(x // i) and small[v] = S(v) for v <= sqrt(x),
+    and every prime updates a whole range of them with one vectorized step.
+
+    :param x: Upper limit (inclusive), below 2^63
+    :param monitor: Optional ResourceMonitor checked once per base prime
+    :return: The number of primes up to x
+    """
+    if x < 2:
+        return 0
+    memory_budget.admit("prime_count", x)
+    r = math.isqrt(x)
+    i = np.arange(r + 1, dtype=np.int64)
+    small = i - 1
+    small[0] = 0
+    large = np.zeros(r + 1, dtype=np.int64)
+    large[1:] = x // i[1:] - 1
+    primes, _ = sieve_of_eratosthenes(r, as_array=True)
+    metrics.count("prime_count.base_primes", primes.size)
+    for below, p in enumerate(primes.tolist()):
+        if monitor is not None:
+            monitor.check_resources()
+        p2 = p * p
+        # large[i] for i <= x / p^2; x // (i * p) is in large while i * p <= r
+        last = min(r, x // p2)
+        split = min(last, r // p)
+        large[1:split + 1] -= large[p:split * p + 1:p] - below
+        if last > split:
+            rest = i[split + 1:last + 1]
+            large[split + 1:last + 1] -= small[x // (rest * p)] - below
+        # small[v] for p^2 <= v <= r; small[v // p] repeats each value p times
+        if p2 <= r:
+            small[p2:] -= np.repeat(small[p:r // p + 1], p)[:r - p2 + 1] - below
+    return int(large[1])
+
+if __name__ == "__main__":
+    for exponent in range(1, 13):
+        print(f"pi(10^{exponent}) = {prime_count(10**exponent)}")
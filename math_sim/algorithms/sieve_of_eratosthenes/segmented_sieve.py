@@ -0,0 +1,124 @@
+"""
+This module implements a segmented Sieve of Eratosthenes that streams primes in a range [lo, hi).
+"""
+
+import math
+import numpy as np
+from ... import metrics
+from .sieve_of_eratosthenes import sieve_of_eratosthenes
+
+# Odd numbers per segment; at one byte each this keeps a segment within L2 cache
+DEFAULT_SEGMENT_SIZE = 1 << 18
+
+# Base primes whose stride is at least segment_size / _DENSE_HITS cross off a
+# segment in a few vectorized rounds instead of one slice assignment each
+_DENSE_HITS = 8
+
+def base_primes(hi):
+    """
+    Odd primes up to sqrt(hi - 1), which are enough to sieve any segment below hi.
+
+    :param hi: Exclusive upper end of the range to be sieved
+    :return: NumPy int64 array of odd primes
+    """
+    limit = math.isqrt(hi - 1) if hi > 1 else 0
+    primes, _ = sieve_of_eratosthenes(limit, as_array=True)
+    return primes[1:] if primes.size else primes
+
+def segment_odd_mask(seg_lo, seg_hi, primes):
+    """
+    Sieve the odd numbers of one segment [seg_lo, seg_hi).
+
+    :param seg_lo: Odd start of the segment
+    :param seg_hi: Exclusive end of the segment
+    :param primes: Odd base primes covering sqrt(seg_hi - 1), as from base_primes()
+    :return: Boolean NumPy array where entry i is True if seg_lo + 2 * i is prime
+    """
+    size = (seg_hi - seg_lo + 1) // 2
+    metrics.count("sieve.segments")
+    mask = np.ones(size, dtype=bool)
+    if seg_lo == 1 and size:
+        mask[0] = False
+    primes = primes[primes * primes < seg_hi]
+    if not primes.size:
+        return mask
+
+    # First odd multiple of p in the segment, but never below p * p
+    first = np.maximum(primes * primes, (seg_lo + primes - 1) // primes * primes)
+    first += primes * (first % 2 == 0)
+    index = (first - seg_lo) // 2
+
+    dense = np.searchsorted(primes, max(size // _DENSE_HITS, 1))
+    crossings = 0
+    for p, i in zip(primes[:dense].tolist(), index[:dense].tolist()):
+        mask[i::p] = False
+        crossings += (size - i + p - 1) // p if i < size else 0
+    sparse_primes, sparse_index = primes[dense:], index[dense:]
+    while sparse_index.size:
+        in_segment = sparse_index < size
+        sparse_primes, sparse_index = sparse_primes[in_segment], sparse_index[in_segment]
+        mask[sparse_index] = False
+        crossings += sparse_index.size
+        sparse_index = sparse_index + sparse_primes
+    metrics.count("sieve.crossings", crossings)
+    return mask
+
+def iter_prime_segments(lo, hi, segment_size=DEFAULT_SEGMENT_SIZE):
+    """
+    Generate the primes in [lo, hi) one segment at a time.
+
+    Memory use is O(sqrt(hi) + segment_size) no matter how wide the range is.
+
+    :param lo: Inclusive lower end of the range
+    :param hi: Exclusive upper end of the range
+    :param segment_size: Number of odd numbers sieved per segment
+    :return: Generator of sorted NumPy int64 arrays of primes
+    """
+    if lo < 0 or hi < lo:
+        raise ValueError(f"Invalid prime range [{lo}, {hi})")
+    primes = base_primes(hi)
+    if lo <= 2 < hi:
+        yield np.array([2], dtype=np.int64)
+    for seg_lo in range(max(lo, 1) | 1, hi, 2 * segment_size):
+        seg_hi = min(seg_lo + 2 * segment_size, hi)
+        yield seg_lo + 2 * np.flatnonzero(segment_odd_mask(seg_lo, seg_hi, primes))
+
+def iter_primes(lo=2, hi=None, segment_size=DEFAULT_SEGMENT_SIZE):
+    """
+    Generate the primes in [lo, hi) one at a time.
+
+    Without hi the generator is endless: the range is sieved in windows that
+    double in size, so memory stays O(sqrt(x) + segment_size) at the current
+    position x.
+
+    :param lo: Inclusive lower end of the range
+    :param hi: Optional exclusive upper end of the range
+    :param segment_size: Number of odd numbers sieved per segment
+    :return: Generator of Python int primes
+    """
+    if hi is not None:
+        for segment in iter_prime_segments(lo, hi, segment_size):
+            yield from segment.tolist()
+        return
+    window_lo = lo
+    while True:
+        window_hi = max(2 * window_lo, window_lo + 2 * segment_size)
+        for segment in iter_prime_segments(window_lo, window_hi, segment_size):
+            yield from segment.tolist()
+        window_lo = window_hi
+
+def count_primes(lo, hi, segment_size=DEFAULT_SEGMENT_SIZE):
+    """
+    Count the primes in [lo, hi) with the segmented sieve.
+
+    :param lo: Inclusive lower end of the range
+    :param hi: Exclusive upper end of the range
+    :param segment_size: Number of odd numbers sieved per segment
+    :return: Number of primes in the range
+    """
+    return sum(segment.size for segment in iter_prime_segments(lo, hi, segment_size))
+
+if __name__ == "__main__":
+    lo, hi = 10**12, 10**12 + 10**6
+    print(f"Primes in [{lo}, {hi}): {count_primes(lo, hi)}")
+    print(f"First few: {next(iter_prime_segments(lo, hi))[:10].tolist()}")
@@ -2,23 +2,84 @@
 This module implements the Sieve of Eratosthenes algorithm for finding prime numbers.
 """
 
-from ...resource_monitor import ResourceMonitor
+import math
+import numpy as np
+from ... import memory_budget, metrics
+from ...resource_monitor import ResourceMonitor, DEFAULT_SAMPLE_INTERVAL
 
-def sieve_of_eratosthenes(n):
+_BLOCK_SIZE = 1 << 20
+
+def odd_prime_mask(n, monitor=None):
+    """
+    Sieve the odd numbers up to n.
+
+    Only odd numbers are stored, one byte each, so entry i stands for 2 * i + 1
+    and the array takes (n + 1) / 2 bytes. The odd multiples of each base prime
+    p are crossed off with a single strided slice assignment.
+
+    :param n: Upper limit for prime number generation
+    :param monitor: Optional ResourceMonitor checked once per base prime
+    :return: Boolean NumPy array where entry i is True if 2 * i + 1 is prime
+    """
+    if n < 0:
+        raise ValueError(f"Sieve limit must be non-negative, got {n}")
+    memory_budget.admit("odd_prime_mask", n)
+    mask = np.ones((n + 1) // 2, dtype=bool)
+    if mask.size:
+        mask[0] = False  # 1 is not prime
+    base_primes = crossings = 0
+    with metrics.phase("sieve.mark"):
+        for i in range(1, (math.isqrt(n) + 1) // 2):
+            if monitor is not None:
+                monitor.check_resources()
+            if mask[i]:
+                p = 2 * i + 1
+                mask[p * p // 2::p] = False
+                base_primes += 1
+                crossings += (mask.size - p * p // 2 + p - 1) // p
+    metrics.count("sieve.base_primes", base_primes)
+    metrics.count("sieve.crossings", crossings)
+    return mask
+
+def iter_odd_mask_primes(mask):
+    """
+    Generate the odd primes of an odd_prime_mask one block at a time.
+
+    :param mask: Result of odd_prime_mask(n)
+    :return: Generator of sorted NumPy int64 arrays of odd primes
+    """
+    # Convert block by block so no full-size index array is materialized
+    for block_start in range(0, mask.size, _BLOCK_SIZE):
+        yield 2 * np.flatnonzero(mask[block_start:block_start + _BLOCK_SIZE]) + (2 * block_start + 1)
+
+def primes_from_odd_mask(mask, n):
+    """
+    Convert an odd_prime_mask into the sorted array of primes up to n.
+
+    :param mask: Result of odd_prime_mask(n)
+    :param n: The limit the mask was built for
+    :return: NumPy int64 array of primes
+    """
+    offset = 1 if n >= 2 else 0
+    primes = np.empty(np.count_nonzero(mask) + offset, dtype=np.int64)
+    primes[:offset] = 2
+    for odd_primes in iter_odd_mask_primes(mask):
+        primes[offset:offset + odd_primes.size] = odd_primes
+        offset += odd_primes.size
+    return primes
+
+def sieve_of_eratosthenes(n, as_array=False):
     """
     Generate prime numbers up to n using the Sieve of Eratosthenes algorithm.
 
     :param n: Upper limit for prime number generation
-    :return: Tuple of (list of primes, ResourceMonitor instance)
+    :param as_array: Return the primes as a NumPy array instead of a list
+    :return: Tuple of (list or NumPy array of primes, ResourceMonitor instance)
     """
-    monitor = ResourceMonitor()
-    sieve = [True] * (n + 1)
-    sieve[0] = sieve[1] = False
-    for i in range(2, int(n**0.5) + 1):
-        monitor.check_resources()
-        if sieve[i]:
-            sieve[i*i::i] = [False] * len(sieve[i*i::i])
-    return [i for i in range(2, n + 1) if sieve[i]], monitor
+    memory_budget.admit("sieve", n)
+    with ResourceMonitor(sample_interval=DEFAULT_SAMPLE_INTERVAL) as monitor:
+        primes = primes_from_odd_mask(odd_prime_mask(n, monitor), n)
+    return (primes if as_array else primes.tolist()), monitor
 
 if __name__ == "__main__":
     limit = 100
@@ -26,4 +87,4 @@ if __name__ == "__main__":
     print(f"Primes up to {limit}: {primes}")
     print(f"Number of primes: {len(primes)}")
     print(f"Max memory usage: {max(monitor.memory_usage):.2f}%")
-    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
\ No newline at end of file
+    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
@@ -2,58 +2,181 @@
 This module provides visualization tools for the Sieve of Eratosthenes algorithm.
 """
 
+import itertools
 import matplotlib.pyplot as plt
 import numpy as np
-from .sieve_of_eratosthenes import sieve_of_eratosthenes
+from .sieve_of_eratosthenes import odd_prime_mask, iter_odd_mask_primes
+from .segmented_sieve import iter_prime_segments
 
-def plot_prime_spiral(limit):
+# Largest width of the spiral image; wider spirals are downsampled to it
+DEFAULT_SPIRAL_RESOLUTION = 2048
+
+# Number of bins in the prime distribution plot
+DEFAULT_DISTRIBUTION_BINS = 500
+
+# Terms of Ramanujan's series for li(x), enough for x up to about 10^18
+_LI_TERMS = 150
+
+def ulam_coordinates(n):
+    """
+    Compute the position of every n in the Ulam spiral, with 1 at the origin.
+
+    Ring k holds the numbers from (2k - 1)^2 + 1 to (2k + 1)^2, so the ring
+    and the offset along it follow from sqrt(n) without walking the spiral.
+    The spiral starts by going right and turns counter-clockwise.
+
+    :param n: Array-like of positive integers
+    :return: Tuple of (x, y) NumPy int64 arrays
+    """
+    n = np.asarray(n, dtype=np.int64)
+    k = np.ceil((np.sqrt(n) - 1) / 2).astype(np.int64)
+    side = 2 * k
+    top = (2 * k + 1) ** 2
+    offset = top - n
+    # Walking back from the top of the ring: bottom, left, top and right side
+    bottom = offset < side
+    left = ~bottom & (offset < 2 * side)
+    top_side = ~bottom & ~left & (offset < 3 * side)
+    x = np.select([bottom, left, top_side], [k - offset, -k, -k + (offset - 2 * side)], default=k)
+    y = np.select([bottom, left, top_side], [-k, -k + (offset - side), k], default=k - (offset - 3 * side))
+    return x, y
+
+def prime_spiral_image(limit, resolution=DEFAULT_SPIRAL_RESOLUTION, mask=None):
+    """
+    Rasterize the primes up to limit on the Ulam spiral.
+
+    The odd prime mask is read block by block and only the primes are placed
+    on the spiral. Spirals wider than resolution cells are downsampled so that
+    each pixel counts the primes in a square of cells.
+
+    :param limit: Upper limit for prime number generation
+    :param resolution: Largest width of the image in pixels
+    :param mask: Optional precomputed odd_prime_mask(limit)
+    :return: Tuple of (2D NumPy int64 array of prime counts per pixel, cells per pixel side)
+    """
+    half = int(np.ceil((np.sqrt(max(limit, 1)) - 1) / 2))
+    side = 2 * half + 1
+    scale = -(-side // resolution)
+    width = -(-side // scale)
+    counts = np.zeros(width * width, dtype=np.int64)
+    if limit >= 2:
+        counts += _pixel_counts(np.array([2]), half, scale, width)
+    if mask is None:
+        mask = odd_prime_mask(limit)
+    for primes in iter_odd_mask_primes(mask):
+        counts += _pixel_counts(primes, half, scale, width)
+    return counts.reshape(width, width), scale
+
+def _pixel_counts(primes, half, scale, width):
+    x, y = ulam_coordinates(primes)
+    rows = (half - y) // scale
+    columns = (x + half) // scale
+    return np.bincount(rows * width + columns, minlength=width * width)
+
+def plot_prime_spiral(limit, resolution=DEFAULT_SPIRAL_RESOLUTION, mask=None):
     """
     Generate and plot a prime spiral (Ulam spiral) up to the given limit.
 
+    The spiral is drawn as a single raster image of at most resolution pixels
+    across, so the cost of drawing does not depend on the number of primes.
+
     :param limit: Upper limit for prime number generation
+    :param resolution: Largest width of the image in pixels
+    :param mask: Optional precomputed odd_prime_mask(limit)
     """
-    primes, _ = sieve_of_eratosthenes(limit)
-    primes_set = set(primes)
-
-    # Create a spiral of numbers
-    size = int(np.ceil(np.sqrt(limit)))
-    spiral = np.zeros((size, size), dtype=int)
-    dx, dy = 1, 0
-    x, y = 0, 0
-    for i in range(1, limit + 1):
-        spiral[x, y] = i
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < size and 0 <= ny < size and spiral[nx, ny] == 0:
-            x, y = nx, ny
-        else:
-            dx, dy = -dy, dx
-            x, y = x + dx, y + dy
-
-    # Plot the spiral
+    image, scale = prime_spiral_image(limit, resolution, mask)
+
     plt.figure(figsize=(10, 10))
-    for i in range(size):
-        for j in range(size):
-            if spiral[i, j] in primes_set:
-                plt.plot(j, i, 'ro', markersize=2)
-    
-    plt.title(f"Prime Spiral (Ulam Spiral) up to {limit}")
+    plt.imshow(image, cmap="Reds" if scale > 1 else "binary", interpolation="nearest")
+    title = f"Prime Spiral (Ulam Spiral) up to {limit}"
+    if scale > 1:
+        title += f" ({scale}x{scale} cells per pixel)"
+    plt.title(title)
     plt.axis('off')
     plt.savefig(f"prime_spiral_{limit}.png", dpi=300, bbox_inches='tight')
     plt.close()
 
-def plot_prime_distribution(limit):
+def logarithmic_integral(x):
+    """
+    Compute the logarithmic integral li(x) with Ramanujan's series.
+
+    :param x: Array-like of values greater than 1
+    :return: NumPy float64 array of li(x)
     """
-    Plot the distribution of prime numbers up to the given limit.
+    x = np.asarray(x, dtype=np.float64)
+    log_x = np.log(x)
+    total = np.zeros_like(log_x)
+    term = np.ones_like(log_x)
+    inner = 0.0
+    for n in range(1, _LI_TERMS + 1):
+        term = term * -log_x / (n * (2 if n > 1 else 1))
+        if n % 2:
+            inner += 1 / n
+        total -= term * inner
+    return np.euler_gamma + np.log(log_x) + np.sqrt(x) * total
+
+def prime_distribution(limit, bins=DEFAULT_DISTRIBUTION_BINS, mask=None):
+    """
+    Count the primes up to limit in equal-width bins, one sieve segment at a time.
 
     :param limit: Upper limit for prime number generation
+    :param bins: Largest number of bins
+    :param mask: Optional precomputed odd_prime_mask(limit), read block by block instead of sieving
+    :return: Tuple of (bin edges, prime counts per bin) as NumPy int64 arrays;
+             bin i covers [edges[i], edges[i + 1])
+    """
+    width = max(-(-(limit + 1) // bins), 1)
+    count = -(-(limit + 1) // width)
+    counts = np.zeros(count, dtype=np.int64)
+    if mask is None:
+        segments = iter_prime_segments(2, limit + 1)
+    else:
+        segments = itertools.chain([np.array([2] if limit >= 2 else [], dtype=np.int64)],
+                                   iter_odd_mask_primes(mask))
+    for segment in segments:
+        counts += np.bincount(segment // width, minlength=count)
+    edges = np.minimum(np.arange(count + 1, dtype=np.int64) * width, limit + 1)
+    return edges, counts
+
+def plot_prime_distribution(limit, bins=DEFAULT_DISTRIBUTION_BINS, mask=None):
     """
-    primes, _ = sieve_of_eratosthenes(limit)
-    
-    plt.figure(figsize=(12, 6))
-    plt.plot(range(2, limit + 1), [1 if i in primes else 0 for i in range(2, limit + 1)], 'b.', markersize=2)
-    plt.title(f"Distribution of Primes up to {limit}")
-    plt.xlabel("Number")
-    plt.ylabel("Is Prime")
+    Plot the density of primes up to the given limit and the prime-counting function.
+
+    The upper panel shows the fraction of primes in each bin against the
+    1 / ln x predicted by the prime number theorem; the lower panel compares
+    pi(x) at the bin edges with x / ln x and Li(x) = li(x) - li(2).
+
+    :param limit: Upper limit for prime number generation
+    :param bins: Largest number of bins
+    :param mask: Optional precomputed odd_prime_mask(limit)
+    """
+    edges, counts = prime_distribution(limit, bins, mask)
+    widths = np.diff(edges)
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+
+    ax1.stairs(counts / widths, edges, label="Fraction of primes per bin")
+    centres = (edges[:-1] + edges[1:]) / 2
+    visible = centres > 2
+    ax1.plot(centres[visible], 1 / np.log(centres[visible]), label="1 / ln x")
+    ax1.set_title(f"Density of Primes up to {limit}")
+    ax1.set_xlabel("Number")
+    ax1.set_ylabel("Density")
+    ax1.legend()
+    ax1.grid(True)
+
+    x = edges[1:].astype(np.float64)
+    pi = np.cumsum(counts)
+    ax2.plot(x, pi, label="\u03c0(x)")
+    visible = x > 2
+    ax2.plot(x[visible], x[visible] / np.log(x[visible]), label="x / ln x")
+    ax2.plot(x[visible], logarithmic_integral(x[visible]) - logarithmic_integral(2.0), label="Li(x)")
+    ax2.set_title("Prime-Counting Function")
+    ax2.set_xlabel("x")
+    ax2.set_ylabel("Number of primes up to x")
+    ax2.legend()
+    ax2.grid(True)
+
+    plt.tight_layout()
     plt.savefig(f"prime_distribution_{limit}.png", dpi=300, bbox_inches='tight')
     plt.close()
 
@@ -0,0 +1,304 @@
+"""
+This module implements the benchmark suite: every algorithm over a ladder of input
+sizes, recorded to JSON and compared against a stored baseline.
+
+Each case runs in a fresh interpreter, so its peak RSS is its own and caches
+left by earlier cases do not flatter it. Run it with:
+
+    python -m math_sim.benchmark --output bench.json [--baseline baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+CASE_TIMEOUT = 600
+
+# Changes smaller than these are noise, whatever their ratio
+MIN_TIME_DELTA = 0.005
+MIN_RSS_DELTA = 8 * 1024 * 1024
+
+@dataclass(frozen=True)
+class Benchmark:
+    """
+    A function timed over a ladder of input sizes.
+
+    prepare(size) builds the arguments outside the timed region, function(*args)
+    is the timed call, and count(size, result) is the amount of work done, in
+    units, from which throughput is derived.
+    """
+    name: str
+    function: Callable
+    sizes: tuple
+    unit: str
+    prepare: Callable = lambda size: (size,)
+    count: Callable = lambda size, result: size
+
+def _next_prime(n):
+    from .algorithms.prime_factorization.prime_factorization import is_probable_prime
+    while not is_probable_prime(n):
+        n += 1
+    return n
+
+def _semiprime(digits):
+    # Product of two primes of about digits / 2 digits each, the hardest case for Pollard's rho
+    half = 10 ** (digits // 2 - 1)
+    return _next_prime(3 * half) * _next_prime(7 * half)
+
+def _sieve(n):
+    from .algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import sieve_of_eratosthenes
+    return sieve_of_eratosthenes(n, as_array=True)
+
+def _factorize(n):
+    from .algorithms.prime_factorization.prime_factorization import factorize
+    return factorize(n)
+
+def _aliquot_sequence(max_steps):
+    from .algorithms.aliquot_sequence.aliquot_sequence import aliquot_sequence
+    return aliquot_sequence(276, max_steps)
+
+def _collatz_conjecture(n):
+    from .algorithms.collatz_conjecture.collatz_conjecture import collatz_conjecture
+    return collatz_conjecture(n, max_steps=None)
+
+def _collatz_stopping_times(limit):
+    from .algorithms.collatz_conjecture.collatz_batch import collatz_stopping_times
+    return collatz_stopping_times(limit)
+
+def _fibonacci_sequence(n):
+    from .algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_sequence
+    return fibonacci_sequence(n)
+
+def _fibonacci_nth(n):
+    from .algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_nth
+    return fibonacci_nth(n)
+
+def _parallel_factorization(numbers):
+    from .concurrent_math_sim import parallel_prime_factorization
+    return parallel_prime_factorization(numbers)
+
+def _parallel_aliquot(count):
+    from .concurrent_math_sim import parallel_aliquot_trace
+    return parallel_aliquot_trace(1, count)
+
+def _parallel_prime_count(hi):
+    from .concurrent_math_sim import parallel_prime_count
+    return parallel_prime_count(0, hi)
+
+def _plot(module, function):
+    # Plot functions save into the working directory, which is a temporary one in case runs
+    def plot(*args):
+        import importlib
+        import matplotlib
+        matplotlib.use("Agg")
+        return getattr(importlib.import_module(module, __package__), function)(*args)
+    return plot
+
+BENCHMARKS = {benchmark.name: benchmark for benchmark in [
+    Benchmark("sieve_of_eratosthenes", _sieve, (10**5, 10**6, 10**7, 10**8), "numbers"),
+    Benchmark("factorize", _factorize, (12, 16, 20, 24), "numbers",
+              prepare=lambda digits: (_semiprime(digits),), count=lambda size, result: 1),
+    Benchmark("aliquot_sequence", _aliquot_sequence, (50, 100, 200), "steps",
+              count=lambda size, result: len(result[0])),
+    Benchmark("collatz_conjecture", _collatz_conjecture, (64, 1024, 8192), "steps",
+              prepare=lambda bits: (2**bits - 1,), count=lambda size, result: len(result[0])),
+    Benchmark("collatz_stopping_times", _collatz_stopping_times, (10**5, 10**6, 10**7), "numbers"),
+    Benchmark("fibonacci_sequence", _fibonacci_sequence, (10**3, 10**4, 3 * 10**4), "terms"),
+    Benchmark("fibonacci_nth", _fibonacci_nth, (10**5, 10**6, 10**7), "terms"),
+    Benchmark("parallel_prime_factorization", _parallel_factorization, (4, 16, 64), "numbers",
+              prepare=lambda count: ([_semiprime(18) + 2 * k for k in range(count)],)),
+    Benchmark("parallel_aliquot_trace", _parallel_aliquot, (100, 1000, 5000), "sequences"),
+    Benchmark("parallel_prime_count", _parallel_prime_count, (10**7, 10**8, 10**9), "numbers"),
+    Benchmark("plot_prime_spiral", _plot(".algorithms.sieve_of_eratosthenes.sieve_viz", "plot_prime_spiral"),
+              (10**4, 10**6, 10**7), "numbers"),
+    Benchmark("plot_prime_distribution",
+              _plot(".algorithms.sieve_of_eratosthenes.sieve_viz", "plot_prime_distribution"),
+              (10**4, 10**6, 10**7), "numbers"),
+    Benchmark("plot_collatz_sequence",
+              _plot(".algorithms.collatz_conjecture.collatz_conjecture_viz", "plot_collatz_sequence"),
+              (27, 2**64 - 1), "sequences", count=lambda size, result: 1),
+    Benchmark("plot_fibonacci_sequence",
+              _plot(".algorithms.fibonacci_sequence.fibonacci_sequence_viz", "plot_fibonacci_sequence"),
+              (100, 10**4), "terms"),
+]}
+
+def measure(benchmark, size, repeat=DEFAULT_REPEAT):
+    """
+    Time one case in the current process.
+
+    Wall and CPU time are the best of repeat runs; the CPU time of worker
+    processes is added once they have been shut down and reaped.
+
+    :param benchmark: Benchmark to run
+    :param size: Input size
+    :param repeat: Number of timed runs
+    :return: Dictionary of measurements
+    """
+    import resource
+    from .executor import shutdown_executors
+    args = benchmark.prepare(size)
+    wall_times, cpu_times = [], []
+    for _ in range(repeat):
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        result = benchmark.function(*args)
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+    shutdown_executors(wait=True)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    wall_time = min(wall_times)
+    return {
+        "benchmark": benchmark.name,
+        "size": size,
+        "unit": benchmark.unit,
+        "wall_time": wall_time,
+        "wall_times": wall_times,
+        "cpu_time": min(cpu_times) + (children.ru_utime + children.ru_stime) / repeat,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "children_peak_rss_bytes": children.ru_maxrss * 1024,
+        "throughput": benchmark.count(size, result) / wall_time if wall_time > 0 else None,
+    }
+
+def run_case(name, size, repeat=DEFAULT_REPEAT, timeout=CASE_TIMEOUT):
+    """
+    Time one case in a fresh interpreter, inside a temporary working directory.
+
+    :param name: Benchmark name
+    :param size: Input size
+    :param repeat: Number of timed runs
+    :param timeout: Seconds after which the case is abandoned
+    :return: Dictionary of measurements, with an "error" entry if the case failed
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")])))
+    command = [sys.executable, "-m", "math_sim.benchmark", "--run-case", name, str(size), "--repeat", str(repeat)]
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True,
+                                       timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {"benchmark": name, "size": size, "error": f"Timed out after {timeout}s"}
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"benchmark": name, "size": size, "error": lines[-1] if lines else f"Exit status {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def environment():
+    """
+    Describe the machine and library versions a run was recorded on.
+
+    :return: Dictionary of environment details
+    """
+    import numpy
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def run_suite(names=None, quick=False, repeat=DEFAULT_REPEAT, log=None):
+    """
+    Run every case of the selected benchmarks.
+
+    :param names: Benchmark names to run (default: all)
+    :param quick: Only run the smallest size of each benchmark
+    :param repeat: Number of timed runs per case
+    :param log: Optional function called with each case's measurements as it finishes
+    :return: Dictionary with "environment" and "results"
+    """
+    results = []
+    for name in names or BENCHMARKS:
+        sizes = BENCHMARKS[name].sizes
+        for size in sizes[:1] if quick else sizes:
+            results.append(run_case(name, size, repeat))
+            if log is not None:
+                log(results[-1])
+    return {"environment": environment(), "results": results}
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Find the cases that got slower or bigger than the baseline by more than threshold.
+
+    Cases missing from either run, or that failed, are not compared.
+
+    :param current: Suite results as returned by run_suite
+    :param baseline: Suite results of the baseline run
+    :param threshold: Allowed relative increase, e.g. 0.25 for 25%
+    :return: List of regressions, each a dictionary with benchmark, size, metric,
+             baseline, current and ratio
+    """
+    reference = {(case["benchmark"], case["size"]): case for case in baseline["results"] if "error" not in case}
+    regressions = []
+    for case in current["results"]:
+        before = reference.get((case["benchmark"], case["size"]))
+        if before is None or "error" in case:
+            continue
+        for metric, min_delta in (("wall_time", MIN_TIME_DELTA), ("peak_rss_bytes", MIN_RSS_DELTA)):
+            old, new = before[metric], case[metric]
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append({"benchmark": case["benchmark"], "size": case["size"], "metric": metric,
+                                    "baseline": old, "current": new, "ratio": new / old if old else None})
+    return regressions
+
+def format_case(case):
+    if "error" in case:
+        return f"{case['benchmark']:<30} {case['size']:>12}  FAILED: {case['error']}"
+    throughput = f"{case['throughput']:.3g} {case['unit']}/s" if case["throughput"] else "-"
+    return (f"{case['benchmark']:<30} {case['size']:>12}  wall {case['wall_time']:9.4f}s  "
+            f"cpu {case['cpu_time']:9.4f}s  rss {case['peak_rss_bytes'] / 2**20:8.1f} MiB  {throughput}")
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the math_sim algorithms")
+    parser.add_argument("--output", metavar="PATH", default="benchmark.json",
+                        help="Where to write the results (default: benchmark.json)")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="Results of an earlier run; exit with status 1 if any case regressed")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative increase in wall time or peak RSS counted as a regression (default: 0.25)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), metavar="NAME",
+                        help="Only run these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Only run the smallest size of each benchmark")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per case (default: 3)")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and their sizes")
+    parser.add_argument("--run-case", nargs=2, metavar=("NAME", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        name, size = args.run_case
+        print(json.dumps(measure(BENCHMARKS[name], int(size), args.repeat)))
+        return 0
+    if args.list:
+        for benchmark in BENCHMARKS.values():
+            print(f"{benchmark.name}: {', '.join(str(size) for size in benchmark.sizes)} ({benchmark.unit})")
+        return 0
+
+    suite = run_suite(args.only, args.quick, args.repeat, log=lambda case: print(format_case(case), flush=True))
+    with open(args.output, "w") as handle:
+        json.dump(suite, handle, indent=2)
+    print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(suite, json.load(handle), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} {regression['size']} {regression['metric']}: "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} (x{regression['ratio']:.2f})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+This module saves and restores the state of long-running computations.
+"""
+
+import io
+import json
+import os
+import struct
+import time
+from .streaming import read_length_prefixed, write_length_prefixed
+
+CHECKPOINT_MAGIC = b"MSCKPT1\n"
+
+# Default time between checkpoints, in seconds
+CHECKPOINT_INTERVAL = 30.0
+
+_HEADER_LENGTH = struct.Struct("<I")
+
+class CheckpointError(ValueError):
+    """
+    A checkpoint file that cannot be resumed from: not a checkpoint, or one of another computation.
+    """
+
+class Checkpoint:
+    """
+    A file holding the state of one computation, rewritten at most once per interval.
+
+    The file is the magic, a uint32 length and a JSON header with the small
+    metadata values, followed by integer lists (e.g. the sequence so far) as
+    length-prefixed binary records, so terms of any size are stored compactly.
+    It is written to a temporary file and renamed over the old one, so a
+    computation killed mid-write leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, path, interval=CHECKPOINT_INTERVAL, resume=True):
+        """
+        :param path: Path of the checkpoint file
+        :param interval: Shortest time in seconds between two periodic saves
+        :param resume: Continue from an existing checkpoint; otherwise it is ignored and overwritten
+        """
+        self.path = path
+        self.interval = interval
+        self.resume = resume
+        self.last_save = time.monotonic()
+        self.saves = 0
+
+    def load(self):
+        """
+        Read the saved state.
+
+        :return: Tuple of (metadata dict, dict of integer lists), or None if there
+                 is nothing to resume from
+        """
+        if not self.resume or not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as handle:
+            if handle.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise CheckpointError(f"{self.path} is not a checkpoint file")
+            size, = _HEADER_LENGTH.unpack(handle.read(_HEADER_LENGTH.size))
+            header = json.loads(handle.read(size))
+            terms = read_length_prefixed(handle)
+            lists = {name: [next(terms) for _ in range(length)] for name, length in header["lists"]}
+        return header["meta"], lists
+
+    def due(self):
+        """
+        Tell whether the interval since the last save has passed.
+
+        :return: True if a periodic save should be made now
+        """
+        return time.monotonic() - self.last_save >= self.interval
+
+    def save(self, meta, lists=None):
+        """
+        Write the state, replacing the previous checkpoint atomically.
+
+        :param meta: JSON-serializable dictionary of small values
+        :param lists: Optional dictionary of lists of non-negative integers
+        """
+        lists = lists or {}
+        header = json.dumps({"meta": meta, "lists": [[name, len(values)] for name, values in lists.items()]})
+        body = io.BytesIO()
+        for values in lists.values():
+            write_length_prefixed(values, body)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(CHECKPOINT_MAGIC + _HEADER_LENGTH.pack(len(header)) + header.encode())
+            handle.write(body.getbuffer())
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.path)
+        self.last_save = time.monotonic()
+        self.saves += 1
+
+    def check(self, meta, **expected):
+        """
+        Make sure a loaded checkpoint belongs to the computation about to resume from it.
+
+        :param meta: Metadata of the loaded checkpoint
+        :param expected: Metadata values the checkpoint must have
+        """
+        for key, value in expected.items():
+            if meta.get(key) != value:
+                raise CheckpointError(f"Checkpoint {self.path} has {key}={meta.get(key)!r}, expected {value!r}")
@@ -1,58 +1,224 @@
 """
 This module implements concurrent execution of mathematical simulations.
-It utilizes the concurrent.futures module to run multiple algorithms in parallel.
+It runs the algorithms on the package's shared process pool (see executor.py).
 """
 
-import concurrent.futures
-from typing import Dict, Any
-from .algorithms.aliquot_sequence.aliquot_sequence import aliquot_sequence
+import os
+from multiprocessing import shared_memory
+from typing import Dict, Any, Iterator, Optional
+import numpy as np
+from .checkpoint import Checkpoint
+from .executor import SimulationExecutor, TaskResult, get_executor
+from .memory_budget import estimate_memory
+from .algorithms.aliquot_sequence.aliquot_sequence import aliquot_sequence, trace_aliquot, AliquotResult
 from .algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import sieve_of_eratosthenes
-from .resource_monitor import factorize
+from .algorithms.sieve_of_eratosthenes.segmented_sieve import DEFAULT_SEGMENT_SIZE, base_primes, segment_odd_mask
+from .algorithms.prime_factorization.prime_factorization import factorize
+from .algorithms.prime_factorization.spf_table import (DEFAULT_SPF_LIMIT, cached_spf_table, factorize_batch,
+                                                       smallest_prime_factor_table)
 
-def run_concurrent_simulations(aliquot_input: int, sieve_input: int, factorize_input: int) -> Dict[str, Any]:
+def _result_only(function, *args):
+    # Drop the ResourceMonitor so only the result is pickled back from the worker
+    result, _ = function(*args)
+    return result
+
+def run_concurrent_simulations(aliquot_input: int, sieve_input: int, factorize_input: int,
+                               timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Run multiple mathematical simulations concurrently.
 
     :param aliquot_input: Input for the aliquot sequence algorithm
     :param sieve_input: Input for the Sieve of Eratosthenes algorithm
     :param factorize_input: Input for the factorization algorithm
-    :return: Dictionary containing the results of each algorithm
-    """
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        aliquot_future = executor.submit(aliquot_sequence, aliquot_input)
-        sieve_future = executor.submit(sieve_of_eratosthenes, sieve_input)
-        factorize_future = executor.submit(factorize, factorize_input)
-
-        results = {}
-        for future in concurrent.futures.as_completed([aliquot_future, sieve_future, factorize_future]):
-            try:
-                result = future.result()
-                if future == aliquot_future:
-                    results['aliquot'] = result[0]
-                elif future == sieve_future:
-                    results['sieve'] = result[0]
-                elif future == factorize_future:
-                    results['factorize'] = result[0]
-            except Exception as e:
-                print(f"An error occurred: {str(e)}")
-
-    return results
-
-def parallel_prime_factorization(numbers: list) -> Dict[int, list]:
+    :param timeout: Optional time limit in seconds for each simulation
+    :return: Dictionary containing the results of the simulations that succeeded
+    """
+    calls = [
+        ('aliquot', _result_only, (aliquot_sequence, aliquot_input)),
+        ('sieve', _result_only, (sieve_of_eratosthenes, sieve_input)),
+        ('factorize', _result_only, (factorize, factorize_input)),
+    ]
+    costs = {
+        'aliquot': estimate_memory('aliquot', aliquot_input, 1000),
+        'sieve': estimate_memory('sieve', sieve_input),
+        'factorize': estimate_memory('factorize', factorize_input),
+    }
+    tasks = get_executor().run(calls, timeout, chunk_size=1, memory_cost=lambda call: costs[call[0]])
+    return {task.key: task.value for task in tasks if task.ok}
+
+def iter_parallel_factorization(numbers: list, spf_limit: int = DEFAULT_SPF_LIMIT,
+                                spf_path: Optional[str] = None,
+                                timeout: Optional[float] = None) -> Iterator[TaskResult]:
+    """
+    Perform prime factorization on multiple numbers in parallel, yielding results as they complete.
+
+    Numbers up to spf_limit are factored in-process with a smallest-prime-factor
+    table, which is far cheaper than sending each of them to a worker. Only the
+    numbers beyond it are sent to the process pool.
+
+    :param numbers: List of numbers to factorize
+    :param spf_limit: Largest number factored with the SPF table
+    :param spf_path: Optional .npy file to memory-map the SPF table from (built and saved if missing)
+    :param timeout: Optional time limit in seconds for factoring each large number
+    :return: Generator of TaskResult keyed by number, with the list of prime factors as value
+    """
+    small = [num for num in numbers if 0 < num <= spf_limit]
+    large = set(numbers).difference(small)
+    if small:
+        limit = max(small)
+        table = cached_spf_table(spf_path, limit) if spf_path else smallest_prime_factor_table(limit)
+        for num, factors in factorize_batch(small, table).items():
+            yield TaskResult(num, factors)
+    if large:
+        yield from get_executor().run(((num, _result_only, (factorize, num)) for num in sorted(large)), timeout,
+                                      memory_cost=lambda call: estimate_memory("factorize", call[0]))
+
+def parallel_prime_factorization(numbers: list, spf_limit: int = DEFAULT_SPF_LIMIT,
+                                 spf_path: Optional[str] = None,
+                                 timeout: Optional[float] = None) -> Dict[int, list]:
     """
     Perform prime factorization on multiple numbers in parallel.
 
     :param numbers: List of numbers to factorize
-    :return: Dictionary mapping input numbers to their prime factors
-    """
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        futures = {executor.submit(factorize, num): num for num in numbers}
-        results = {}
-        for future in concurrent.futures.as_completed(futures):
-            num = futures[future]
-            try:
-                factors, _ = future.result()
-                results[num] = factors
-            except Exception as e:
-                print(f"An error occurred for {num}: {str(e)}")
-    return results
\ No newline at end of file
+    :param spf_limit: Largest number factored with the SPF table
+    :param spf_path: Optional .npy file to memory-map the SPF table from (built and saved if missing)
+    :param timeout: Optional time limit in seconds for factoring each large number
+    :return: Dictionary mapping input numbers to their prime factors; numbers that
+             failed are left out (use iter_parallel_factorization to see why)
+    """
+    return {task.key: task.value for task in iter_parallel_factorization(numbers, spf_limit, spf_path, timeout)
+            if task.ok}
+
+def _trace_aliquot_checkpointed(n: int, max_steps: int, path: str, interval: float, resume: bool) -> AliquotResult:
+    result, _ = trace_aliquot(n, max_steps, checkpoint=Checkpoint(path, interval, resume))
+    return result
+
+def iter_parallel_aliquot_trace(start: int, count: int, max_steps: int = 1000,
+                                timeout: Optional[float] = None,
+                                checkpoints: Optional[tuple] = None) -> Iterator[TaskResult]:
+    """
+    Generate and classify the aliquot sequences of consecutive starting numbers in parallel,
+    yielding results as they complete.
+
+    With checkpoints, every sequence is checkpointed to aliquot_<n>.ckpt in
+    the given directory, so a run that is killed or times out can be resumed:
+    finished sequences are then read back and unfinished ones continued.
+
+    :param start: First starting number
+    :param count: Number of consecutive starting numbers
+    :param max_steps: Maximum number of steps to calculate per sequence
+    :param timeout: Optional time limit in seconds for each sequence
+    :param checkpoints: Optional tuple of (directory, interval in seconds, resume)
+    :return: Generator of TaskResult keyed by starting number, with an AliquotResult as value
+    """
+    if checkpoints is None:
+        calls = ((start + i, _result_only, (trace_aliquot, start + i, max_steps)) for i in range(count))
+    else:
+        directory, interval, resume = checkpoints
+        os.makedirs(directory, exist_ok=True)
+        calls = ((start + i, _trace_aliquot_checkpointed,
+                  (start + i, max_steps, os.path.join(directory, f"aliquot_{start + i}.ckpt"), interval, resume))
+                 for i in range(count))
+    return get_executor().run(calls, timeout, memory_cost=lambda call: estimate_memory("aliquot", call[0], max_steps))
+
+def parallel_aliquot_trace(start: int, count: int, max_steps: int = 1000,
+                           timeout: Optional[float] = None) -> Dict[int, AliquotResult]:
+    """
+    Generate and classify the aliquot sequences of consecutive starting numbers in parallel.
+
+    :param start: First starting number
+    :param count: Number of consecutive starting numbers
+    :param max_steps: Maximum number of steps to calculate per sequence
+    :param timeout: Optional time limit in seconds for each sequence
+    :return: Dictionary mapping starting numbers to their AliquotResult; sequences
+             that failed are left out (use iter_parallel_aliquot_trace to see why)
+    """
+    return {task.key: task.value for task in iter_parallel_aliquot_trace(start, count, max_steps, timeout)
+            if task.ok}
+
+def parallel_aliquot_sequence(start: int, count: int, max_steps: int = 1000) -> Dict[int, list]:
+    """
+    Generate the aliquot sequences of consecutive starting numbers in parallel.
+
+    :param start: First starting number
+    :param count: Number of consecutive starting numbers
+    :param max_steps: Maximum number of steps to calculate per sequence
+    :return: Dictionary mapping starting numbers to their aliquot sequences
+    """
+    return {num: result.sequence for num, result in parallel_aliquot_trace(start, count, max_steps).items()}
+
+def _count_segment_block(primes_name: str, num_primes: int, counts_name: str, num_segments: int,
+                         first_lo: int, hi: int, segment_size: int, block_start: int, block_end: int) -> None:
+    """
+    Worker for parallel_prime_count: sieve segments [block_start, block_end) and
+    write their prime counts into the shared counts buffer.
+    """
+    primes_shm = shared_memory.SharedMemory(name=primes_name)
+    counts_shm = shared_memory.SharedMemory(name=counts_name)
+    try:
+        primes = np.ndarray((num_primes,), dtype=np.int64, buffer=primes_shm.buf)
+        counts = np.ndarray((num_segments,), dtype=np.int64, buffer=counts_shm.buf)
+        for k in range(block_start, block_end):
+            seg_lo = first_lo + 2 * segment_size * k
+            seg_hi = min(seg_lo + 2 * segment_size, hi)
+            counts[k] = np.count_nonzero(segment_odd_mask(seg_lo, seg_hi, primes))
+        del primes, counts
+    finally:
+        primes_shm.close()
+        counts_shm.close()
+
+def parallel_prime_count(lo: int, hi: int, workers: Optional[int] = None,
+                         segment_size: int = DEFAULT_SEGMENT_SIZE) -> int:
+    """
+    Count the primes in [lo, hi) by spreading sieve segments across processes.
+
+    The base primes are placed in shared memory once instead of being pickled to
+    every worker, and each worker writes the prime count of every segment it
+    sieves straight into a shared result buffer.
+
+    :param lo: Inclusive lower end of the range
+    :param hi: Exclusive upper end of the range
+    :param workers: Number of worker processes in a pool of the call's own
+                    (default: the shared executor, one process per CPU)
+    :param segment_size: Number of odd numbers sieved per segment
+    :return: Number of primes in the range
+    """
+    if lo < 0 or hi < lo:
+        raise ValueError(f"Invalid prime range [{lo}, {hi})")
+    primes = base_primes(hi)
+    first_lo = max(lo, 1) | 1
+    num_segments = len(range(first_lo, hi, 2 * segment_size))
+    even_prime = 1 if lo <= 2 < hi else 0
+    if not num_segments:
+        return even_prime
+
+    # An explicit worker count gets a pool of its own, so the shared one is left as it is
+    owns_executor = workers is not None
+    executor = SimulationExecutor(workers) if owns_executor else get_executor()
+    workers = executor.workers
+    primes_shm = shared_memory.SharedMemory(create=True, size=max(primes.nbytes, 1))
+    counts_shm = shared_memory.SharedMemory(create=True, size=num_segments * 8)
+    try:
+        np.ndarray(primes.shape, dtype=np.int64, buffer=primes_shm.buf)[:] = primes
+        counts = np.ndarray((num_segments,), dtype=np.int64, buffer=counts_shm.buf)
+        counts[:] = 0
+        # Several blocks per worker so an uneven block does not leave cores idle
+        bounds = np.linspace(0, num_segments, min(num_segments, workers * 4) + 1).astype(int)
+        calls = [((int(start), int(end)), _count_segment_block,
+                  (primes_shm.name, primes.size, counts_shm.name, num_segments, first_lo, hi, segment_size,
+                   int(start), int(end)))
+                 for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        cost = estimate_memory("prime_segment", segment_size)
+        for task in executor.run(calls, chunk_size=1, memory_cost=lambda call: cost):
+            if not task.ok:
+                raise RuntimeError(f"Sieving segments {task.key} failed: {task.error}: {task.message}")
+        total = int(counts.sum()) + even_prime
+        del counts
+        return total
+    finally:
+        if owns_executor:
+            executor.shutdown()
+        primes_shm.close()
+        primes_shm.unlink()
+        counts_shm.close()
+        counts_shm.unlink()
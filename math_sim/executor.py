@@ -0,0 +1,453 @@
+"""
+This module provides the shared executor that runs simulation tasks in parallel.
+
+CPU-bound work goes to one long-lived process pool (the GIL would serialize it
+on threads), I/O-bound work to a thread pool. Tasks are batched into chunks,
+results are streamed back as chunks complete, and every task produces a
+TaskResult, so a failure, a timeout or a cancellation is reported as data
+instead of being printed or raised.
+
+Submission is throttled rather than failed when resources run short: chunks
+with memory estimates wait until they fit the memory budget (see
+memory_budget.py), and fewer chunks are kept in flight while memory use or
+load is high.
+"""
+
+import atexit
+import concurrent.futures
+import math
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Optional
+import psutil
+from . import memory_budget, metrics
+
+# Chunks per worker: enough to even out uneven tasks, few enough to amortize pickling
+CHUNKS_PER_WORKER = 4
+MAX_CHUNK_SIZE = 1024
+
+# Extra time a chunk gets beyond its tasks' timeouts before its worker is killed
+KILL_GRACE = 1.0
+
+# How often a cancel event, chunks waiting to start and free slots are polled while waiting, in seconds
+POLL_INTERVAL = 0.05
+
+# Fewer chunks are kept in flight once memory use or the load per CPU reaches these
+MEMORY_PRESSURE_PERCENT = 85.0
+LOAD_PRESSURE_PER_CPU = 1.5
+
+# How often memory use and load are measured while submitting, in seconds
+ADAPT_INTERVAL = 0.5
+
+@dataclass
+class TaskResult:
+    """
+    The outcome of one task.
+
+    error is None when the task succeeded and value holds its return value.
+    Otherwise error is the name of the exception type, e.g. "ValueError",
+    "TimeoutError" for a task that ran past its timeout, or "CancelledError"
+    for a task that never ran, and message is the exception text.
+    """
+    key: Any
+    value: Any = None
+    error: Optional[str] = None
+    message: str = ""
+
+    @property
+    def ok(self):
+        return self.error is None
+
+def chunk_size_for(count, workers, max_chunk_size=MAX_CHUNK_SIZE):
+    """
+    Pick how many tasks to send to a worker at a time.
+
+    :param count: Total number of tasks
+    :param workers: Number of workers
+    :param max_chunk_size: Upper bound on the chunk size
+    :return: Chunk size giving about CHUNKS_PER_WORKER chunks per worker
+    """
+    return max(1, min(max_chunk_size, math.ceil(count / (workers * CHUNKS_PER_WORKER))))
+
+def process_tree_rss():
+    """
+    Measure the resident memory of this process and all of its children, e.g. pool workers.
+
+    :return: Total RSS in bytes
+    """
+    process = psutil.Process()
+    total = 0
+    for member in [process, *process.children(recursive=True)]:
+        try:
+            total += member.memory_info().rss
+        except psutil.Error:
+            # Exited since it was listed
+            pass
+    return total
+
+class AdaptiveConcurrency:
+    """
+    The number of chunks an executor keeps in flight, adapted to measured memory use and load.
+
+    At most once per ADAPT_INTERVAL, the limit is halved if system memory use
+    is at MEMORY_PRESSURE_PERCENT, the RSS of the process tree is at the memory
+    budget or, for CPU-bound work, the load average is at LOAD_PRESSURE_PER_CPU
+    per CPU. Otherwise it grows back by one, up to the number of workers.
+    """
+
+    def __init__(self, maximum, measure_load=True):
+        """
+        :param maximum: Largest limit, the number of workers
+        :param measure_load: Also back off when the CPUs are oversubscribed
+        """
+        self.maximum = maximum
+        self.limit = maximum
+        self.measure_load = measure_load
+        self._next_update = 0.0
+
+    def under_pressure(self):
+        """
+        Measure memory use and load.
+
+        :return: True if fewer chunks should be kept in flight
+        """
+        if psutil.virtual_memory().percent >= MEMORY_PRESSURE_PERCENT:
+            return True
+        if self.measure_load and psutil.getloadavg()[0] >= LOAD_PRESSURE_PER_CPU * (os.cpu_count() or 1):
+            return True
+        return process_tree_rss() >= memory_budget.budget.limit
+
+    def update(self):
+        """
+        Adapt the limit to the latest measurement, if one is due.
+
+        :return: The current limit
+        """
+        now = time.monotonic()
+        if now >= self._next_update:
+            self._next_update = now + ADAPT_INTERVAL
+            if self.under_pressure():
+                if self.limit > 1:
+                    metrics.count("executor.throttled")
+                self.limit = max(1, self.limit // 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1)
+        return self.limit
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("Task exceeded its timeout")
+
+def _failed(key, error, message):
+    return TaskResult(key, error=error, message=message)
+
+def _run_chunk(calls, timeout=None, collect_metrics=None):
+    """
+    Worker side: run a chunk of (key, function, args) calls, catching every error.
+
+    In a process worker the timeout is enforced per task with SIGALRM, which
+    interrupts Python code but waits for a running C call to return; the
+    parent kills workers that overrun by more than KILL_GRACE.
+
+    collect_metrics is None in a thread, where metrics go straight to the
+    shared registry. In a process it carries the parent's metrics setting,
+    and the metrics recorded by the chunk are returned for the parent to merge.
+    """
+    if collect_metrics is not None:
+        metrics.enable(collect_metrics)
+        # Drop whatever the worker inherited from the parent when it was forked
+        metrics.registry.reset()
+    use_alarm = (timeout is not None and hasattr(signal, "setitimer")
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    results = []
+    try:
+        for key, function, args in calls:
+            try:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    value = function(*args)
+                finally:
+                    if use_alarm:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+                results.append(TaskResult(key, value))
+            except Exception as e:
+                results.append(_failed(key, type(e).__name__, str(e)))
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous)
+    return results, metrics.registry.drain() if collect_metrics else None
+
+class SimulationExecutor:
+    """
+    A lazily started, reusable pool that runs batches of tasks and streams their results.
+
+    A process executor whose worker overruns a timeout, or that is cancelled
+    while chunks are running, terminates its workers and starts a fresh pool
+    on next use; chunks that were running in the killed pool are resubmitted.
+
+    The limit on chunks in flight is shared by every run() call, including
+    calls made from several threads at once, so a submitted chunk always has
+    a worker to run on and never waits in the pool's queue.
+    """
+
+    def __init__(self, workers=None, cpu_bound=True):
+        """
+        :param workers: Number of workers (default: one process per CPU, or the
+                        thread pool default for I/O-bound work)
+        :param cpu_bound: Use processes rather than threads
+        """
+        self.cpu_bound = cpu_bound
+        cpus = os.cpu_count() or 1
+        self.workers = workers or (cpus if cpu_bound else min(32, cpus + 4))
+        self.concurrency = AdaptiveConcurrency(self.workers, measure_load=cpu_bound)
+        self._pool = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._slots = threading.Condition()
+
+    def _acquire_slot(self):
+        # Take one of the executor-wide slots for a chunk in flight, if one is free
+        with self._slots:
+            if self._in_flight >= self.concurrency.update():
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release_slot(self):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def _wait_for_slot(self, timeout):
+        with self._slots:
+            if self._in_flight >= self.concurrency.limit:
+                self._slots.wait(timeout)
+
+    def _submit(self, chunk, timeout):
+        with self._lock:
+            if self._pool is None:
+                pool_type = (concurrent.futures.ProcessPoolExecutor if self.cpu_bound
+                             else concurrent.futures.ThreadPoolExecutor)
+                self._pool = pool_type(max_workers=self.workers)
+            collect_metrics = metrics.enabled if self.cpu_bound else None
+            return self._pool.submit(_run_chunk, chunk, timeout, collect_metrics), self._generation
+
+    def _restart(self, generation):
+        # Kill the workers of the given pool generation, unless it was already replaced
+        with self._lock:
+            if generation != self._generation or self._pool is None:
+                return
+            pool, self._pool = self._pool, None
+            self._generation += 1
+        terminate = getattr(pool, "terminate_workers", None)
+        if terminate is not None:
+            terminate()
+        else:
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _abandon(self, running):
+        # Cancel queued chunks; stop the ones already running by killing their pool
+        generations = {entry[2] for future, entry in running.items() if not future.cancel() and not future.done()}
+        if self.cpu_bound:
+            for generation in generations:
+                self._restart(generation)
+
+    @staticmethod
+    def _report(results):
+        for result in results:
+            metrics.count("executor.tasks")
+            if not result.ok:
+                metrics.count(f"executor.errors.{result.error}")
+            yield result
+
+    def run(self, calls, timeout=None, chunk_size=None, cancel=None, memory_cost=None, budget=None):
+        """
+        Run (key, function, args) calls and yield a TaskResult for each as its chunk completes.
+
+        Functions and arguments must be picklable for a process executor, so use
+        module-level functions. Results arrive in completion order, not call order.
+        A chunk's timeout, timeout per task plus KILL_GRACE, counts from when a
+        worker picks it up, not from when it is queued.
+
+        With memory_cost, every running chunk reserves the largest estimate of
+        its tasks against the memory budget. A chunk that does not fit waits
+        until running chunks finish, and a task whose estimate exceeds the whole
+        budget fails with MemoryBudgetExceeded without running.
+
+        :param calls: Iterable of (key, function, args) tuples
+        :param timeout: Optional time limit in seconds for each task
+        :param chunk_size: Tasks per chunk (default: chosen by chunk_size_for)
+        :param cancel: Optional threading.Event; once set, tasks that have not
+                       finished are reported as cancelled
+        :param memory_cost: Optional function of a call returning its estimated peak memory in bytes
+        :param budget: MemoryBudget to reserve against (default: the package-wide memory_budget.budget)
+        :return: Generator of TaskResult; closing it early cancels the remaining tasks
+        """
+        calls = list(calls)
+        budget = budget or memory_budget.budget
+        if memory_cost is not None:
+            costs = [memory_cost(call) for call in calls]
+            too_large = [(call, cost) for call, cost in zip(calls, costs) if cost > budget.limit]
+            calls = [call for call, cost in zip(calls, costs) if cost <= budget.limit]
+            yield from self._report(
+                _failed(key, "MemoryBudgetExceeded", f"Needs an estimated {memory_budget.format_size(cost)}, "
+                        f"more than the memory budget of {memory_budget.format_size(budget.limit)}")
+                for (key, _, _), cost in too_large)
+        size = chunk_size or chunk_size_for(len(calls), self.workers)
+        pending = deque(calls[start:start + size] for start in range(0, len(calls), size))
+        # future -> [chunk, deadline (None until a worker picks the chunk up), pool generation, reserved bytes]
+        running = {}
+
+        def settle(future):
+            chunk, _, generation, reserved = running.pop(future)
+            budget.release(reserved)
+            self._release_slot()
+            return chunk, generation
+
+        try:
+            while pending or running:
+                if cancel is not None and cancel.is_set():
+                    break
+                # Keep up to one chunk per worker in flight across all callers, so a chunk starts
+                # running when it is submitted; fewer under memory or load pressure
+                while pending:
+                    chunk = pending[0]
+                    reserved = 0 if memory_cost is None else max(memory_cost(call) for call in chunk)
+                    # With nothing else running, waiting would not free anything
+                    if not budget.try_reserve(reserved, force=not running):
+                        metrics.count("executor.memory_waits")
+                        break
+                    if not self._acquire_slot():
+                        budget.release(reserved)
+                        break
+                    pending.popleft()
+                    try:
+                        future, generation = self._submit(chunk, timeout)
+                    except BaseException:
+                        budget.release(reserved)
+                        self._release_slot()
+                        raise
+                    metrics.count("executor.chunks")
+                    running[future] = [chunk, None, generation, reserved]
+                if not running:
+                    # Every slot is taken by other callers
+                    self._wait_for_slot(POLL_INTERVAL)
+                    continue
+                now = time.monotonic()
+                for future, entry in running.items():
+                    if entry[1] is None and (future.running() or future.done()):
+                        entry[1] = math.inf if timeout is None else now + timeout * len(entry[0]) + KILL_GRACE
+                wait = min(math.inf if entry[1] is None else entry[1] for entry in running.values()) - now
+                if cancel is not None or pending or any(entry[1] is None for entry in running.values()):
+                    wait = min(wait, POLL_INTERVAL)
+                done, _ = concurrent.futures.wait(running, timeout=None if wait == math.inf else max(wait, 0),
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    chunk, generation = settle(future)
+                    try:
+                        results, worker_metrics = future.result()
+                    except BrokenProcessPool as e:
+                        if generation != self._generation:
+                            # Killed on purpose for another chunk; run it again
+                            pending.appendleft(chunk)
+                            continue
+                        self._restart(generation)
+                        yield from self._report(_failed(key, type(e).__name__, str(e)) for key, _, _ in chunk)
+                    except Exception as e:
+                        yield from self._report(_failed(key, type(e).__name__, str(e)) for key, _, _ in chunk)
+                    else:
+                        if worker_metrics is not None:
+                            metrics.registry.merge(worker_metrics)
+                        yield from self._report(results)
+                now = time.monotonic()
+                overdue = {future: entry for future, entry in running.items()
+                           if entry[1] is not None and entry[1] <= now}
+                if overdue:
+                    for future in overdue:
+                        chunk, _ = settle(future)
+                        message = f"Chunk exceeded its timeout of {timeout}s per task"
+                        yield from self._report(_failed(key, "TimeoutError", message) for key, _, _ in chunk)
+                    self._abandon(overdue)
+                    for future, (_, _, generation, _) in list(running.items()):
+                        if generation != self._generation:
+                            chunk, _ = settle(future)
+                            pending.appendleft(chunk)
+            for chunk, *_ in running.values():
+                pending.append(chunk)
+            yield from self._report(_failed(key, "CancelledError", "Cancelled before completion")
+                                    for chunk in pending for key, _, _ in chunk)
+        finally:
+            self._abandon(running)
+            for entry in running.values():
+                budget.release(entry[3])
+                self._release_slot()
+
+    def map(self, function, items, timeout=None, chunk_size=None, cancel=None):
+        """
+        Apply function to every item, yielding TaskResults keyed by the item as they complete.
+
+        :param function: Picklable function of one argument
+        :param items: Iterable of arguments
+        :param timeout: Optional time limit in seconds for each task
+        :param chunk_size: Tasks per chunk (default: chosen by chunk_size_for)
+        :param cancel: Optional threading.Event that cancels the remaining tasks
+        :return: Generator of TaskResult
+        """
+        return self.run(((item, function, (item,)) for item in items), timeout, chunk_size, cancel)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the pool. The executor starts a new one if it is used again.
+
+        :param wait: Wait for running tasks to finish
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._generation += 1
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+_shared_executors = {}
+_shared_lock = threading.Lock()
+
+def get_executor(cpu_bound=True, workers=None):
+    """
+    Return the package-wide executor for CPU-bound or I/O-bound work.
+
+    The same executor, and with it the same worker pool, is returned on every
+    call. workers only applies when the executor is first created, since
+    other callers may be using its pool; code that needs a specific number of
+    workers creates a SimulationExecutor of its own and shuts it down.
+
+    :param cpu_bound: Processes for CPU-bound work, threads otherwise
+    :param workers: Optional number of workers for a newly created executor
+    :return: SimulationExecutor instance
+    """
+    with _shared_lock:
+        executor = _shared_executors.get(cpu_bound)
+        if executor is None:
+            executor = _shared_executors[cpu_bound] = SimulationExecutor(workers, cpu_bound)
+        return executor
+
+@atexit.register
+def shutdown_executors(wait=False):
+    """
+    Stop the pools of the shared executors.
+
+    :param wait: Wait for the workers to exit
+    """
+    with _shared_lock:
+        executors = list(_shared_executors.values())
+        _shared_executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
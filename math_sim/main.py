@@ -1,118 +1,402 @@
 """
 Main script for the Math-Sim project, demonstrating mathematical simulations and visualizations.
+
+Algorithm and plotting modules are imported by the commands that use them, so
+that commands which print a result never load matplotlib (and most never load
+NumPy).
 """
 
 import argparse
-import concurrent.futures
-from .concurrent_math_sim import run_concurrent_simulations, parallel_prime_factorization
-from .algorithms.aliquot_sequence.aliquot_sequence import aliquot_sequence
-from .algorithms.aliquot_sequence.aliquot_sequence_viz import plot_aliquot_sequence
-from .algorithms.collatz_conjecture.collatz_conjecture import collatz_conjecture
-from .algorithms.collatz_conjecture.collatz_conjecture_viz import plot_collatz_sequence
-from .algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_sequence
-from .algorithms.fibonacci_sequence.fibonacci_sequence_viz import plot_fibonacci_sequence
-from .algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import sieve_of_eratosthenes
-from .algorithms.sieve_of_eratosthenes.sieve_viz import plot_prime_spiral, plot_prime_distribution
-from .resource_monitor import factorize
+import math
+import os
+from .checkpoint import CheckpointError
+from .streaming import STREAM_FORMATS
+from .result_cache import result_cache
+
+# Sequences and numbers beyond these sizes are summarized instead of printed in full
+PRINTED_TERMS = 100
+PRINTED_NUMBER_DIGITS = 1000
+PRINTED_DIGITS = 20
 
 def main():
     parser = argparse.ArgumentParser(description="Run mathematical simulations and visualizations.")
     parser.add_argument("--demo", action="store_true", help="Run a demonstration of all operations")
     parser.add_argument("--aliquot", type=int, help="Starting number for aliquot sequence")
     parser.add_argument("--collatz", type=int, help="Starting number for Collatz conjecture")
+    parser.add_argument("--collatz-summary", type=int, metavar="N",
+                        help="Count the steps and peak of the Collatz trajectory of N without storing it")
+    parser.add_argument("--collatz-batch", type=int, metavar="LIMIT",
+                        help="Compute Collatz stopping times and peaks for every start below LIMIT")
+    parser.add_argument("--collatz-store", metavar="PATH",
+                        help="Persistent store of Collatz stopping times consulted by --collatz-summary "
+                             "and extended (or created) by --collatz-batch")
     parser.add_argument("--fibonacci", type=int, help="Number of terms for Fibonacci sequence")
+    parser.add_argument("--fibonacci-nth", type=int, metavar="N", help="Compute the Nth Fibonacci number")
+    parser.add_argument("--fibonacci-window", type=int, nargs=2, metavar=("I", "J"),
+                        help="Print the Fibonacci numbers F(I) .. F(J-1)")
+    parser.add_argument("--modulus", type=int,
+                        help="Reduce --fibonacci, --fibonacci-nth and --fibonacci-window terms modulo this")
     parser.add_argument("--sieve", type=int, help="Upper limit for Sieve of Eratosthenes")
+    parser.add_argument("--prime-count", type=int, metavar="X",
+                        help="Count the primes up to X without sieving the whole range (fast up to about 10^13)")
+    parser.add_argument("--prime-range", type=int, nargs=2, metavar=("LO", "HI"),
+                        help="Count the primes in [LO, HI) with the segmented sieve")
+    parser.add_argument("--parallel-prime-range", type=int, nargs=2, metavar=("LO", "HI"),
+                        help="Count the primes in [LO, HI) with a multi-process segmented sieve")
+    parser.add_argument("--workers", type=int,
+                        help="Number of worker processes for --parallel-prime-range, --parallel-aliquot "
+                             "and --parallel-factorize (default: one per CPU)")
     parser.add_argument("--factorize", type=int, help="Number to factorize")
     parser.add_argument("--parallel-aliquot", type=int, nargs=2, metavar=("START", "COUNT"),
                         help="Generate multiple aliquot sequences: START COUNT")
+    parser.add_argument("--aliquot-batch", type=int, nargs=2, metavar=("START", "COUNT"),
+                        help="Classify how the aliquot sequences of START .. START+COUNT-1 end")
+    parser.add_argument("--bound", type=int,
+                        help="Largest term followed by --aliquot-batch (default: 4 * (START + COUNT))")
     parser.add_argument("--parallel-factorize", type=int, nargs="+", 
                         help="Factorize multiple numbers")
+    parser.add_argument("--spf-table", metavar="PATH",
+                        help="Memory-mapped smallest-prime-factor table used by --parallel-factorize "
+                             "(built and saved if missing)")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="Time limit for each task of --parallel-aliquot and --parallel-factorize")
+    parser.add_argument("--no-plot", action="store_true",
+                        help="Print results without generating any plots (matplotlib is never imported)")
+    parser.add_argument("--stream", nargs="?", const="-", metavar="PATH",
+                        help="Write the terms of --aliquot, --collatz, --fibonacci, --fibonacci-window, --sieve "
+                             "or --prime-range to PATH (default: stdout) as they are produced, without plotting")
+    parser.add_argument("--stream-format", choices=sorted(STREAM_FORMATS), default="ndjson",
+                        help="Format of --stream output (default: ndjson)")
+    parser.add_argument("--checkpoint", nargs="?", const="", metavar="PATH",
+                        help="Periodically save the progress of --aliquot, --collatz or --collatz-summary to "
+                             "this file, or of --parallel-aliquot to this directory (default: "
+                             "<algorithm>_<start>.ckpt, or aliquot_checkpoints/)")
+    parser.add_argument("--checkpoint-interval", type=float, metavar="SECONDS",
+                        help="Shortest time between two checkpoints (default: 30)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the checkpoint left by an earlier run (implies checkpointing)")
+    parser.add_argument("--memory-budget", metavar="SIZE",
+                        help="Most memory the run's jobs may hold at once, e.g. 512M or 4G; larger jobs fail "
+                             "before allocating (default: MATH_SIM_MEMORY_BUDGET or 80%% of physical memory)")
+    parser.add_argument("--metrics-out", metavar="PATH",
+                        help="Write counters, phase timers and histograms of the run, including worker "
+                             "processes, to PATH ('-' for stdout); metrics are not recorded without it")
+    parser.add_argument("--metrics-format", choices=("json", "prometheus"), default="json",
+                        help="Format of --metrics-out (default: json)")
 
     args = parser.parse_args()
 
-    if args.demo:
-        run_demo()
+    from . import memory_budget, metrics
+    if args.memory_budget is not None:
+        try:
+            memory_budget.set_limit(memory_budget.parse_size(args.memory_budget))
+        except ValueError as e:
+            parser.error(str(e))
+    metrics.enable(args.metrics_out is not None)
+    try:
+        run_command(parser, args)
+    except memory_budget.MemoryBudgetExceeded as e:
+        parser.exit(1, f"{e}\n")
+    except CheckpointError as e:
+        parser.error(f"{e}; remove it or pass --checkpoint another path")
+    if args.metrics_out is not None:
+        metrics.write_metrics(args.metrics_out, args.metrics_format)
+
+def run_command(parser, args):
+    if args.stream is not None:
+        terms = streamed_terms(args)
+        if terms is None:
+            parser.error("--stream needs one of --aliquot, --collatz, --fibonacci, --fibonacci-window, "
+                         "--sieve or --prime-range")
+        from .streaming import stream_terms
+        stream_terms(terms, args.stream, args.stream_format)
+    elif args.demo:
+        run_demo(not args.no_plot)
     elif args.aliquot:
-        run_and_plot_aliquot(args.aliquot)
+        run_and_plot_aliquot(args.aliquot, not args.no_plot,
+                             make_checkpoint(args, f"aliquot_{args.aliquot}.ckpt"))
     elif args.collatz:
-        run_and_plot_collatz(args.collatz)
+        run_and_plot_collatz(args.collatz, not args.no_plot,
+                             make_checkpoint(args, f"collatz_{args.collatz}.ckpt"))
+    elif args.collatz_summary:
+        if args.collatz_store and not os.path.exists(args.collatz_store):
+            parser.error(f"--collatz-store {args.collatz_store} does not exist; build it with --collatz-batch")
+        run_collatz_summary(args.collatz_summary, args.collatz_store,
+                            make_checkpoint(args, f"collatz_summary_{args.collatz_summary}.ckpt"))
+    elif args.collatz_batch:
+        run_collatz_batch(args.collatz_batch, args.collatz_store)
     elif args.fibonacci:
-        run_and_plot_fibonacci(args.fibonacci)
+        run_and_plot_fibonacci(args.fibonacci, args.modulus, not args.no_plot)
+    elif args.fibonacci_nth is not None:
+        run_fibonacci_nth(args.fibonacci_nth, args.modulus)
+    elif args.fibonacci_window:
+        run_fibonacci_window(args.fibonacci_window[0], args.fibonacci_window[1], args.modulus)
     elif args.sieve:
-        run_sieve(args.sieve)
+        run_sieve(args.sieve, not args.no_plot)
+    elif args.prime_count is not None:
+        run_prime_count(args.prime_count)
+    elif args.prime_range:
+        run_prime_range(args.prime_range[0], args.prime_range[1])
+    elif args.parallel_prime_range:
+        run_parallel_prime_range(args.parallel_prime_range[0], args.parallel_prime_range[1], args.workers)
     elif args.factorize:
         run_factorization(args.factorize)
     elif args.parallel_aliquot:
-        run_parallel_aliquot(args.parallel_aliquot[0], args.parallel_aliquot[1])
+        run_parallel_aliquot(args.parallel_aliquot[0], args.parallel_aliquot[1], args.workers, args.timeout,
+                             checkpoint_options(args, "aliquot_checkpoints"))
+    elif args.aliquot_batch:
+        run_aliquot_batch(args.aliquot_batch[0], args.aliquot_batch[1], args.bound)
     elif args.parallel_factorize:
-        run_parallel_factorization(args.parallel_factorize)
+        run_parallel_factorization(args.parallel_factorize, args.spf_table, args.workers, args.timeout)
     else:
         parser.print_help()
 
-def run_demo():
+def streamed_terms(args):
+    if args.aliquot:
+        from .algorithms.aliquot_sequence.aliquot_sequence import iter_aliquot
+        return iter_aliquot(args.aliquot)
+    if args.collatz:
+        from .algorithms.collatz_conjecture.collatz_conjecture import iter_collatz
+        return iter_collatz(args.collatz)
+    if args.fibonacci or args.fibonacci_window:
+        from .algorithms.fibonacci_sequence.fibonacci_sequence import iter_fibonacci
+        start, stop = args.fibonacci_window or (0, args.fibonacci)
+        return iter_fibonacci(start, stop, args.modulus)
+    if args.sieve or args.prime_range:
+        from .algorithms.sieve_of_eratosthenes.segmented_sieve import iter_primes
+        lo, hi = args.prime_range or (2, args.sieve + 1)
+        return iter_primes(lo, hi)
+    return None
+
+def checkpoint_options(args, default_path):
+    """
+    Return (path, interval, resume) if checkpointing was requested, else None.
+    """
+    if args.checkpoint is None and not args.resume:
+        return None
+    from .checkpoint import CHECKPOINT_INTERVAL
+    interval = CHECKPOINT_INTERVAL if args.checkpoint_interval is None else args.checkpoint_interval
+    return args.checkpoint or default_path, interval, args.resume
+
+def make_checkpoint(args, default_path):
+    options = checkpoint_options(args, default_path)
+    if options is None:
+        return None
+    from .checkpoint import Checkpoint
+    return Checkpoint(*options)
+
+def run_demo(plot=True):
     print("Running demonstration of all operations:")
-    run_and_plot_aliquot(220)
-    run_and_plot_collatz(27)
-    run_and_plot_fibonacci(20)
-    run_sieve(100)
+    run_and_plot_aliquot(220, plot)
+    run_and_plot_collatz(27, plot)
+    run_and_plot_fibonacci(20, plot=plot)
+    run_sieve(100, plot)
     run_factorization(84)
     run_parallel_aliquot(10, 5)
     run_parallel_factorization([84, 100, 123, 456])
 
-def run_and_plot_aliquot(start):
+def use_headless_backend():
+    # Plots are only ever saved to files, so no GUI backend is needed
+    import matplotlib
+    matplotlib.use("Agg")
+
+def run_and_plot_aliquot(start, plot=True, checkpoint=None):
+    from .algorithms.aliquot_sequence.aliquot_sequence import trace_aliquot
     print(f"Running Aliquot Sequence starting from {start}")
-    sequence, _ = aliquot_sequence(start)
-    print(f"Sequence: {sequence}")
-    plot_aliquot_sequence(start)
-    print(f"Plots saved as 'aliquot_sequence_{start}.png' and 'aliquot_resource_usage_{start}.png'")
+    result, monitor = result_cache.get_or_compute(("aliquot", start),
+                                                  lambda: trace_aliquot(start, checkpoint=checkpoint))
+    print(f"Sequence: {result.sequence}")
+    print(f"Outcome: {describe_aliquot_result(result)}")
+    print(f"Step time: total {monitor.step_total:.6f}s, slowest {monitor.step_max:.6f}s")
+    if not plot:
+        return
+    use_headless_backend()
+    from .algorithms.aliquot_sequence.aliquot_sequence_viz import plot_aliquot_sequence
+    plot_aliquot_sequence(start, sequence=result.sequence, monitor=monitor)
+    print(f"Plots saved as 'aliquot_sequence_{start}.png', 'aliquot_sequence_resource_usage_{start}.png' "
+          f"and 'aliquot_step_times_{start}.png'")
 
-def run_and_plot_collatz(start):
+def run_and_plot_collatz(start, plot=True, checkpoint=None):
+    from .algorithms.collatz_conjecture.collatz_conjecture import collatz_conjecture
     print(f"Running Collatz Conjecture starting from {start}")
-    sequence, _ = collatz_conjecture(start)
+    sequence, monitor = result_cache.get_or_compute(("collatz", start),
+                                                    lambda: collatz_conjecture(start, checkpoint=checkpoint))
     print(f"Sequence: {sequence}")
-    plot_collatz_sequence(start)
+    if not plot:
+        return
+    use_headless_backend()
+    from .algorithms.collatz_conjecture.collatz_conjecture_viz import plot_collatz_sequence
+    plot_collatz_sequence(start, sequence=sequence, monitor=monitor)
     print(f"Plots saved as 'collatz_sequence_{start}.png' and 'collatz_resource_usage_{start}.png'")
 
-def run_and_plot_fibonacci(terms):
+def run_collatz_summary(start, store_path=None, checkpoint=None):
+    from .algorithms.collatz_conjecture.collatz_conjecture import collatz_summary
+    from .algorithms.collatz_conjecture.collatz_store import CollatzStore
+    print(f"Summarizing the Collatz trajectory of a {len(str(start))}-digit starting number")
+    store = CollatzStore(store_path) if store_path else None
+    summary, _ = collatz_summary(start, store=store, checkpoint=checkpoint)
+    print(f"Steps: {summary.steps} ({summary.odd_steps} odd, {summary.even_steps} even)")
+    print(f"Peak: {summary.peak}")
+
+def run_collatz_batch(limit, store_path=None):
+    import numpy as np
+    from .algorithms.collatz_conjecture.collatz_batch import collatz_stopping_times
+    from .algorithms.collatz_conjecture.collatz_store import CollatzStore
+    print(f"Computing Collatz stopping times for every start below {limit}")
+    store = CollatzStore(store_path, writable=True) if store_path else None
+    steps, peaks = collatz_stopping_times(limit, store=store)
+    longest = int(np.argmax(steps))
+    highest = int(np.argmax(peaks))
+    print(f"Longest stopping time: {longest} takes {steps[longest]} steps")
+    print(f"Highest peak: {highest} reaches {peaks[highest]}")
+
+def run_and_plot_fibonacci(terms, modulus=None, plot=True):
+    from .algorithms.fibonacci_sequence.fibonacci_sequence import (
+        fibonacci_sequence, fibonacci_mod, fibonacci_digits, pisano_period)
     print(f"Generating Fibonacci Sequence with {terms} terms")
-    sequence, _ = fibonacci_sequence(terms)
-    print(f"Sequence: {sequence}")
-    plot_fibonacci_sequence(terms)
+    if modulus is not None:
+        sequence, _ = fibonacci_sequence(min(terms, PRINTED_TERMS), modulus)
+        print(f"Sequence mod {modulus}: {sequence}{'...' if terms > PRINTED_TERMS else ''}")
+        print(f"Pisano period: {pisano_period(modulus)}")
+        if plot:
+            print("No plot is drawn for residues; omit --modulus to plot the sequence")
+        return
+    sequence = monitor = None
+    if terms <= PRINTED_TERMS:
+        sequence, monitor = result_cache.get_or_compute(("fibonacci", terms), lambda: fibonacci_sequence(terms))
+        print(f"Sequence: {sequence}")
+    else:
+        # Only the size and trailing digits of the last term are printed, so skip the big ints
+        last_digits, _ = fibonacci_mod(terms - 1, 10**PRINTED_DIGITS)
+        print(f"Last term F({terms - 1}) has {fibonacci_digits(terms - 1)} digits "
+              f"and ends in ...{last_digits:0{PRINTED_DIGITS}d}")
+    if not plot:
+        return
+    use_headless_backend()
+    from .algorithms.fibonacci_sequence.fibonacci_sequence_viz import plot_fibonacci_sequence
+    plot_fibonacci_sequence(terms, sequence=sequence, monitor=monitor)
     print(f"Plots saved as 'fibonacci_sequence_{terms}.png' and 'fibonacci_resource_usage_{terms}.png'")
 
-def run_sieve(limit):
+def run_fibonacci_nth(n, modulus=None):
+    from .algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_nth, fibonacci_mod
+    if modulus is not None:
+        value, _ = fibonacci_mod(n, modulus)
+        print(f"F({n}) mod {modulus} = {value}")
+        return
+    value, _ = fibonacci_nth(n)
+    print(f"F({n}) = {describe_number(value)}")
+
+def run_fibonacci_window(i, j, modulus=None):
+    from .algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_window
+    terms, _ = fibonacci_window(i, j, modulus)
+    for index, term in enumerate(terms, start=i):
+        print(f"F({index}) = {describe_number(term)}")
+
+def describe_number(value):
+    digits = max(int(value.bit_length() * math.log10(2)), 1)
+    if 10**digits <= value:
+        digits += 1
+    if digits <= PRINTED_NUMBER_DIGITS:
+        return str(value)
+    return f"{digits}-digit number ending in ...{value % 10**PRINTED_DIGITS:0{PRINTED_DIGITS}d}"
+
+def run_sieve(limit, plot=True):
+    import numpy as np
+    from .algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import odd_prime_mask, iter_odd_mask_primes
     print(f"Running Sieve of Eratosthenes up to {limit}")
-    primes, _ = sieve_of_eratosthenes(limit)
-    print(f"Number of primes found: {len(primes)}")
-    print(f"First few primes: {primes[:10]}...")
-    plot_prime_spiral(limit)
-    plot_prime_distribution(limit)
+    mask = result_cache.get_or_compute(("odd_prime_mask", limit), lambda: odd_prime_mask(limit))
+    first_primes = [2] if limit >= 2 else []
+    for odd_primes in iter_odd_mask_primes(mask):
+        if len(first_primes) >= 10:
+            break
+        first_primes.extend(odd_primes[:10 - len(first_primes)].tolist())
+    print(f"Number of primes found: {int(np.count_nonzero(mask)) + (1 if limit >= 2 else 0)}")
+    print(f"First few primes: {first_primes}...")
+    if not plot:
+        return
+    use_headless_backend()
+    from .algorithms.sieve_of_eratosthenes.sieve_viz import plot_prime_spiral, plot_prime_distribution
+    plot_prime_spiral(limit, mask=mask)
+    plot_prime_distribution(limit, mask=mask)
     print(f"Plots saved as 'prime_spiral_{limit}.png' and 'prime_distribution_{limit}.png'")
 
+def run_prime_count(x):
+    from .algorithms.sieve_of_eratosthenes.prime_count import prime_count
+    print(f"Counting the primes up to {x}")
+    print(f"Number of primes found: {prime_count(x)}")
+
+def run_prime_range(lo, hi):
+    print(f"Running segmented Sieve of Eratosthenes over [{lo}, {hi})")
+    report_prime_range(lo, hi)
+
+def run_parallel_prime_range(lo, hi, workers=None):
+    from .concurrent_math_sim import parallel_prime_count
+    print(f"Counting primes in [{lo}, {hi}) with a parallel segmented sieve")
+    print(f"Number of primes found: {parallel_prime_count(lo, hi, workers)}")
+
+def report_prime_range(lo, hi):
+    from .algorithms.sieve_of_eratosthenes.segmented_sieve import iter_prime_segments
+    count = 0
+    first_primes = []
+    for segment in iter_prime_segments(lo, hi):
+        count += segment.size
+        if len(first_primes) < 10:
+            first_primes.extend(segment[:10 - len(first_primes)].tolist())
+    print(f"Number of primes found: {count}")
+    print(f"First few primes: {first_primes}...")
+
 def run_factorization(number):
+    from .algorithms.prime_factorization.prime_factorization import factorize
     print(f"Factorizing {number}")
-    factors, _ = factorize(number)
+    factors, _ = result_cache.get_or_compute(("factorize", number), lambda: factorize(number))
     print(f"Factors: {factors}")
 
-def run_parallel_aliquot(start, count):
+def run_parallel_aliquot(start, count, workers=None, timeout=None, checkpoints=None):
+    from collections import Counter
+    from .executor import get_executor
+    from .concurrent_math_sim import iter_parallel_aliquot_trace
     print(f"Generating {count} aliquot sequences starting from {start}")
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        futures = {executor.submit(aliquot_sequence, start + i): start + i for i in range(count)}
-        results = {}
-        for future in concurrent.futures.as_completed(futures):
-            num = futures[future]
-            try:
-                sequence, _ = future.result()
-                results[num] = sequence
-                print(f"Aliquot sequence starting from {num}: {sequence}")
-            except Exception as e:
-                print(f"An error occurred for {num}: {str(e)}")
-
-def run_parallel_factorization(numbers):
+    get_executor(workers=workers)
+    outcomes = Counter()
+    for task in iter_parallel_aliquot_trace(start, count, timeout=timeout, checkpoints=checkpoints):
+        if task.ok:
+            outcomes[task.value.outcome.name] += 1
+            print(f"Aliquot sequence starting from {task.key}: {task.value.sequence} "
+                  f"({describe_aliquot_result(task.value)})")
+        else:
+            outcomes[task.error] += 1
+            print(f"Aliquot sequence starting from {task.key} failed: {task.error}: {task.message}")
+    for outcome, total in sorted(outcomes.items()):
+        print(f"{outcome}: {total}")
+
+def describe_aliquot_result(result):
+    from .algorithms.aliquot_sequence.aliquot_sequence import AliquotOutcome
+    if result.outcome == AliquotOutcome.SOCIABLE:
+        return f"SOCIABLE with period {result.period}"
+    return result.outcome.name
+
+def run_aliquot_batch(start, count, bound=None):
+    import numpy as np
+    from .algorithms.aliquot_sequence.aliquot_sequence import AliquotOutcome
+    from .algorithms.aliquot_sequence.aliquot_batch import classify_aliquot_range
+    print(f"Classifying {count} aliquot sequences starting from {start}")
+    outcomes, cycles = classify_aliquot_range(start, count, bound)
+    for outcome, total in enumerate(np.bincount(outcomes, minlength=len(AliquotOutcome))):
+        if outcome and total:
+            print(f"{AliquotOutcome(outcome).name}: {total}")
+    for cycle in sorted(cycles.values()):
+        print(f"Cycle of length {len(cycle)}: {cycle}")
+
+def run_parallel_factorization(numbers, spf_path=None, workers=None, timeout=None):
+    from .executor import get_executor
+    from .concurrent_math_sim import iter_parallel_factorization
     print(f"Factorizing numbers: {numbers}")
-    results = parallel_prime_factorization(numbers)
-    for num, factors in results.items():
-        print(f"Factors of {num}: {factors}")
+    get_executor(workers=workers)
+    for task in iter_parallel_factorization(numbers, spf_path=spf_path, timeout=timeout):
+        if task.ok:
+            print(f"Factors of {task.key}: {task.value}")
+        else:
+            print(f"Factorizing {task.key} failed: {task.error}: {task.message}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+This module estimates the memory each algorithm needs and admits work only if it fits a memory budget.
+
+The budget is a limit on the memory the package's jobs may hold at once:
+MATH_SIM_MEMORY_BUDGET in the environment (e.g. "4G"), set_limit(), or by
+default DEFAULT_BUDGET_FRACTION of physical memory. Algorithms that allocate
+in proportion to their input call admit() before allocating, so a job that
+cannot fit fails at once with MemoryBudgetExceeded instead of pushing the
+machine into swap. The shared executor reserves the estimates of the chunks
+it runs, and holds back further chunks while the budget is taken.
+"""
+
+import math
+import os
+import re
+import threading
+import psutil
+
+DEFAULT_BUDGET_FRACTION = 0.8
+
+# Jobs estimated below this are admitted without looking at the machine's free memory
+MIN_CHECKED_BYTES = 64 * 1024 * 1024
+
+# Bytes held by a Python int of typical size plus its slot in a list
+PYTHON_INT_BYTES = 36
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+class MemoryBudgetExceeded(MemoryError):
+    """
+    A job whose estimated memory does not fit the budget or the memory available.
+    """
+
+def parse_size(text):
+    """
+    Parse a size such as "512M", "4G", "1.5GiB" or "1000000" (bytes).
+
+    :param text: Number with an optional K, M, G or T suffix (powers of 1024)
+    :return: Size in bytes
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*([KMGT]?)(?:i?B)?\s*", str(text), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid size {text!r}, expected e.g. 512M or 4G")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+def format_size(size):
+    """
+    Format a size in bytes with a binary unit, e.g. "1.5 GiB".
+
+    :param size: Size in bytes
+    :return: Text
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.3g} {unit}"
+        size /= 1024
+    return f"{size:.3g} TiB"
+
+def _prime_count_bound(n):
+    # Upper bound on the number of primes up to n (Rosser and Schoenfeld)
+    return n / (math.log(n) - 1.5) if n >= 67 else 19
+
+def _sieve_bytes(n):
+    # The odd-only mask, the int64 array of primes and the list converted from it
+    return n // 2 + (8 + PYTHON_INT_BYTES) * _prime_count_bound(n)
+
+def _fibonacci_bytes(i, j, modulus=None):
+    if modulus:
+        return PYTHON_INT_BYTES * (j - i)
+    # F(k) has about 0.694 k bits, so the terms F(i) .. F(j - 1) hold about 0.0434 (j^2 - i^2) bytes
+    return 0.0434 * (j * j - i * i) + PYTHON_INT_BYTES * (j - i)
+
+def _collatz_bytes(n, max_steps):
+    # Every trajectory checked so far ends within about 37 log2(n) steps, so a generous
+    # max_steps does not by itself make the sequence long
+    steps = min(max_steps, 40 * n.bit_length() + 1000)
+    return steps * (PYTHON_INT_BYTES + n.bit_length() // 4)
+
+def _collatz_summary_bytes(n, k):
+    # The jump table's NumPy build arrays and its six lists of 2^k ints, plus the current value and peak
+    return (2 * k + 8) * 8 * (1 << k) + 6 * PYTHON_INT_BYTES * (1 << k) + n.bit_length() // 2
+
+# Estimated peak memory in bytes of each algorithm, as a function of its input
+MEMORY_ESTIMATES = {
+    "sieve": _sieve_bytes,
+    "odd_prime_mask": lambda n: n // 2,
+    "prime_count": lambda x: 32 * math.isqrt(x) + _sieve_bytes(math.isqrt(x)),
+    "prime_segment": lambda segment_size: 16 * segment_size,
+    "spf_table": lambda limit: 5 * limit + 8 * _prime_count_bound(limit),
+    "factorize": lambda n: 2 * 1024 * 1024 + 8 * n.bit_length(),
+    "aliquot": lambda n, max_steps: max_steps * (PYTHON_INT_BYTES + 2 * n.bit_length()),
+    "divisor_sum_table": lambda limit: (12 if limit < 2**29 else 24) * limit,
+    "classify_aliquot_range": lambda bound: (13 if bound < 2**29 else 25) * bound,
+    "collatz": _collatz_bytes,
+    "collatz_summary": _collatz_summary_bytes,
+    "collatz_stopping_times": lambda limit, chunk_size: 10 * limit + 48 * min(limit, chunk_size),
+    "fibonacci": _fibonacci_bytes,
+    # F(n) has about 0.0868 n bytes; fast doubling holds four numbers of about that size at once
+    "fibonacci_nth": lambda n: 0.35 * n + PYTHON_INT_BYTES,
+}
+
+def estimate_memory(algorithm, *params):
+    """
+    Estimate the peak memory an algorithm needs for an input.
+
+    :param algorithm: Name, a key of MEMORY_ESTIMATES
+    :param params: The algorithm's size parameters
+    :return: Estimated bytes
+    """
+    return int(MEMORY_ESTIMATES[algorithm](*params))
+
+class MemoryBudget:
+    """
+    A limit on the memory that jobs may hold at once, with reservations against it.
+    """
+
+    def __init__(self, limit=None):
+        """
+        :param limit: Budget in bytes (default: DEFAULT_BUDGET_FRACTION of physical memory)
+        """
+        self.limit = limit or int(DEFAULT_BUDGET_FRACTION * psutil.virtual_memory().total)
+        self.reserved = 0
+        self._lock = threading.Lock()
+
+    def admit(self, estimate, description="This job"):
+        """
+        Make sure a job fits before it allocates.
+
+        :param estimate: Estimated bytes the job needs
+        :param description: What the job is, for the error message, or a function returning it
+        """
+        if estimate > self.limit:
+            problem = f"more than the memory budget of {format_size(self.limit)}"
+        elif estimate >= MIN_CHECKED_BYTES and estimate > (available := psutil.virtual_memory().available):
+            problem = f"but only {format_size(available)} of memory is available"
+        else:
+            return
+        if callable(description):
+            description = description()
+        raise MemoryBudgetExceeded(f"{description} needs an estimated {format_size(estimate)}, {problem}")
+
+    def try_reserve(self, estimate, force=False):
+        """
+        Reserve memory for a job if the budget and the machine's free memory allow it.
+
+        :param estimate: Estimated bytes the job needs
+        :param force: Reserve even if it does not fit, e.g. when nothing else is running
+        :return: True if the memory was reserved
+        """
+        with self._lock:
+            fits = self.reserved + estimate <= self.limit
+            if fits and estimate >= MIN_CHECKED_BYTES:
+                fits = estimate <= psutil.virtual_memory().available
+            if fits or force:
+                self.reserved += estimate
+            return fits or force
+
+    def release(self, estimate):
+        """
+        Return memory reserved with try_reserve.
+
+        :param estimate: The reserved bytes
+        """
+        with self._lock:
+            self.reserved -= estimate
+
+_environment_budget = os.environ.get("MATH_SIM_MEMORY_BUDGET")
+budget = MemoryBudget(parse_size(_environment_budget) if _environment_budget else None)
+
+def set_limit(limit):
+    """
+    Change the package-wide budget; worker processes started afterwards inherit it.
+
+    :param limit: Budget in bytes, or None for the default
+    """
+    budget.limit = limit or MemoryBudget().limit
+
+def admit(algorithm, *params):
+    """
+    Check that an algorithm's input fits the package-wide budget before it allocates.
+
+    :param algorithm: Name, a key of MEMORY_ESTIMATES
+    :param params: The algorithm's size parameters
+    :return: The estimate in bytes
+    """
+    estimate = estimate_memory(algorithm, *params)
+    budget.admit(estimate, lambda: f"{algorithm}({', '.join(_describe(param) for param in params)})")
+    return estimate
+
+def _describe(param):
+    # Ints past a few thousand digits cannot be converted with str() and would not be readable anyway
+    if isinstance(param, int) and param.bit_length() > 1000:
+        return f"<{param.bit_length()}-bit int>"
+    return str(param)
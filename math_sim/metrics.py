@@ -0,0 +1,253 @@
+"""
+This module provides per-process counters, phase timers and histograms for the algorithm hot paths.
+
+Algorithms accumulate their work counts in local variables and report them
+once per call, so instrumentation costs a few dictionary updates per call
+rather than per step. Everything is a no-op while metrics are disabled
+(MATH_SIM_METRICS=0 in the environment, or disable()). Worker processes of the
+shared executor send their metrics back with every chunk, where they are
+merged into the parent's registry.
+"""
+
+import bisect
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+# Upper bounds of the histogram buckets: powers of 4 from 1 to about 10^9
+DEFAULT_BUCKETS = tuple(4.0**k for k in range(16))
+
+# Upper bounds for histograms of durations, in seconds
+TIME_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, 100.0)
+
+PROMETHEUS_PREFIX = "math_sim"
+
+class Metrics:
+    """
+    A registry of monotonic counters, phase timers and fixed-bucket histograms.
+
+    snapshot() returns the contents as plain dictionaries, which can be sent
+    between processes, written as JSON and merged into another registry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Drop every recorded value.
+        """
+        with self._lock:
+            self.counters = {}
+            self.timers = {}
+            self.histograms = {}
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_time(self, name, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            timer["count"] += 1
+            timer["seconds"] += seconds
+            timer["max_seconds"] = max(timer["max_seconds"], seconds)
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {"buckets": list(buckets), "counts": [0] * (len(buckets) + 1),
+                                                     "sum": 0, "count": 0}
+            # The last count is the +Inf bucket
+            histogram["counts"][bisect.bisect_left(histogram["buckets"], value)] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self):
+        """
+        Copy the recorded values.
+
+        :return: Dictionary with "counters", "timers" and "histograms"
+        """
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timers": {name: dict(timer) for name, timer in self.timers.items()},
+                "histograms": {name: {**histogram, "counts": list(histogram["counts"])}
+                               for name, histogram in self.histograms.items()},
+            }
+
+    def drain(self):
+        """
+        Return the recorded values and reset the registry.
+
+        :return: Snapshot of the values recorded since the last reset
+        """
+        with self._lock:
+            values = {"counters": self.counters, "timers": self.timers, "histograms": self.histograms}
+            self.counters, self.timers, self.histograms = {}, {}, {}
+        return values
+
+    def merge(self, values):
+        """
+        Add the values of a snapshot, e.g. one returned by a worker process.
+
+        :param values: Dictionary as returned by snapshot() or drain()
+        """
+        with self._lock:
+            for name, amount in values["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            for name, other in values["timers"].items():
+                timer = self.timers.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+                timer["count"] += other["count"]
+                timer["seconds"] += other["seconds"]
+                timer["max_seconds"] = max(timer["max_seconds"], other["max_seconds"])
+            for name, other in values["histograms"].items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    self.histograms[name] = {**other, "counts": list(other["counts"])}
+                elif histogram["buckets"] != other["buckets"]:
+                    raise ValueError(f"Histogram {name} has different buckets in the merged snapshot")
+                else:
+                    histogram["counts"] = [a + b for a, b in zip(histogram["counts"], other["counts"])]
+                    histogram["sum"] += other["sum"]
+                    histogram["count"] += other["count"]
+
+registry = Metrics()
+enabled = os.environ.get("MATH_SIM_METRICS", "1") != "0"
+
+def enable(on=True):
+    """
+    Turn recording on or off for this process (and for executor workers, which follow it).
+
+    :param on: Record metrics
+    """
+    global enabled
+    enabled = on
+
+def disable():
+    """
+    Turn recording off; the recording functions then return immediately.
+    """
+    enable(False)
+
+def count(name, amount=1):
+    """
+    Add amount to the counter name.
+
+    :param name: Dotted counter name, e.g. "sieve.crossings"
+    :param amount: Non-negative increment
+    """
+    if enabled:
+        registry.count(name, amount)
+
+def record_time(name, seconds):
+    """
+    Record one run of the phase name that took seconds.
+
+    :param name: Dotted phase name
+    :param seconds: Duration of the run
+    """
+    if enabled:
+        registry.record_time(name, seconds)
+
+def observe(name, value, buckets=DEFAULT_BUCKETS):
+    """
+    Add value to the histogram name.
+
+    :param name: Dotted histogram name
+    :param value: Observed value
+    :param buckets: Sorted bucket upper bounds, fixed by the first observation
+    """
+    if enabled:
+        registry.observe(name, value, buckets)
+
+class _Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        registry.record_time(self.name, time.perf_counter() - self.start)
+        return False
+
+_NO_PHASE = contextlib.nullcontext()
+
+def phase(name):
+    """
+    Time a block of code as one run of the phase name.
+
+        with metrics.phase("sieve.mark"):
+            ...
+
+    :param name: Dotted phase name
+    :return: Context manager
+    """
+    return _Phase(name) if enabled else _NO_PHASE
+
+def _prometheus_name(name):
+    return PROMETHEUS_PREFIX + "_" + "".join(c if c.isalnum() else "_" for c in name)
+
+def _prometheus_number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def to_prometheus(values):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+
+    Counters become <name>_total, phase timers the summary math_sim_phase_seconds
+    labelled by phase, and histograms cumulative <name>_bucket series.
+
+    :param values: Dictionary as returned by snapshot()
+    :return: Text with one sample per line
+    """
+    lines = []
+    for name, amount in sorted(values["counters"].items()):
+        metric = _prometheus_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {amount}"]
+    if values["timers"]:
+        metric = f"{PROMETHEUS_PREFIX}_phase_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for name, timer in sorted(values["timers"].items()):
+            lines += [f'{metric}_sum{{phase="{name}"}} {_prometheus_number(timer["seconds"])}',
+                      f'{metric}_count{{phase="{name}"}} {timer["count"]}']
+    for name, histogram in sorted(values["histograms"].items()):
+        metric = _prometheus_name(name)
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, amount in zip(histogram["buckets"] + [math.inf], histogram["counts"]):
+            cumulative += amount
+            lines.append(f'{metric}_bucket{{le="{_prometheus_number(float(bound))}"}} {cumulative}')
+        lines += [f"{metric}_sum {_prometheus_number(histogram['sum'])}", f"{metric}_count {histogram['count']}"]
+    return "\n".join(lines) + "\n"
+
+METRICS_FORMATS = ("json", "prometheus")
+
+def write_metrics(path="-", metrics_format="json"):
+    """
+    Write the metrics of this process, including those merged from workers.
+
+    :param path: Destination file path, or "-" for stdout
+    :param metrics_format: "json" or "prometheus"
+    """
+    values = registry.snapshot()
+    text = to_prometheus(values) if metrics_format == "prometheus" else json.dumps(values, indent=2) + "\n"
+    if path == "-":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    with open(path, "w") as handle:
+        handle.write(text)
@@ -2,53 +2,165 @@
 This module provides functionality for monitoring resource usage during mathematical simulations.
 """
 
+import collections
+import threading
 import psutil
 import time
 
+DEFAULT_SAMPLE_INTERVAL = 0.1
+DEFAULT_BUFFER_SIZE = 4096
+
 class ResourceMonitor:
-    def __init__(self, max_memory_percent=90, max_cpu_percent=95):
+    """
+    Track memory and CPU usage and enforce usage limits.
+
+    By default every call to check_resources() takes a blocking sample.  When a
+    sample_interval is given, a background thread records samples into fixed-size
+    ring buffers instead, and check_resources() only bumps a step counter and
+    re-raises a memory limit violation seen by the sampler.  In that mode the CPU
+    limit is not an error: parallel runs are meant to keep every core busy, and the
+    shared executor slows its submissions under load instead.  Samples in which the
+    load of other processes exceeded max_cpu_percent are counted in cpu_overloads.
+
+    Step durations passed to record_step() are kept in a ring buffer of the same
+    size, step_times, alongside running totals (step_count, step_total and
+    step_max) that cover every step.
+    """
+
+    def __init__(self, max_memory_percent=90, max_cpu_percent=95, sample_interval=None,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
         self.max_memory_percent = max_memory_percent
         self.max_cpu_percent = max_cpu_percent
-        self.memory_usage = []
-        self.cpu_usage = []
-        self.time_points = []
+        self.sample_interval = sample_interval
+        self.memory_usage = collections.deque(maxlen=buffer_size)
+        self.cpu_usage = collections.deque(maxlen=buffer_size)
+        self.time_points = collections.deque(maxlen=buffer_size)
+        self.steps = 0
+        self.cpu_overloads = 0
+        self.step_times = collections.deque(maxlen=buffer_size)
+        self.step_count = 0
+        self.step_total = 0.0
+        self.step_max = 0.0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._violation = None
+        self._process = None
+
+    def __getstate__(self):
+        # Drop the sampler thread and its synchronization objects so results can
+        # be returned from worker processes
+        state = self.__dict__.copy()
+        for name in ("_lock", "_stop_event", "_thread", "_process"):
+            state[name] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def start(self):
+        """
+        Start background sampling. Does nothing in blocking mode or if already running.
+        """
+        if self.sample_interval is None or self._thread is not None:
+            return
+        self._process = psutil.Process()
+        # Prime the non-blocking CPU counters
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        memory_percent = psutil.virtual_memory().percent
+        self._record(memory_percent, 0.0)
+        self._violation = self._limit_error(memory_percent)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ResourceMonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop background sampling and take a final sample.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._sample()
+
+    def _run(self):
+        while not self._stop_event.wait(self.sample_interval):
+            self._sample()
+
+    def _sample(self):
+        memory_percent = psutil.virtual_memory().percent
+        cpu_percent = psutil.cpu_percent(interval=None)
+        own_cpu_percent = self._process.cpu_percent(interval=None) / (psutil.cpu_count() or 1)
+        self._record(memory_percent, cpu_percent)
+        if cpu_percent - own_cpu_percent > self.max_cpu_percent:
+            self.cpu_overloads += 1
+        if self._violation is None:
+            self._violation = self._limit_error(memory_percent)
+
+    def _record(self, memory_percent, cpu_percent):
+        with self._lock:
+            self.memory_usage.append(memory_percent)
+            self.cpu_usage.append(cpu_percent)
+            self.time_points.append(time.time())
+
+    def _limit_error(self, memory_percent, cpu_percent=None):
+        if memory_percent > self.max_memory_percent:
+            return MemoryError(f"Memory usage exceeded {self.max_memory_percent}%")
+        if cpu_percent is not None and cpu_percent > self.max_cpu_percent:
+            return RuntimeError(f"CPU usage exceeded {self.max_cpu_percent}%")
+        return None
+
+    def record_step(self, seconds):
+        """
+        Record the duration of one algorithm step, e.g. a single aliquot term.
+        """
+        self.step_times.append(seconds)
+        self.step_count += 1
+        self.step_total += seconds
+        self.step_max = max(self.step_max, seconds)
 
     def check_resources(self):
+        self.steps += 1
+        if self._thread is not None:
+            if self._violation is not None:
+                raise self._violation
+            return self.memory_usage[-1], self.cpu_usage[-1]
+
         memory_percent = psutil.virtual_memory().percent
         cpu_percent = psutil.cpu_percent(interval=0.1)
-        
-        self.memory_usage.append(memory_percent)
-        self.cpu_usage.append(cpu_percent)
-        self.time_points.append(time.time())
-        
-        if memory_percent > self.max_memory_percent:
-            raise MemoryError(f"Memory usage exceeded {self.max_memory_percent}%")
-        if cpu_percent > self.max_cpu_percent:
-            raise RuntimeError(f"CPU usage exceeded {self.max_cpu_percent}%")
-        
+        self._record(memory_percent, cpu_percent)
+
+        error = self._limit_error(memory_percent, cpu_percent)
+        if error is not None:
+            raise error
+
         return memory_percent, cpu_percent
 
 def factorize(n):
     """
     Factorize a number into its prime factors.
 
+    Kept here for compatibility; the implementation lives in
+    math_sim.algorithms.prime_factorization.
+
     :param n: Number to factorize
     :return: Tuple of (list of prime factors, ResourceMonitor instance)
     """
-    monitor = ResourceMonitor()
-    factors = []
-    d = 2
-    while n > 1:
-        monitor.check_resources()
-        while n % d == 0:
-            factors.append(d)
-            n //= d
-        d += 1
-        if d * d > n:
-            if n > 1:
-                factors.append(n)
-            break
-    return factors, monitor
+    from .algorithms.prime_factorization.prime_factorization import factorize as _factorize
+    return _factorize(n)
 
 if __name__ == "__main__":
     # Example usage
@@ -56,4 +168,4 @@ if __name__ == "__main__":
     factors, monitor = factorize(number)
     print(f"Factors of {number}: {factors}")
     print(f"Max memory usage: {max(monitor.memory_usage):.2f}%")
-    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
\ No newline at end of file
+    print(f"Max CPU usage: {max(monitor.cpu_usage):.2f}%")
@@ -0,0 +1,90 @@
+"""
+This module implements an in-process LRU cache of algorithm results with a memory budget.
+"""
+
+import sys
+from collections import OrderedDict, deque
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+def estimate_size(value):
+    """
+    Estimate the memory held by a result, following containers and object attributes.
+
+    :param value: Result to measure
+    :return: Approximate size in bytes
+    """
+    seen = set()
+    pending = [value]
+    total = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        # NumPy arrays (and memmaps) report their buffer size; checked by duck typing so NumPy is not imported
+        if hasattr(item, "nbytes") and hasattr(item, "dtype"):
+            total += item.nbytes
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            pending.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            pending.extend(vars(item).values())
+    return total
+
+class ResultCache:
+    """
+    Results keyed by (algorithm, parameters), evicting the least recently used
+    entries once their estimated size exceeds the budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached result for key, computing and storing it on a miss.
+
+        Results larger than the whole budget are returned without being stored.
+
+        :param key: Hashable (algorithm, parameters...) tuple
+        :param compute: Function of no arguments producing the result
+        :return: The result
+        """
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+        self.misses += 1
+        result = compute()
+        size = estimate_size(result)
+        if size <= self.max_bytes:
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+        return result
+
+    def clear(self):
+        """
+        Drop every cached result.
+        """
+        self._entries.clear()
+        self.current_bytes = 0
+
+result_cache = ResultCache()
@@ -0,0 +1,474 @@
+"""
+This module runs math_sim as a long-lived local service answering JSON requests.
+
+Clients send one JSON object per line and get one line back per request,
+matched by id and written in completion order, so a connection can pipeline
+many requests:
+
+    {"id": 1, "op": "factorize", "n": 84}
+    {"id": 1, "ok": true, "result": [2, 2, 3, 7]}
+    {"id": 2, "ok": false, "error": "ValueError", "message": "..."}
+
+The process pool, the SPF table and a Collatz store stay warm for the life
+of the service. Concurrent identical requests share one computation and
+finished results are cached. factorize and collatz requests arriving within
+BATCH_WINDOW of each other are answered with one vectorized table lookup,
+and only the numbers beyond the tables are sent to the pool, together.
+Run it with:
+
+    python -m math_sim.serve [--port 8765 | --unix PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import tempfile
+from typing import Optional
+import numpy as np
+from . import metrics
+from .executor import SimulationExecutor, TaskResult, get_executor
+from .memory_budget import estimate_memory
+from .result_cache import ResultCache
+from .algorithms.aliquot_sequence.aliquot_sequence import trace_aliquot
+from .algorithms.collatz_conjecture.collatz_batch import PEAK_OVERFLOW
+from .algorithms.collatz_conjecture.collatz_conjecture import DEFAULT_JUMP_BITS, collatz_summary
+from .algorithms.collatz_conjecture.collatz_store import CollatzStore
+from .algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_mod, fibonacci_nth
+from .algorithms.prime_factorization.prime_factorization import prime_factors
+from .algorithms.prime_factorization.spf_table import (DEFAULT_SPF_LIMIT, cached_spf_table, factorize_batch,
+                                                       smallest_prime_factor_table)
+from .algorithms.sieve_of_eratosthenes.segmented_sieve import count_primes
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Collatz records kept warm when no store is given; 2^18 starts take about a second to compute
+DEFAULT_COLLATZ_LIMIT = 1 << 18
+
+# How long a micro-batch waits for more requests, in seconds, and how large it may grow
+BATCH_WINDOW = 0.002
+MAX_BATCH = 4096
+
+DEFAULT_SERVE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Parameters of every operation, with their defaults (None: required; a fibonacci modulus of 0: none)
+OPERATIONS = {
+    "factorize": {"n": None},
+    "collatz": {"n": None},
+    "aliquot": {"n": None, "max_steps": 1000},
+    "prime_count": {"lo": None, "hi": None},
+    "fibonacci": {"n": None, "modulus": 0},
+    "stats": {},
+}
+
+def parse_request(request):
+    """
+    Check a request and extract its operation and arguments.
+
+    :param request: Decoded JSON request
+    :return: Tuple of (operation name, tuple of integer arguments in OPERATIONS order)
+    """
+    if not isinstance(request, dict):
+        raise TypeError("A request must be a JSON object")
+    op = request.get("op")
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation {op!r}, expected one of {', '.join(OPERATIONS)}")
+    args = []
+    for name, default in OPERATIONS[op].items():
+        value = request.get(name, default)
+        if value is None:
+            raise ValueError(f"{op} needs the parameter {name}")
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"{op} parameter {name} must be a non-negative integer, got {value!r}")
+        args.append(value)
+    if op in ("factorize", "collatz", "aliquot") and args[0] < 1:
+        raise ValueError(f"{op} needs a positive integer, got {args[0]}")
+    if op == "prime_count" and args[0] > args[1]:
+        raise ValueError(f"prime_count needs lo <= hi, got [{args[0]}, {args[1]})")
+    return op, tuple(args)
+
+# Worker-side functions; they return JSON-ready values so nothing else is pickled back
+
+def _factorize(n):
+    return prime_factors(n)
+
+def _collatz(n):
+    summary, _ = collatz_summary(n)
+    return {"steps": summary.steps, "odd_steps": summary.odd_steps, "peak": summary.peak}
+
+def _aliquot(n, max_steps):
+    result, _ = trace_aliquot(n, max_steps)
+    return {"sequence": result.sequence, "outcome": result.outcome.name, "period": result.period}
+
+def _prime_count(lo, hi):
+    return count_primes(lo, hi)
+
+def _fibonacci(n, modulus):
+    value, _ = fibonacci_mod(n, modulus) if modulus else fibonacci_nth(n)
+    return value
+
+# Estimated peak memory of the worker functions whose memory grows with their input
+_MEMORY_COSTS = {
+    _factorize: lambda n: estimate_memory("factorize", n),
+    _collatz: lambda n: estimate_memory("collatz_summary", n, DEFAULT_JUMP_BITS),
+    _aliquot: lambda n, max_steps: estimate_memory("aliquot", n, max_steps),
+    _prime_count: lambda lo, hi: estimate_memory("prime_count", hi),
+    _fibonacci: lambda n, modulus: 0 if modulus else estimate_memory("fibonacci_nth", n),
+}
+
+def _memory_cost(call):
+    _, function, args = call
+    return _MEMORY_COSTS[function](*args) if function in _MEMORY_COSTS else 0
+
+_WORKER_FUNCTIONS = {
+    "factorize": _factorize,
+    "collatz": _collatz,
+    "aliquot": _aliquot,
+    "prime_count": _prime_count,
+    "fibonacci": _fibonacci,
+}
+
+class MicroBatcher:
+    """
+    Collects the items submitted within a short window and processes them with one call.
+
+    A batch is processed once window seconds have passed since its first item,
+    or as soon as it holds max_size items.
+    """
+
+    def __init__(self, process, window=BATCH_WINDOW, max_size=MAX_BATCH, name="serve"):
+        """
+        :param process: Coroutine function taking a list of distinct items and
+                        returning a dictionary mapping each item to a TaskResult
+        :param window: Longest time in seconds an item waits for its batch
+        :param max_size: Number of items that triggers processing at once
+        :param name: Prefix of the batch metrics, e.g. "serve.factorize"
+        """
+        self.process = process
+        self.window = window
+        self.max_size = max_size
+        self.name = name
+        self._pending = {}
+        self._timer = None
+        self._running = set()
+
+    async def submit(self, item):
+        """
+        Add an item to the current batch and wait for its result.
+
+        :param item: Hashable item
+        :return: TaskResult of the item
+        """
+        future = self._pending.get(item)
+        if future is None:
+            future = self._pending[item] = asyncio.get_running_loop().create_future()
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        metrics.count(f"{self.name}.batches")
+        metrics.observe(f"{self.name}.batch_size", len(batch))
+        try:
+            results = await self.process(list(batch))
+        except Exception as e:
+            results = {item: TaskResult(item, error=type(e).__name__, message=str(e)) for item in batch}
+        for item, future in batch.items():
+            if not future.done():
+                future.set_result(results[item])
+
+class MathService:
+    """
+    The state of the service: warm tables, the process pool, the result cache
+    and the computations in flight.
+
+    handle() answers one decoded request; handle_connection() serves a stream
+    of them, and is what serve() listens with.
+    """
+
+    def __init__(self, workers=None, timeout=None, spf_limit=DEFAULT_SPF_LIMIT, spf_path=None,
+                 collatz_store=None, collatz_limit=DEFAULT_COLLATZ_LIMIT, batch_window=BATCH_WINDOW,
+                 max_batch=MAX_BATCH, cache_bytes=DEFAULT_SERVE_CACHE_BYTES):
+        """
+        :param workers: Number of worker processes in a pool of the service's own
+                        (default: the shared executor, one process per CPU)
+        :param timeout: Optional time limit in seconds for each computation on the pool
+        :param spf_limit: Largest number factored with the SPF table
+        :param spf_path: Optional .npy file to memory-map the SPF table from (built and saved if missing)
+        :param collatz_store: Optional path of a Collatz store to serve small starts from
+                              (default: one built in a temporary directory)
+        :param collatz_limit: Starting numbers below this are served from the Collatz store
+        :param batch_window: Longest time in seconds a request waits for its micro-batch
+        :param max_batch: Largest micro-batch
+        :param cache_bytes: Memory budget of the result cache
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.spf_limit = spf_limit
+        self.spf_path = spf_path
+        self.collatz_path = collatz_store
+        self.collatz_limit = collatz_limit
+        self.cache = ResultCache(cache_bytes)
+        self.spf_table = None
+        self.collatz_store = None
+        self.executor = None
+        self._temporary_directory = None
+        self._inflight = {}
+        self._batchers = {
+            "factorize": MicroBatcher(self._factorize_batch, batch_window, max_batch, "serve.factorize"),
+            "collatz": MicroBatcher(self._collatz_batch, batch_window, max_batch, "serve.collatz"),
+        }
+
+    def warm_up(self):
+        """
+        Build the tables and start the worker processes.
+
+        Call it before the event loop starts: workers are forked after the
+        tables are built, so they share the tables' pages with the service.
+        """
+        if self.spf_path:
+            self.spf_table = cached_spf_table(self.spf_path, self.spf_limit)
+        else:
+            self.spf_table = smallest_prime_factor_table(self.spf_limit)
+        path = self.collatz_path
+        if path is None:
+            self._temporary_directory = tempfile.TemporaryDirectory(prefix="math_sim_serve_")
+            path = os.path.join(self._temporary_directory.name, "collatz_store.bin")
+        self.collatz_store = CollatzStore(path, writable=True)
+        self.collatz_store.extend(self.collatz_limit)
+        # An explicit worker count gets a pool of its own, so the shared one is left as it is
+        self.executor = get_executor() if self.workers is None else SimulationExecutor(self.workers)
+        # One task per worker, so the pool starts all of its processes now
+        list(self.executor.run(((i, abs, (i,)) for i in range(self.executor.workers)), chunk_size=1))
+
+    def close(self):
+        """
+        Stop the service's own pool, if it has one, and remove the temporary Collatz store, if one was built.
+        """
+        if self.executor is not None and self.workers is not None:
+            self.executor.shutdown()
+        self.executor = None
+        if self._temporary_directory is not None:
+            self.collatz_store = None
+            self._temporary_directory.cleanup()
+            self._temporary_directory = None
+
+    async def handle(self, request):
+        """
+        Answer one decoded request.
+
+        :param request: Dictionary with "op", the operation's parameters and an optional "id"
+        :return: Response dictionary with "id", "ok" and either "result" or "error" and "message"
+        """
+        metrics.count("serve.requests")
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            op, args = parse_request(request)
+        except (TypeError, ValueError) as e:
+            return {"id": request_id, "ok": False, "error": type(e).__name__, "message": str(e)}
+        result = TaskResult(op, self.stats()) if op == "stats" else await self.compute(op, args)
+        if not result.ok:
+            metrics.count(f"serve.errors.{result.error}")
+            return {"id": request_id, "ok": False, "error": result.error, "message": result.message}
+        return {"id": request_id, "ok": True, "result": result.value}
+
+    async def compute(self, op, args):
+        """
+        Get the result of an operation from the cache, from an identical
+        computation in flight, or by computing it.
+
+        :param op: Operation name
+        :param args: Tuple of arguments as returned by parse_request
+        :return: TaskResult
+        """
+        key = (op, *args)
+        if key in self.cache:
+            metrics.count("serve.cache_hits")
+            return self.cache.get_or_compute(key, None)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._dispatch(op, args))
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            metrics.count("serve.coalesced")
+        # A waiter that goes away must not cancel the computation the others share
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        del self._inflight[key]
+        if not task.cancelled() and task.exception() is None and task.result().ok:
+            self.cache.get_or_compute(key, task.result)
+
+    async def _dispatch(self, op, args):
+        metrics.count(f"serve.computations.{op}")
+        if op in self._batchers:
+            return await self._batchers[op].submit(args[0])
+        results = await self._run_on_pool([(op, _WORKER_FUNCTIONS[op], args)])
+        return results[op]
+
+    async def _run_on_pool(self, calls):
+        # The executor's run() blocks while it waits for the workers, so it gets a thread of its own
+        def run():
+            return {task.key: task for task in self.executor.run(calls, self.timeout, memory_cost=_memory_cost)}
+        return await asyncio.to_thread(run)
+
+    async def _factorize_batch(self, numbers):
+        small = [n for n in numbers if n < len(self.spf_table)]
+        results = {n: TaskResult(n, factors) for n, factors in factorize_batch(small, self.spf_table).items()}
+        large = [n for n in numbers if n not in results]
+        if large:
+            results.update(await self._run_on_pool([(n, _factorize, (n,)) for n in large]))
+        return results
+
+    async def _collatz_batch(self, numbers):
+        store = self.collatz_store
+        small = np.array([n for n in numbers if n < store.count], dtype=np.int64)
+        records = store.records[small]
+        results = {}
+        for n, steps, odd, peak in zip(small.tolist(), records["steps"].tolist(), records["odd"].tolist(),
+                                       records["peak"].tolist()):
+            # Saturated peaks are not exact, so those starts are recomputed
+            if peak != PEAK_OVERFLOW:
+                results[n] = TaskResult(n, {"steps": steps, "odd_steps": odd, "peak": peak})
+        large = [n for n in numbers if n not in results]
+        if large:
+            results.update(await self._run_on_pool([(n, _collatz, (n,)) for n in large]))
+        return results
+
+    def stats(self):
+        """
+        Describe the service's state.
+
+        :return: Dictionary with the metrics snapshot, the cache counters and
+                 the number of computations in flight
+        """
+        return {
+            "metrics": metrics.registry.snapshot(),
+            "cache": {"entries": len(self.cache), "bytes": self.cache.current_bytes,
+                      "hits": self.cache.hits, "misses": self.cache.misses},
+            "inflight": len(self._inflight),
+        }
+
+    async def _respond(self, line, writer):
+        try:
+            response = await self.handle(json.loads(line))
+        except ValueError as e:
+            response = {"id": None, "ok": False, "error": "ValueError", "message": f"Invalid JSON: {e}"}
+        try:
+            text = json.dumps(response)
+        except ValueError as e:
+            # e.g. an integer with more than 4300 digits
+            text = json.dumps({"id": response["id"], "ok": False, "error": type(e).__name__, "message": str(e)})
+        writer.write(text.encode() + b"\n")
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve the requests of one connection, one JSON object per line,
+        answering each as soon as its result is ready.
+
+        :param reader: asyncio StreamReader of the connection
+        :param writer: asyncio StreamWriter of the connection
+        """
+        responses = set()
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.ensure_future(self._respond(line, writer))
+                    responses.add(task)
+                    task.add_done_callback(responses.discard)
+            # The client finished sending; answer what it already asked
+            await asyncio.gather(*responses, return_exceptions=True)
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than the reader's limit
+            pass
+        finally:
+            for task in responses:
+                task.cancel()
+            writer.close()
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    """
+    Start listening for connections to a warmed-up service.
+
+    :param service: MathService, warmed up
+    :param host: Address to listen on
+    :param port: TCP port to listen on (0 picks a free one)
+    :param unix_path: Listen on this Unix socket instead of TCP
+    :return: asyncio Server
+    """
+    if unix_path is not None:
+        return await asyncio.start_unix_server(service.handle_connection, unix_path)
+    return await asyncio.start_server(service.handle_connection, host, port)
+
+def server_address(server, unix_path=None):
+    """
+    Describe where a server listens, e.g. "127.0.0.1:8765".
+
+    :param server: asyncio Server returned by serve()
+    :param unix_path: Unix socket path, if it listens on one
+    :return: Address string
+    """
+    if unix_path is not None:
+        return unix_path
+    host, port = server.sockets[0].getsockname()[:2]
+    return f"{host}:{port}"
+
+async def _serve_until_stopped(service, host, port, unix_path):
+    server = await serve(service, host, port, unix_path)
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    print(f"Serving on {server_address(server, unix_path)}", flush=True)
+    async with server:
+        await stop.wait()
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Serve math_sim computations over a local socket")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="Time limit for each computation; requests that exceed it get a TimeoutError")
+    parser.add_argument("--spf-limit", type=int, default=DEFAULT_SPF_LIMIT,
+                        help="Largest number factored with the SPF table (default: 2^24)")
+    parser.add_argument("--spf-table", metavar="PATH", help="Memory-map the SPF table from this .npy file")
+    parser.add_argument("--collatz-store", metavar="PATH", help="Collatz store to serve small starts from")
+    parser.add_argument("--collatz-limit", type=int, default=DEFAULT_COLLATZ_LIMIT,
+                        help="Serve Collatz starts below this from the store, extending it if needed "
+                             "(default: 2^18)")
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW, metavar="SECONDS",
+                        help="How long a factorize or collatz request waits for others to batch with "
+                             "(default: 0.002)")
+    args = parser.parse_args(argv)
+
+    service = MathService(args.workers, args.timeout, args.spf_limit, args.spf_table, args.collatz_store,
+                          args.collatz_limit, args.batch_window)
+    print("Building tables and starting workers", file=sys.stderr, flush=True)
+    service.warm_up()
+    try:
+        asyncio.run(_serve_until_stopped(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
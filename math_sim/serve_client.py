@@ -0,0 +1,279 @@
+"""
+This module implements a client for the math_sim service (see serve.py) and a load test for it.
+
+    python -m math_sim.serve_client factorize n=84
+    python -m math_sim.serve_client --load-test factorize --requests 10000 --connections 8
+
+The load test draws its requests from a limited pool of distinct inputs, so
+the service's coalescing, caching and micro-batching all come into play, and
+reports throughput, latency percentiles and the service's counters.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from typing import Optional
+from .serve import DEFAULT_HOST, DEFAULT_PORT
+
+# Size of each load-test request's input, by operation
+LOAD_TEST_INPUTS = {
+    "factorize": lambda rng: rng.randrange(2, 10**12),
+    "collatz": lambda rng: rng.randrange(1, 10**7),
+    "aliquot": lambda rng: {"n": rng.randrange(2, 10**4), "max_steps": 50},
+    "fibonacci": lambda rng: {"n": rng.randrange(10**6), "modulus": 10**9 + 7},
+}
+
+LATENCY_PERCENTILES = (50, 95, 99)
+
+class ServeError(Exception):
+    """
+    A request the service answered with an error.
+    """
+
+    def __init__(self, error, message):
+        super().__init__(f"{error}: {message}")
+        self.error = error
+        self.message = message
+
+class ServeClient:
+    """
+    A connection to the service that pipelines requests: any number may be
+    in flight at once, and each is matched with its response by id.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        """
+        Open a connection to the service.
+
+        :param host: Address of the service
+        :param port: TCP port of the service
+        :param unix_path: Connect to this Unix socket instead of TCP
+        :return: ServeClient instance
+        """
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                future = self._waiting.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the service closed"))
+            self._waiting.clear()
+
+    async def call(self, op, **params):
+        """
+        Send a request and wait for its response.
+
+        :param op: Operation name, e.g. "factorize"
+        :param params: Parameters of the operation, e.g. n=84
+        :return: Response dictionary with "ok" and either "result" or "error" and "message"
+        """
+        if self._receiver.done():
+            raise ConnectionError("Connection to the service closed")
+        request_id = next(self._ids)
+        future = self._waiting[request_id] = asyncio.get_running_loop().create_future()
+        self._writer.write(json.dumps({"id": request_id, "op": op, **params}).encode() + b"\n")
+        await self._writer.drain()
+        return await future
+
+    async def request(self, op, **params):
+        """
+        Send a request and return its result.
+
+        :param op: Operation name, e.g. "factorize"
+        :param params: Parameters of the operation, e.g. n=84
+        :return: The result
+        """
+        response = await self.call(op, **params)
+        if not response["ok"]:
+            raise ServeError(response["error"], response["message"])
+        return response["result"]
+
+    async def close(self):
+        """
+        Close the connection.
+        """
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await asyncio.gather(self._receiver, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+def request(op, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, **params):
+    """
+    Send one request over a fresh connection; for scripts that do not run an event loop.
+
+    :param op: Operation name, e.g. "factorize"
+    :param host: Address of the service
+    :param port: TCP port of the service
+    :param unix_path: Connect to this Unix socket instead of TCP
+    :param params: Parameters of the operation, e.g. n=84
+    :return: The result
+    """
+    async def send():
+        async with await ServeClient.connect(host, port, unix_path) as client:
+            return await client.request(op, **params)
+    return asyncio.run(send())
+
+def load_test_requests(op, count, distinct, seed=0):
+    """
+    Draw the parameters of count requests from a pool of distinct inputs.
+
+    :param op: Operation name, a key of LOAD_TEST_INPUTS
+    :param count: Number of requests
+    :param distinct: Number of distinct inputs to draw from
+    :param seed: Random seed
+    :return: List of parameter dictionaries
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        params = LOAD_TEST_INPUTS[op](rng)
+        pool.append(params if isinstance(params, dict) else {"n": params})
+    return [rng.choice(pool) for _ in range(count)]
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of a sorted list.
+
+    :param values: Sorted list
+    :param q: Percentile between 0 and 100
+    :return: The value below which q percent of the values lie
+    """
+    return values[max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))]
+
+async def load_test(op, count, distinct=1000, connections=8, concurrency=64, host=DEFAULT_HOST,
+                    port=DEFAULT_PORT, unix_path=None, seed=0):
+    """
+    Send count requests over several connections, keeping concurrency of them in flight.
+
+    :param op: Operation name, a key of LOAD_TEST_INPUTS
+    :param count: Number of requests
+    :param distinct: Number of distinct inputs the requests are drawn from
+    :param connections: Number of connections
+    :param concurrency: Number of requests in flight at once, spread over the connections
+    :param host: Address of the service
+    :param port: TCP port of the service
+    :param unix_path: Connect to this Unix socket instead of TCP
+    :param seed: Random seed
+    :return: Report dictionary with the throughput, latencies in seconds, the
+             error count and how much the service's "serve." counters grew during the test
+    """
+    queue = list(reversed(load_test_requests(op, count, distinct, seed)))
+    clients = [await ServeClient.connect(host, port, unix_path) for _ in range(connections)]
+    latencies = []
+    errors = 0
+
+    async def send(client):
+        nonlocal errors
+        while queue:
+            params = queue.pop()
+            start = time.perf_counter()
+            response = await client.call(op, **params)
+            latencies.append(time.perf_counter() - start)
+            errors += not response["ok"]
+
+    try:
+        before = (await clients[0].request("stats"))["metrics"]["counters"]
+        start = time.perf_counter()
+        await asyncio.gather(*(send(clients[i % connections]) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        counters = (await clients[0].request("stats"))["metrics"]["counters"]
+    finally:
+        for client in clients:
+            await client.close()
+    latencies.sort()
+    return {
+        "op": op,
+        "requests": count,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": count / elapsed if elapsed > 0 else float("inf"),
+        "latency": {f"p{q}": percentile(latencies, q) for q in LATENCY_PERCENTILES} | {"max": latencies[-1]},
+        "service": {name: value - before.get(name, 0) for name, value in sorted(counters.items())
+                    if name.startswith("serve.") and value != before.get(name, 0)},
+    }
+
+def format_report(report):
+    """
+    Summarize a load-test report in a few lines.
+
+    :param report: Dictionary returned by load_test
+    :return: Text
+    """
+    latency = ", ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in report["latency"].items())
+    lines = [f"{report['requests']} {report['op']} requests in {report['seconds']:.2f} s: "
+             f"{report['throughput']:.0f} requests/s, {report['errors']} errors",
+             f"Latency: {latency}"]
+    lines += [f"{name}: {value}" for name, value in report["service"].items()]
+    return "\n".join(lines)
+
+def _parse_params(pairs):
+    params = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        params[name] = int(value)
+    return params
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Send requests to a running math_sim service")
+    parser.add_argument("op", help="Operation, e.g. factorize, collatz, aliquot, prime_count, fibonacci or stats")
+    parser.add_argument("params", nargs="*", metavar="NAME=VALUE", help="Integer parameters, e.g. n=84")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address of the service (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="Connect to a Unix socket instead of TCP")
+    parser.add_argument("--load-test", action="store_true",
+                        help=f"Load-test the operation ({', '.join(LOAD_TEST_INPUTS)}) with random inputs")
+    parser.add_argument("--requests", type=int, default=10000, help="Load test: number of requests")
+    parser.add_argument("--distinct", type=int, default=1000, help="Load test: number of distinct inputs")
+    parser.add_argument("--connections", type=int, default=8, help="Load test: number of connections")
+    parser.add_argument("--concurrency", type=int, default=64, help="Load test: requests in flight at once")
+    parser.add_argument("--json", action="store_true", help="Load test: print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.load_test:
+        if args.op not in LOAD_TEST_INPUTS:
+            parser.error(f"--load-test supports {', '.join(LOAD_TEST_INPUTS)}")
+        report = asyncio.run(load_test(args.op, args.requests, args.distinct, args.connections, args.concurrency,
+                                       args.host, args.port, args.unix))
+        print(json.dumps(report, indent=2) if args.json else format_report(report))
+        return 1 if report["errors"] else 0
+    try:
+        result = request(args.op, args.host, args.port, args.unix, **_parse_params(args.params))
+    except ServeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(json.dumps(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
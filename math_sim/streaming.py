@@ -0,0 +1,128 @@
+"""
+This module writes and reads streams of integer terms as NDJSON or length-prefixed binary.
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+from decimal import Decimal
+
+# Buffered output is flushed at least this often, in seconds
+FLUSH_INTERVAL = 0.1
+
+_LENGTH = struct.Struct("<I")
+
+# Ints up to this many bits have fewer than 4300 digits, the default limit of sys.get_int_max_str_digits
+_STR_SAFE_BITS = 14000
+
+def _decimal_digits(n):
+    # Decimal converts ints through binary digit arrays, so it is not subject to the int-str limit
+    return str(n) if n.bit_length() <= _STR_SAFE_BITS else str(Decimal(n))
+
+def _parse_int(text):
+    return int(text) if len(text) < 4300 else int(Decimal(text))
+
+def write_ndjson(terms, stream, flush_interval=FLUSH_INTERVAL):
+    """
+    Write terms as newline-delimited JSON, one {"index": i, "value": term} object per line.
+
+    Terms are written as JSON numbers of any size, including ones beyond
+    Python's limit on int-str conversion; read_ndjson reads them back.
+
+    :param terms: Iterable of integers, such as a generator from one of the iter_* functions
+    :param stream: Text stream to write to
+    :param flush_interval: Longest time in seconds a written term may stay buffered
+    :return: Number of terms written
+    """
+    count = 0
+    last_flush = time.monotonic()
+    for count, term in enumerate(terms, start=1):
+        stream.write(f'{{"index": {count - 1}, "value": {_decimal_digits(term)}}}\n')
+        now = time.monotonic()
+        if now - last_flush >= flush_interval:
+            stream.flush()
+            last_flush = now
+    stream.flush()
+    return count
+
+def read_ndjson(stream):
+    """
+    Read back the terms written by write_ndjson.
+
+    :param stream: Text stream to read from
+    :return: Generator of Python ints, in index order
+    """
+    for line in stream:
+        if line.strip():
+            yield json.loads(line, parse_int=_parse_int)["value"]
+
+def write_length_prefixed(terms, stream, flush_interval=FLUSH_INTERVAL):
+    """
+    Write non-negative integer terms as length-prefixed binary records.
+
+    Each record is a little-endian uint32 byte count followed by the term as
+    an unsigned little-endian integer of that many bytes (0 is one zero byte).
+
+    :param terms: Iterable of non-negative integers
+    :param stream: Binary stream to write to
+    :param flush_interval: Longest time in seconds a written term may stay buffered
+    :return: Number of terms written
+    """
+    count = 0
+    last_flush = time.monotonic()
+    for count, term in enumerate(terms, start=1):
+        size = max((term.bit_length() + 7) // 8, 1)
+        stream.write(_LENGTH.pack(size) + term.to_bytes(size, "little"))
+        now = time.monotonic()
+        if now - last_flush >= flush_interval:
+            stream.flush()
+            last_flush = now
+    stream.flush()
+    return count
+
+def read_length_prefixed(stream):
+    """
+    Read back the terms written by write_length_prefixed.
+
+    :param stream: Binary stream to read from
+    :return: Generator of Python ints
+    """
+    while True:
+        header = stream.read(_LENGTH.size)
+        if not header:
+            return
+        if len(header) < _LENGTH.size:
+            raise EOFError("Truncated record header")
+        size, = _LENGTH.unpack(header)
+        payload = stream.read(size)
+        if len(payload) < size:
+            raise EOFError("Truncated record payload")
+        yield int.from_bytes(payload, "little")
+
+STREAM_FORMATS = {
+    "ndjson": write_ndjson,
+    "binary": write_length_prefixed,
+}
+
+def stream_terms(terms, path="-", stream_format="ndjson"):
+    """
+    Write terms to a file or stdout as they are produced.
+
+    :param terms: Iterable of integers
+    :param path: Destination file path, or "-" for stdout
+    :param stream_format: "ndjson" or "binary"
+    :return: Number of terms written, or None if stdout was closed by its reader
+    """
+    writer = STREAM_FORMATS[stream_format]
+    binary = stream_format == "binary"
+    if path == "-":
+        try:
+            return writer(terms, sys.stdout.buffer if binary else sys.stdout)
+        except BrokenPipeError:
+            # The consumer stopped reading (e.g. head); drop the rest of the output quietly
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return None
+    with open(path, "wb" if binary else "w") as stream:
+        return writer(terms, stream)
@@ -0,0 +1,164 @@
+"""
+This module contains unit tests for the aliquot_sequence module.
+"""
+
+import pytest
+from math_sim.algorithms.aliquot_sequence.aliquot_sequence import aliquot_sequence, trace_aliquot, iter_aliquot, sum_of_proper_divisors, AliquotOutcome
+from math_sim.algorithms.aliquot_sequence.aliquot_batch import divisor_sum_table, classify_aliquot_range
+from math_sim.algorithms.prime_factorization.prime_factorization import FactorizationState, prime_factors
+from math_sim.checkpoint import Checkpoint
+
+def test_sum_of_proper_divisors_matches_divisor_scan():
+    for n in range(2, 2000):
+        assert sum_of_proper_divisors(n) == sum(i for i in range(1, n) if n % i == 0)
+
+@pytest.mark.parametrize("n, expected", [
+    (0, 0),
+    (1, 0),
+    (28, 28),
+    (220, 284),
+    (2**31 - 1, 1),
+    (2**40 * 3**5, (2**41 - 1) * (3**6 - 1) // 2 - 2**40 * 3**5),
+])
+def test_sum_of_proper_divisors(n, expected):
+    assert sum_of_proper_divisors(n) == expected
+
+@pytest.mark.timeout(30)
+def test_aliquot_sequence_rejects_non_positive_starts():
+    for n in (0, -1):
+        with pytest.raises(ValueError):
+            aliquot_sequence(n)
+
+def test_aliquot_sequence_reaches_large_terms():
+    sequence, monitor = aliquot_sequence(276, max_steps=85)
+    assert len(sequence) == 86
+    assert max(sequence) > 10**15
+    assert len(monitor.step_times) == 85
+
+@pytest.mark.parametrize("start, outcome, period, cycle", [
+    (10, AliquotOutcome.TERMINATED, 0, []),
+    (1, AliquotOutcome.TERMINATED, 0, []),
+    (28, AliquotOutcome.PERFECT, 1, [28]),
+    (95, AliquotOutcome.PERFECT, 1, [6]),
+    (220, AliquotOutcome.AMICABLE, 2, [220, 284]),
+    (12496, AliquotOutcome.SOCIABLE, 5, [12496, 14288, 15472, 14536, 14264]),
+])
+def test_trace_aliquot_classifies_end(start, outcome, period, cycle):
+    result, _ = trace_aliquot(start)
+    assert result.outcome == outcome
+    assert result.period == period
+    assert result.cycle == cycle
+
+def test_trace_aliquot_limits():
+    result, _ = trace_aliquot(276, max_steps=5)
+    assert result.outcome == AliquotOutcome.STEP_LIMIT
+    assert result.sequence == [276, 396, 696, 1104, 1872, 3770]
+    result, _ = trace_aliquot(276, bound=1500)
+    assert result.outcome == AliquotOutcome.EXCEEDED_BOUND
+    assert result.sequence == [276, 396, 696, 1104]
+
+@pytest.mark.parametrize("start", [0, -1])
+def test_trace_aliquot_rejects_non_positive(start):
+    with pytest.raises(ValueError):
+        trace_aliquot(start)
+
+@pytest.mark.parametrize("start, max_steps, bound", [(1, 1000, None), (6, 1000, None), (12, 1000, None),
+                                                     (220, 1000, None), (1264460, 1000, None), (138, 1000, 200),
+                                                     (30, 3, None)])
+def test_iter_aliquot_matches_trace(start, max_steps, bound):
+    result, _ = trace_aliquot(start, max_steps, bound)
+    assert list(iter_aliquot(start, max_steps, bound)) == result.sequence
+
+def test_divisor_sum_table():
+    table = divisor_sum_table(5000)
+    assert table[0] == 0
+    assert [int(table[n]) for n in range(1, 5001)] == [sum_of_proper_divisors(n) for n in range(1, 5001)]
+
+@pytest.mark.timeout(30)
+@pytest.mark.parametrize("start, expected", [
+    (10, AliquotOutcome.TERMINATED),
+    (6, AliquotOutcome.PERFECT),
+    (95, AliquotOutcome.PERFECT),
+    (220, AliquotOutcome.AMICABLE),
+    (562, AliquotOutcome.AMICABLE),
+    (12496, AliquotOutcome.SOCIABLE),
+    (276, AliquotOutcome.EXCEEDED_BOUND),
+])
+def test_classify_aliquot_range_single(start, expected):
+    outcomes, _ = classify_aliquot_range(start, 1, bound=100000)
+    assert outcomes[0] == expected
+
+def test_classify_aliquot_range_rejects_bound_below_starts():
+    with pytest.raises(ValueError):
+        classify_aliquot_range(100, 50, bound=120)
+    outcomes, _ = classify_aliquot_range(100, 50, bound=149)
+    assert len(outcomes) == 50
+
+@pytest.mark.timeout(30)
+def test_classify_aliquot_range_matches_sequences():
+    outcomes, cycles = classify_aliquot_range(1, 300, bound=10**6)
+    assert cycles[220] == (220, 284)
+    for start in range(1, 300):
+        result, _ = trace_aliquot(start, bound=10**6)
+        assert outcomes[start - 1] == result.outcome
+
+def test_trace_aliquot_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / "aliquot.ckpt")
+    expected, _ = trace_aliquot(138)
+    partial, _ = trace_aliquot(138, max_steps=50, checkpoint=Checkpoint(path))
+    assert partial.outcome == AliquotOutcome.STEP_LIMIT
+    assert partial.sequence == expected.sequence[:51]
+    resumed, monitor = trace_aliquot(138, checkpoint=Checkpoint(path))
+    assert resumed == expected
+    assert len(monitor.step_times) == len(expected.sequence) - 1 - 50
+    # A finished sequence is read back without recomputing it
+    again, monitor = trace_aliquot(138, checkpoint=Checkpoint(path))
+    assert again == expected
+    assert monitor.step_count == 0 and not monitor.step_times
+
+def test_trace_aliquot_checkpoints_on_failure(tmp_path):
+    path = str(tmp_path / "aliquot.ckpt")
+
+    class FailingCheckpoint(Checkpoint):
+        calls = 0
+
+        def due(self):
+            self.calls += 1
+            if self.calls == 10:
+                raise RuntimeError("Memory usage exceeded 90%")
+            return False
+
+    with pytest.raises(RuntimeError):
+        trace_aliquot(138, checkpoint=FailingCheckpoint(path, interval=0))
+    meta, lists = Checkpoint(path).load()
+    assert meta["outcome"] == "STEP_LIMIT"
+    assert 1 < len(lists["sequence"]) < 20
+    resumed, _ = trace_aliquot(138, checkpoint=Checkpoint(path))
+    assert resumed == trace_aliquot(138)[0]
+
+def test_trace_aliquot_rejects_foreign_checkpoint(tmp_path):
+    path = str(tmp_path / "aliquot.ckpt")
+    trace_aliquot(220, checkpoint=Checkpoint(path))
+    with pytest.raises(ValueError):
+        trace_aliquot(138, checkpoint=Checkpoint(path))
+    # Without resume the old checkpoint is overwritten
+    result, _ = trace_aliquot(138, max_steps=3, checkpoint=Checkpoint(path, resume=False))
+    assert len(result.sequence) == 4
+
+def test_prime_factors_resumes_from_state():
+    n = 999999937 * 1000000009 * 1000000007 * 998244353
+    state = FactorizationState(n)
+    progress = []
+
+    def interrupt_after_two_splits(current):
+        progress.append(list(current.pending))
+        if len(progress) == 3:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        prime_factors(n, state=state, on_progress=interrupt_after_two_splits)
+    assert state.pending
+    assert prime_factors(n, state=state) == [998244353, 999999937, 1000000007, 1000000009]
+    assert state.pending == []
+    with pytest.raises(ValueError):
+        prime_factors(n + 2, state=state)
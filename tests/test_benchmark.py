@@ -0,0 +1,63 @@
+"""
+This module contains tests for the benchmark harness.
+"""
+
+import json
+import pytest
+from math_sim.benchmark import BENCHMARKS, compare, main, measure, run_case
+
+def suite(*cases):
+    return {"environment": {}, "results": [
+        {"benchmark": name, "size": size, "wall_time": wall_time, "peak_rss_bytes": rss}
+        for name, size, wall_time, rss in cases]}
+
+def test_every_benchmark_has_a_size_ladder():
+    for benchmark in BENCHMARKS.values():
+        assert list(benchmark.sizes) == sorted(benchmark.sizes)
+        assert len(benchmark.sizes) >= 2
+
+def test_measure():
+    case = measure(BENCHMARKS["sieve_of_eratosthenes"], 10**5, repeat=2)
+    assert case["benchmark"] == "sieve_of_eratosthenes"
+    assert len(case["wall_times"]) == 2
+    assert case["wall_time"] == min(case["wall_times"])
+    assert case["cpu_time"] > 0
+    assert case["peak_rss_bytes"] > 0
+    assert case["throughput"] == pytest.approx(10**5 / case["wall_time"])
+
+@pytest.mark.timeout(60)
+def test_run_case_in_subprocess():
+    case = run_case("factorize", 12, repeat=1)
+    assert "error" not in case
+    assert case["unit"] == "numbers"
+    assert case["throughput"] == pytest.approx(1 / case["wall_time"])
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = suite(("sieve", 10, 1.0, 100 * 2**20), ("sieve", 100, 2.0, 100 * 2**20))
+    current = suite(("sieve", 10, 1.2, 100 * 2**20), ("sieve", 100, 3.0, 200 * 2**20))
+    regressions = compare(current, baseline, threshold=0.25)
+    assert {(r["size"], r["metric"]) for r in regressions} == {(100, "wall_time"), (100, "peak_rss_bytes")}
+    assert regressions[0]["ratio"] == pytest.approx(1.5)
+
+def test_compare_ignores_noise_and_missing_cases():
+    baseline = suite(("sieve", 10, 0.001, 2**20))
+    current = suite(("sieve", 10, 0.002, 2 * 2**20), ("sieve", 100, 9.0, 2**30))
+    current["results"].append({"benchmark": "factorize", "size": 12, "error": "boom"})
+    assert compare(current, baseline) == []
+
+@pytest.mark.timeout(120)
+def test_main_against_baseline(tmp_path):
+    output = tmp_path / "bench.json"
+    assert main(["--only", "fibonacci_nth", "--quick", "--repeat", "1", "--output", str(output)]) == 0
+    recorded = json.loads(output.read_text())
+    assert recorded["environment"]["cpu_count"] >= 1
+    assert [case["size"] for case in recorded["results"]] == [10**5]
+
+    recorded["results"][0]["peak_rss_bytes"] = 1
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(recorded))
+    assert main(["--only", "fibonacci_nth", "--quick", "--repeat", "1", "--output", str(output),
+                 "--baseline", str(baseline)]) == 1
+
+if __name__ == "__main__":
+    pytest.main(["-v", "--tb=short"])
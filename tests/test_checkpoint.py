@@ -0,0 +1,57 @@
+"""
+This module contains tests for checkpoint files.
+"""
+
+import sys
+import pytest
+from math_sim import main as cli
+from math_sim.checkpoint import Checkpoint, CheckpointError
+
+def test_round_trip(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "state.ckpt"))
+    assert checkpoint.load() is None
+    checkpoint.save({"algorithm": "test", "step": 3}, {"terms": [0, 1, 2**200], "empty": []})
+    meta, lists = checkpoint.load()
+    assert meta == {"algorithm": "test", "step": 3}
+    assert lists == {"terms": [0, 1, 2**200], "empty": []}
+    assert checkpoint.saves == 1
+
+def test_save_replaces_previous_state(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "state.ckpt"))
+    checkpoint.save({"step": 1}, {"terms": [1, 2, 3]})
+    checkpoint.save({"step": 2})
+    assert checkpoint.load() == ({"step": 2}, {})
+    assert not (tmp_path / "state.ckpt.tmp").exists()
+
+def test_without_resume_the_old_state_is_ignored(tmp_path):
+    Checkpoint(str(tmp_path / "state.ckpt")).save({"step": 1})
+    assert Checkpoint(str(tmp_path / "state.ckpt"), resume=False).load() is None
+
+def test_due_is_bounded_by_time(tmp_path):
+    assert not Checkpoint(str(tmp_path / "a.ckpt"), interval=3600).due()
+    assert Checkpoint(str(tmp_path / "b.ckpt"), interval=0).due()
+
+def test_check(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "state.ckpt"))
+    checkpoint.check({"algorithm": "aliquot", "start": 276}, algorithm="aliquot", start=276)
+    with pytest.raises(CheckpointError, match="start=276"):
+        checkpoint.check({"algorithm": "aliquot", "start": 276}, algorithm="aliquot", start=138)
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "state.ckpt"
+    path.write_bytes(b"not a checkpoint")
+    with pytest.raises(CheckpointError):
+        Checkpoint(str(path)).load()
+
+def test_cli_rejects_checkpoint_of_another_start(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "c.ckpt")
+    monkeypatch.setattr(sys, "argv", ["math_sim", "--collatz", "27", "--no-plot", "--checkpoint", path])
+    cli.main()
+    monkeypatch.setattr(sys, "argv", ["math_sim", "--collatz", "28", "--no-plot", "--resume", "--checkpoint", path])
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main()
+    assert exit_info.value.code == 2
+    assert "expected 28" in capsys.readouterr().err
+
+if __name__ == "__main__":
+    pytest.main(["-v", "--tb=short"])
@@ -0,0 +1,143 @@
+"""
+This module contains unit tests for the collatz_conjecture modules.
+"""
+
+import sys
+import numpy as np
+import pytest
+from math_sim import main as cli
+from math_sim.algorithms.collatz_conjecture import collatz_batch
+from math_sim.algorithms.collatz_conjecture.collatz_conjecture import collatz_conjecture, collatz_summary, iter_collatz
+from math_sim.algorithms.collatz_conjecture.collatz_batch import collatz_stopping_times
+from math_sim.algorithms.collatz_conjecture.collatz_store import CollatzStore
+from math_sim.checkpoint import Checkpoint
+
+def reference(n):
+    steps, peak = 0, n
+    while n != 1:
+        n = 3 * n + 1 if n % 2 else n // 2
+        steps += 1
+        peak = max(peak, n)
+    return steps, peak
+
+def reference_parity(n):
+    odd = even = 0
+    while n != 1:
+        if n % 2:
+            n, odd = 3 * n + 1, odd + 1
+        else:
+            n, even = n // 2, even + 1
+    return odd, even
+
+def test_collatz_conjecture_sequence():
+    sequence, _ = collatz_conjecture(6)
+    assert sequence == [6, 3, 10, 5, 16, 8, 4, 2, 1]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 1 << 20])
+def test_collatz_stopping_times_matches_reference(chunk_size):
+    steps, peaks = collatz_stopping_times(5000, chunk_size=chunk_size)
+    assert steps.dtype == np.uint16
+    assert peaks.dtype == np.uint64
+    assert [(int(steps[n]), int(peaks[n])) for n in range(1, 5000)] == [reference(n) for n in range(1, 5000)]
+
+def test_collatz_stopping_times_known_records():
+    steps, peaks = collatz_stopping_times(10**6)
+    assert int(np.argmax(steps)) == 837799
+    assert steps[837799] == 524
+    assert peaks[704511] == 56991483520
+
+def test_collatz_stopping_times_python_fallback(monkeypatch):
+    # Pretend values above 1000 would overflow so the Python int path is exercised
+    monkeypatch.setattr(collatz_batch, "_UINT64_SAFE", 1000)
+    monkeypatch.setattr(collatz_batch, "PEAK_OVERFLOW", 5000)
+    overflow_peaks = {}
+    steps, peaks = collatz_stopping_times(3000, chunk_size=500, overflow_peaks=overflow_peaks)
+    assert [int(steps[n]) for n in range(1, 3000)] == [reference(n)[0] for n in range(1, 3000)]
+    assert overflow_peaks[27] == 9232
+    assert peaks[27] == 5000
+    assert all(overflow_peaks[n] == reference(n)[1] for n in overflow_peaks)
+
+@pytest.mark.parametrize("k", [1, 3, 8, 16])
+def test_collatz_summary_matches_reference(k):
+    starts = list(range(1, 2000)) + [10**30 + 7, 2**127 - 1, 3**90, 27 * 2**200]
+    for n in starts:
+        summary, _ = collatz_summary(n, k)
+        assert (summary.steps, summary.peak) == reference(n)
+        assert (summary.odd_steps, summary.even_steps) == reference_parity(n)
+
+@pytest.mark.timeout(30)
+def test_collatz_summary_hundred_digit_start():
+    summary, _ = collatz_summary(10**100 + 1)
+    assert (summary.steps, summary.peak) == reference(10**100 + 1)
+    assert summary.steps == summary.odd_steps + summary.even_steps
+
+def test_collatz_summary_rejects_non_positive():
+    with pytest.raises(ValueError):
+        collatz_summary(0)
+
+def test_collatz_store_grows_incrementally(tmp_path):
+    path = tmp_path / "collatz.bin"
+    store = CollatzStore(path, writable=True)
+    store.extend(1000, chunk_size=64)
+    store.extend(3000, chunk_size=64)
+    assert store.count == 3000
+    assert [(int(store.steps[n]), int(store.peaks[n])) for n in range(1, 3000)] == [reference(n) for n in range(1, 3000)]
+    assert [int(store.odd_steps[n]) for n in range(1, 3000)] == [reference_parity(n)[0] for n in range(1, 3000)]
+
+    reader = CollatzStore(path)
+    assert isinstance(reader.records, np.memmap)
+    assert reader.lookup(27) == (111, 41, 9232)
+    with pytest.raises(PermissionError):
+        reader.extend(4000)
+
+def test_collatz_apis_consult_store(tmp_path):
+    store = CollatzStore(tmp_path / "collatz.bin", writable=True)
+    steps, peaks = collatz_stopping_times(5000, store=store)
+    assert store.count == 5000
+    assert np.shares_memory(steps, store.records)
+    reader = CollatzStore(tmp_path / "collatz.bin")
+    for n in list(range(1, 200)) + [10**30 + 7, 2**127 - 1]:
+        summary, _ = collatz_summary(n, store=reader)
+        assert (summary.steps, summary.peak) == reference(n)
+        assert (summary.odd_steps, summary.even_steps) == reference_parity(n)
+
+def test_iter_collatz_is_lazy():
+    terms = iter_collatz(27)
+    assert [next(terms) for _ in range(4)] == [27, 82, 41, 124]
+    assert list(iter_collatz(27, max_steps=3)) == [27, 82, 41, 124]
+    assert list(iter_collatz(97)) == collatz_conjecture(97)[0]
+
+def test_collatz_conjecture_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / "collatz.ckpt")
+    expected, _ = collatz_conjecture(27)
+    partial, _ = collatz_conjecture(27, max_steps=40, checkpoint=Checkpoint(path))
+    assert partial == expected[:41]
+    assert collatz_conjecture(27, checkpoint=Checkpoint(path))[0] == expected
+    assert Checkpoint(path).load()[0]["done"]
+
+def test_collatz_summary_resumes_after_interruption(tmp_path):
+    path = str(tmp_path / "summary.ckpt")
+    n = 3**20000
+
+    class InterruptingCheckpoint(Checkpoint):
+        def due(self):
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        collatz_summary(n, checkpoint=InterruptingCheckpoint(path, interval=0))
+    meta, lists = Checkpoint(path).load()
+    assert not meta["done"]
+    start, current, peak, odd_steps, even_steps = lists["state"]
+    assert start == n and 1 < current and odd_steps + even_steps > 0
+    resumed, _ = collatz_summary(n, checkpoint=Checkpoint(path))
+    assert resumed == collatz_summary(n)[0]
+    assert Checkpoint(path).load()[0]["done"]
+
+def test_cli_rejects_missing_store(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "missing.store"
+    monkeypatch.setattr(sys, "argv", ["math_sim", "--collatz-summary", "27", "--collatz-store", str(path)])
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main()
+    assert exit_info.value.code == 2
+    assert "does not exist" in capsys.readouterr().err
+    assert not path.exists()
@@ -3,7 +3,10 @@ This module contains tests for concurrent execution of mathematical simulations.
 """
 
 import pytest
-from math_sim.concurrent_math_sim import run_concurrent_simulations, parallel_aliquot_sequence, parallel_prime_factorization
+from math_sim.concurrent_math_sim import run_concurrent_simulations, parallel_aliquot_sequence, parallel_prime_factorization, parallel_prime_count
+from math_sim.concurrent_math_sim import parallel_aliquot_trace, iter_parallel_aliquot_trace
+from math_sim.checkpoint import Checkpoint
+from math_sim.executor import get_executor
 
 @pytest.mark.timeout(30)
 def test_run_concurrent_simulations():
@@ -43,6 +46,24 @@ def test_parallel_prime_factorization():
     assert results[100] == [2, 2, 5, 5]
     assert results[123] == [3, 41]
 
+@pytest.mark.timeout(30)
+@pytest.mark.parametrize("lo, hi, expected", [
+    (0, 10**6, 78498),
+    (0, 3, 1),
+    (3, 3, 0),
+    (10**12, 10**12 + 10**6, 36249),
+])
+def test_parallel_prime_count(lo, hi, expected):
+    assert parallel_prime_count(lo, hi, workers=2, segment_size=1 << 12) == expected
+
+@pytest.mark.timeout(30)
+def test_parallel_prime_count_leaves_the_shared_executor_alone():
+    shared = get_executor()
+    generation = shared._generation
+    assert parallel_prime_count(0, 10**5, workers=shared.workers + 1) == 9592
+    assert get_executor() is shared
+    assert shared._generation == generation
+
 @pytest.mark.timeout(30)
 def test_concurrent_error_handling():
     # Test with invalid inputs to ensure error handling works
@@ -53,5 +74,18 @@ def test_concurrent_error_handling():
     assert 'factorize' not in results
     assert len(results) == 0
 
+@pytest.mark.timeout(30)
+def test_parallel_aliquot_trace_checkpoints(tmp_path):
+    directory = str(tmp_path / "checkpoints")
+    results = {task.key: task.value for task in
+               iter_parallel_aliquot_trace(10, 3, max_steps=2, checkpoints=(directory, 30.0, True))}
+    assert results[12].sequence == [12, 16, 15]
+    meta, lists = Checkpoint(f"{directory}/aliquot_12.ckpt").load()
+    assert meta["outcome"] == "STEP_LIMIT" and lists["sequence"] == [12, 16, 15]
+
+    resumed = {task.key: task.value for task in
+               iter_parallel_aliquot_trace(10, 3, checkpoints=(directory, 30.0, True))}
+    assert resumed == parallel_aliquot_trace(10, 3)
+
 if __name__ == "__main__":
     pytest.main(["-v", "--tb=short"])
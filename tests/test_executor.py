@@ -0,0 +1,171 @@
+"""
+This module contains tests for the shared executor.
+"""
+
+import os
+import signal
+import threading
+import time
+import pytest
+from math_sim.executor import SimulationExecutor, TaskResult, chunk_size_for, get_executor
+from math_sim.memory_budget import MemoryBudget
+
+def square(n):
+    return n * n
+
+def fail_on_odd(n):
+    if n % 2:
+        raise ValueError(f"{n} is odd")
+    return n
+
+def sleep_for(seconds):
+    time.sleep(seconds)
+    return seconds
+
+def sleep_ignoring_alarm(seconds):
+    # Stands in for a long C call that the in-worker alarm cannot interrupt
+    signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+    try:
+        time.sleep(seconds)
+    finally:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, [signal.SIGALRM])
+    return seconds
+
+def worker_pid(_):
+    return os.getpid()
+
+@pytest.fixture
+def executor():
+    executor = SimulationExecutor(workers=2)
+    yield executor
+    executor.shutdown()
+
+def test_chunk_size_for():
+    assert chunk_size_for(1, 4) == 1
+    assert chunk_size_for(100, 4) == 7
+    assert chunk_size_for(10**7, 4) == 1024
+
+@pytest.mark.timeout(30)
+def test_map_returns_every_result(executor):
+    results = list(executor.map(square, range(100)))
+    assert sorted(task.key for task in results) == list(range(100))
+    assert all(task.ok and task.value == task.key ** 2 for task in results)
+
+@pytest.mark.timeout(30)
+def test_errors_are_results(executor):
+    results = {task.key: task for task in executor.map(fail_on_odd, range(6))}
+    assert results[2] == TaskResult(2, 2)
+    assert results[3].error == "ValueError"
+    assert results[3].message == "3 is odd"
+    assert not results[3].ok
+
+@pytest.mark.timeout(30)
+def test_pool_is_reused(executor):
+    first = {task.value for task in executor.map(worker_pid, range(8))}
+    second = {task.value for task in executor.map(worker_pid, range(8))}
+    assert first | second <= first
+    assert os.getpid() not in first
+
+@pytest.mark.timeout(30)
+def test_task_timeout(executor):
+    results = {task.key: task for task in executor.map(sleep_for, [0, 5, 0], timeout=0.5, chunk_size=3)}
+    assert results[0].ok and results[0].value == 0
+    assert results[5].error == "TimeoutError"
+
+@pytest.mark.timeout(30)
+def test_overrunning_worker_is_killed(executor):
+    start = time.monotonic()
+    results = {task.key: task for task in executor.map(sleep_ignoring_alarm, [0.1, 20], timeout=0.2, chunk_size=1)}
+    assert time.monotonic() - start < 10
+    assert results[0.1].ok
+    assert results[20].error == "TimeoutError"
+    # The pool is replaced and keeps working
+    assert [task.value for task in executor.map(square, [3])] == [9]
+
+@pytest.mark.timeout(30)
+def test_cancel(executor):
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    start = time.monotonic()
+    results = list(executor.map(sleep_for, [20, 20, 20], chunk_size=1, cancel=cancel))
+    assert time.monotonic() - start < 10
+    assert len(results) == 3
+    assert all(task.error == "CancelledError" for task in results)
+
+@pytest.mark.timeout(30)
+def test_closing_the_stream_cancels(executor):
+    results = executor.map(sleep_for, [0, 20, 20], chunk_size=1)
+    start = time.monotonic()
+    next(results)
+    results.close()
+    assert time.monotonic() - start < 10
+    assert [task.value for task in executor.map(square, [4])] == [16]
+
+@pytest.mark.timeout(30)
+def test_thread_executor():
+    executor = SimulationExecutor(cpu_bound=False)
+    try:
+        results = list(executor.map(worker_pid, range(4)))
+        assert {task.value for task in results} == {os.getpid()}
+    finally:
+        executor.shutdown()
+
+@pytest.mark.timeout(30)
+def test_concurrent_runs_share_the_workers():
+    # Four callers on one worker: the later chunks queue behind the earlier ones,
+    # and that wait must not count against their timeout
+    executor = SimulationExecutor(workers=1)
+    results = {}
+
+    def call(i):
+        results[i] = list(executor.run([(i, sleep_for, (0.8,))], timeout=1.0))
+
+    try:
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        executor.shutdown()
+    assert {i: [task.value for task in tasks] for i, tasks in results.items()} == {i: [0.8] for i in range(4)}
+    assert executor._in_flight == 0
+
+@pytest.mark.timeout(30)
+def test_memory_budget_limits_running_tasks():
+    executor = SimulationExecutor(4, cpu_bound=False)
+    budget = MemoryBudget(100)
+    running = peak = 0
+    lock = threading.Lock()
+
+    def task(seconds):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(seconds)
+        with lock:
+            running -= 1
+        return seconds
+
+    try:
+        calls = [(i, task, (0.05,)) for i in range(4)] + [("huge", task, (0,))]
+        results = {result.key: result for result in executor.run(
+            calls, chunk_size=1, memory_cost=lambda call: 1000 if call[0] == "huge" else 60, budget=budget)}
+    finally:
+        executor.shutdown()
+    assert all(results[i].value == 0.05 for i in range(4))
+    assert results["huge"].error == "MemoryBudgetExceeded"
+    # Two tasks of 60 bytes do not fit a budget of 100 at once
+    assert peak == 1
+    assert budget.reserved == 0
+
+def test_shared_executor():
+    assert get_executor() is get_executor()
+    assert get_executor(cpu_bound=False) is not get_executor()
+    # Asking for another worker count does not replace the pool other callers may be using
+    shared = get_executor()
+    assert get_executor(workers=shared.workers + 1) is shared
+
+if __name__ == "__main__":
+    pytest.main(["-v", "--tb=short"])
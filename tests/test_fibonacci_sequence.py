@@ -0,0 +1,73 @@
+"""
+This module contains unit tests for the fibonacci_sequence module.
+"""
+
+import numpy as np
+import pytest
+from math_sim.algorithms.fibonacci_sequence.fibonacci_sequence import (
+    fibonacci_sequence, fibonacci_pair, fibonacci_window, fibonacci_nth, fibonacci_mod,
+    fibonacci_log10, fibonacci_digits, pisano_period, iter_fibonacci)
+
+REFERENCE = [0, 1]
+for _ in range(2000):
+    REFERENCE.append(REFERENCE[-1] + REFERENCE[-2])
+
+def brute_force_pisano(m):
+    a, b, period = 0, 1, 0
+    while True:
+        a, b, period = b, (a + b) % m, period + 1
+        if (a, b) == (0, 1 % m):
+            return period
+
+def test_fibonacci_sequence():
+    sequence, _ = fibonacci_sequence(20)
+    assert sequence == REFERENCE[:20]
+
+def test_fibonacci_pair_matches_reference():
+    assert all(fibonacci_pair(n) == (REFERENCE[n], REFERENCE[n + 1]) for n in range(1500))
+    assert fibonacci_pair(1000, 97) == (REFERENCE[1000] % 97, REFERENCE[1001] % 97)
+
+def test_fibonacci_nth():
+    value, _ = fibonacci_nth(1999)
+    assert value == REFERENCE[1999]
+    with pytest.raises(ValueError):
+        fibonacci_nth(-1)
+
+@pytest.mark.parametrize("modulus", [None, 1, 10, 97, 2**32, 2**32 + 15, 10**20])
+def test_fibonacci_window_matches_reference(modulus):
+    terms, _ = fibonacci_window(37, 1500, modulus)
+    reduce = (lambda x: x) if modulus is None else (lambda x: x % modulus)
+    assert terms == [reduce(x) for x in REFERENCE[37:1500]]
+
+def test_fibonacci_window_as_array():
+    terms, _ = fibonacci_window(10**18, 10**18 + 1000, 10**9 + 7, as_array=True)
+    assert terms.dtype == np.uint64
+    first, second = fibonacci_pair(10**18, 10**9 + 7)
+    assert terms[:2].tolist() == [first, second]
+    assert np.all(terms[2:] == (terms[1:-1] + terms[:-2]) % (10**9 + 7))
+    with pytest.raises(ValueError):
+        fibonacci_window(0, 10, as_array=True)
+
+def test_pisano_period_matches_brute_force():
+    assert [pisano_period(m) for m in range(1, 400)] == [1] + [brute_force_pisano(m) for m in range(2, 400)]
+
+def test_fibonacci_mod_huge_index():
+    assert fibonacci_mod(10**100, 10)[0] == fibonacci_pair(10**100 % 60, 10)[0]
+    assert all(fibonacci_mod(n, 1000)[0] == REFERENCE[n] % 1000 for n in range(0, 2000, 37))
+
+def test_fibonacci_log10():
+    magnitudes = fibonacci_log10(2000)
+    assert magnitudes[0] == -np.inf
+    for k in (1, 10, 1476, 1477, 1999):
+        assert magnitudes[k] == pytest.approx(np.log10(float(REFERENCE[k] >> 1000)) + 1000 * np.log10(2)
+                                              if k > 1400 else np.log10(REFERENCE[k]))
+
+def test_fibonacci_digits():
+    for n in (0, 1, 7, 1476, 1477, 1999):
+        assert fibonacci_digits(n) == len(str(REFERENCE[n]))
+    assert fibonacci_digits(21000) == 4389
+
+def test_iter_fibonacci():
+    terms = iter_fibonacci()
+    assert [next(terms) for _ in range(1000)] == REFERENCE[:1000]
+    assert list(iter_fibonacci(500, 510, 97)) == [x % 97 for x in REFERENCE[500:510]]
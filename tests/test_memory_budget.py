@@ -0,0 +1,82 @@
+"""
+This module contains tests for memory estimates and the memory budget.
+"""
+
+import pytest
+from math_sim import memory_budget
+from math_sim.memory_budget import MemoryBudget, MemoryBudgetExceeded, estimate_memory, parse_size
+from math_sim.algorithms.collatz_conjecture.collatz_conjecture import collatz_conjecture
+from math_sim.algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_nth, fibonacci_window
+from math_sim.algorithms.prime_factorization.spf_table import smallest_prime_factor_table
+from math_sim.algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import sieve_of_eratosthenes
+
+def test_parse_size():
+    assert parse_size("1000") == 1000
+    assert parse_size("512M") == 512 << 20
+    assert parse_size("1.5GiB") == 3 << 29
+    assert parse_size("4g") == 4 << 30
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+def test_estimates_grow_with_the_input():
+    for algorithm in ("sieve", "spf_table", "prime_count", "divisor_sum_table"):
+        assert 0 < estimate_memory(algorithm, 10**6) < estimate_memory(algorithm, 10**8)
+    assert estimate_memory("fibonacci", 0, 1000, 7) < estimate_memory("fibonacci", 0, 1000)
+    # The odd-only mask alone takes n / 2 bytes
+    assert estimate_memory("sieve", 10**9) > 5 * 10**8
+
+def test_admit_rejects_jobs_larger_than_the_budget():
+    budget = MemoryBudget(1 << 20)
+    budget.admit(1 << 19)
+    with pytest.raises(MemoryBudgetExceeded, match="sieve"):
+        budget.admit(1 << 21, "sieve(10**7)")
+
+@pytest.fixture
+def small_budget():
+    default = memory_budget.budget.limit
+    memory_budget.set_limit(1 << 20)
+    yield memory_budget.budget
+    memory_budget.set_limit(None)
+    assert memory_budget.budget.limit == default
+
+def test_algorithms_fail_before_allocating(small_budget):
+    for run in (lambda: sieve_of_eratosthenes(10**7), lambda: smallest_prime_factor_table(10**7),
+                lambda: fibonacci_window(0, 10**5)):
+        with pytest.raises(MemoryBudgetExceeded):
+            run()
+    primes, _ = sieve_of_eratosthenes(100)
+    assert len(primes) == 25
+
+def test_collatz_sequences_are_admitted(small_budget):
+    with pytest.raises(MemoryBudgetExceeded):
+        collatz_conjecture(2**1000 + 1, max_steps=10**6)
+    # A generous max_steps alone does not make a short trajectory long
+    sequence, _ = collatz_conjecture(27, max_steps=10**12)
+    assert len(sequence) == 112
+
+def test_huge_parameters_are_described_by_size(small_budget):
+    n = 3**20000
+    assert memory_budget.admit("collatz", n, 10) > 0
+    with pytest.raises(MemoryBudgetExceeded, match="31700-bit int"):
+        memory_budget.admit("aliquot", n, 10**6)
+
+def test_default_budget_rejects_impossible_jobs():
+    for run in (lambda: sieve_of_eratosthenes(10**15), lambda: fibonacci_nth(10**15)):
+        with pytest.raises(MemoryBudgetExceeded):
+            run()
+    assert fibonacci_nth(100)[0] == 354224848179261915075
+    # The jump table dominates a Collatz summary until the start has millions of digits
+    assert estimate_memory("collatz_summary", 2**1000, 16) < estimate_memory("collatz_summary", 2**10**7, 16)
+
+def test_reservations():
+    budget = MemoryBudget(100)
+    assert budget.try_reserve(60)
+    assert not budget.try_reserve(60)
+    assert budget.try_reserve(60, force=True)
+    assert budget.reserved == 120
+    budget.release(60)
+    budget.release(60)
+    assert budget.try_reserve(40)
+
+if __name__ == "__main__":
+    pytest.main(["-v", "--tb=short"])
@@ -0,0 +1,104 @@
+"""
+This module contains tests for the metrics registry and the algorithm instrumentation.
+"""
+
+import json
+import pytest
+from math_sim import metrics
+from math_sim.algorithms.collatz_conjecture.collatz_conjecture import iter_collatz
+from math_sim.algorithms.prime_factorization.prime_factorization import prime_factors
+from math_sim.algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import odd_prime_mask
+from math_sim.concurrent_math_sim import parallel_aliquot_trace
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.enable()
+    metrics.registry.reset()
+    yield
+    metrics.enable()
+    metrics.registry.reset()
+
+def test_counters_timers_and_histograms():
+    metrics.count("a")
+    metrics.count("a", 4)
+    with metrics.phase("work"):
+        pass
+    metrics.record_time("work", 2.0)
+    metrics.observe("sizes", 3, buckets=(1, 10))
+    metrics.observe("sizes", 50, buckets=(1, 10))
+    values = metrics.registry.snapshot()
+    assert values["counters"] == {"a": 5}
+    assert values["timers"]["work"]["count"] == 2
+    assert values["timers"]["work"]["max_seconds"] == 2.0
+    assert values["histograms"]["sizes"] == {"buckets": [1, 10], "counts": [0, 1, 1], "sum": 53, "count": 2}
+
+def test_disabled_metrics_record_nothing():
+    metrics.disable()
+    metrics.count("a")
+    metrics.observe("b", 1)
+    with metrics.phase("c"):
+        pass
+    odd_prime_mask(1000)
+    assert metrics.registry.snapshot() == {"counters": {}, "timers": {}, "histograms": {}}
+
+def test_merge_and_drain():
+    metrics.count("a", 2)
+    metrics.observe("h", 1, buckets=(1,))
+    drained = metrics.registry.drain()
+    assert metrics.registry.snapshot()["counters"] == {}
+    metrics.registry.merge(drained)
+    metrics.registry.merge(drained)
+    values = metrics.registry.snapshot()
+    assert values["counters"] == {"a": 4}
+    assert values["histograms"]["h"]["counts"] == [2, 0]
+
+def test_sieve_crossings():
+    odd_prime_mask(100)
+    # Odd multiples of 3 from 9 and of 5 from 25 up to 99, and 49, 63, 77, 91
+    assert metrics.registry.counters["sieve.crossings"] == 16 + 8 + 4
+    assert metrics.registry.counters["sieve.base_primes"] == 3
+
+def test_factorization_counters():
+    assert prime_factors(1000000007 * 998244353) == [998244353, 1000000007]
+    counters = metrics.registry.counters
+    assert counters["factorize.numbers"] == 1
+    assert counters["factorize.trial_divisions"] > 6000
+    assert metrics.registry.histograms["factorize.pollard_rho_iterations"]["count"] >= 1
+
+def test_collatz_steps_counted_when_stopped_early():
+    terms = iter_collatz(27)
+    for _ in range(10):
+        next(terms)
+    terms.close()
+    assert metrics.registry.counters["collatz.steps"] == 9
+    assert len(list(iter_collatz(27))) == 112
+    assert metrics.registry.counters["collatz.steps"] == 9 + 111
+
+@pytest.mark.timeout(30)
+def test_worker_metrics_are_merged():
+    results = parallel_aliquot_trace(10, 5)
+    counters = metrics.registry.counters
+    assert counters["aliquot.sequences"] == 5
+    assert counters["aliquot.steps"] == sum(len(result.sequence) - 1 for result in results.values())
+    assert counters["executor.tasks"] == 5
+
+def test_prometheus_format():
+    metrics.count("sieve.crossings", 7)
+    metrics.record_time("sieve.mark", 0.5)
+    metrics.observe("lengths", 3, buckets=(1, 10))
+    text = metrics.to_prometheus(metrics.registry.snapshot())
+    assert "# TYPE math_sim_sieve_crossings_total counter\nmath_sim_sieve_crossings_total 7\n" in text
+    assert 'math_sim_phase_seconds_sum{phase="sieve.mark"} 0.5' in text
+    assert 'math_sim_lengths_bucket{le="1.0"} 0' in text
+    assert 'math_sim_lengths_bucket{le="10.0"} 1' in text
+    assert 'math_sim_lengths_bucket{le="+Inf"} 1' in text
+    assert "math_sim_lengths_count 1" in text
+
+def test_write_metrics_json(tmp_path):
+    metrics.count("a", 3)
+    path = tmp_path / "metrics.json"
+    metrics.write_metrics(str(path))
+    assert json.loads(path.read_text())["counters"] == {"a": 3}
+
+if __name__ == "__main__":
+    pytest.main(["-v", "--tb=short"])
@@ -0,0 +1,86 @@
+"""
+This module contains unit tests for the prime_factorization module.
+"""
+
+from math import prod
+import pytest
+import numpy as np
+from math_sim.algorithms.prime_factorization.prime_factorization import (
+    factorize, prime_factors, is_probable_prime, pollard_rho_brent)
+from math_sim.algorithms.prime_factorization.spf_table import (
+    smallest_prime_factor_table, spf_factor_arrays, factorize_batch, save_spf_table, load_spf_table, cached_spf_table)
+
+def test_prime_factors_small_numbers():
+    for n in range(1, 5000):
+        factors = prime_factors(n)
+        assert prod(factors) == n
+        assert factors == sorted(factors)
+        assert all(is_probable_prime(p) for p in factors)
+
+def test_is_probable_prime_matches_trial_division():
+    expected = [n for n in range(2, 3000) if all(n % d for d in range(2, int(n**0.5) + 1))]
+    assert [n for n in range(3000) if is_probable_prime(n)] == expected
+
+@pytest.mark.parametrize("n, expected", [
+    (2**61 - 1, True),
+    (2**89 - 1, True),
+    (3215031751, False),  # strong pseudoprime to bases 2, 3, 5 and 7
+    (3317044064679887385961981, False),  # strong pseudoprime to the first twelve prime bases
+    (2**64 + 1, False),
+])
+def test_is_probable_prime_large(n, expected):
+    assert is_probable_prime(n) == expected
+
+@pytest.mark.timeout(30)
+@pytest.mark.parametrize("n, expected", [
+    (2**64 + 1, [274177, 67280421310721]),
+    (10000000019 * 10000000033, [10000000019, 10000000033]),
+    (1000000000039 * 1000000000061, [1000000000039, 1000000000061]),
+    (12 * (2**31 - 1) * (2**61 - 1), [2, 2, 3, 2**31 - 1, 2**61 - 1]),
+    (65521**2 * 65537, [65521, 65521, 65537]),
+])
+def test_prime_factors_large(n, expected):
+    assert prime_factors(n) == expected
+
+def test_pollard_rho_brent_finds_factor():
+    n = 1000003 * 1000033
+    d = pollard_rho_brent(n)
+    assert d in (1000003, 1000033)
+
+def test_factorize_returns_monitor():
+    factors, monitor = factorize(84)
+    assert factors == [2, 2, 3, 7]
+    assert monitor.memory_usage
+
+@pytest.mark.parametrize("n", [0, -12])
+def test_prime_factors_rejects_non_positive(n):
+    with pytest.raises(ValueError):
+        prime_factors(n)
+
+def test_smallest_prime_factor_table():
+    table = smallest_prime_factor_table(10000)
+    assert table.dtype == np.uint32
+    assert table[0] == 0 and table[1] == 1
+    assert all(table[n] == prime_factors(n)[0] for n in range(2, 10001))
+
+def test_spf_factor_arrays_groups_by_owner():
+    table = smallest_prime_factor_table(1000)
+    owner, factor = spf_factor_arrays([12, 1, 997, 1000], table)
+    assert owner.tolist() == [0, 0, 0, 2, 3, 3, 3, 3, 3, 3]
+    assert factor.tolist() == [2, 2, 3, 997, 2, 2, 2, 5, 5, 5]
+
+def test_factorize_batch_falls_back_beyond_table():
+    table = smallest_prime_factor_table(1000)
+    results = factorize_batch([84, 84, 1, 999, 1001, 2**64 + 1], table)
+    assert results == {
+        1: [], 84: [2, 2, 3, 7], 999: [3, 3, 3, 37], 1001: [7, 11, 13], 2**64 + 1: [274177, 67280421310721]}
+
+def test_spf_table_round_trip_memory_mapped(tmp_path):
+    path = tmp_path / "spf.npy"
+    table = smallest_prime_factor_table(5000)
+    save_spf_table(table, path)
+    mapped = load_spf_table(path)
+    assert isinstance(mapped, np.memmap)
+    assert np.array_equal(mapped, table)
+    assert cached_spf_table(path, 4000).size == 5001
+    assert cached_spf_table(path, 6000).size == 6001
@@ -2,8 +2,13 @@
 This module contains unit tests for the resource_monitor module.
 """
 
+import pickle
+import time
 import pytest
-from math_sim.resource_monitor import ResourceMonitor, aliquot_sequence, sieve_of_eratosthenes, factorize
+from math_sim.resource_monitor import ResourceMonitor, factorize
+from math_sim.algorithms.aliquot_sequence.aliquot_sequence import aliquot_sequence
+from math_sim.algorithms.collatz_conjecture.collatz_conjecture import collatz_conjecture
+from math_sim.algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import sieve_of_eratosthenes
 
 @pytest.fixture(scope="module")
 def resource_monitor():
@@ -60,6 +65,60 @@ def test_resource_limits():
         monitor = ResourceMonitor(max_cpu_percent=0)
         monitor.check_resources()
 
+@pytest.mark.timeout(5)
+def test_sampling_monitor_records_in_background():
+    with ResourceMonitor(sample_interval=0.01, buffer_size=8) as monitor:
+        for _ in range(1000):
+            monitor.check_resources()
+        time.sleep(0.2)
+    assert monitor.steps == 1000
+    assert len(monitor.memory_usage) == 8
+    assert len(monitor.cpu_usage) == 8
+    assert len(monitor.time_points) == 8
+    assert list(monitor.time_points) == sorted(monitor.time_points)
+
+@pytest.mark.timeout(5)
+def test_sampling_monitor_raises_on_next_check():
+    monitor = ResourceMonitor(max_memory_percent=0, sample_interval=0.01)
+    with monitor:
+        with pytest.raises(MemoryError):
+            monitor.check_resources()
+    assert monitor._thread is None
+
+@pytest.mark.timeout(5)
+def test_sampling_monitor_counts_cpu_overloads():
+    # A busy machine slows a sampled job down but does not fail it
+    with ResourceMonitor(max_cpu_percent=-100, sample_interval=0.01) as monitor:
+        for _ in range(20):
+            monitor.check_resources()
+            time.sleep(0.01)
+    assert monitor.cpu_overloads > 0
+
+def test_step_times_are_bounded():
+    monitor = ResourceMonitor(buffer_size=8)
+    for step in range(1, 101):
+        monitor.record_step(step / 1000)
+    assert list(monitor.step_times) == [step / 1000 for step in range(93, 101)]
+    assert monitor.step_count == 100
+    assert monitor.step_total == pytest.approx(5.05)
+    assert monitor.step_max == 0.1
+
+def test_sampling_monitor_pickles():
+    with ResourceMonitor(sample_interval=0.01) as monitor:
+        monitor.check_resources()
+    clone = pickle.loads(pickle.dumps(monitor))
+    assert list(clone.memory_usage) == list(monitor.memory_usage)
+    assert clone.steps == 1
+
+@pytest.mark.timeout(5)
+def test_collatz_does_not_block_per_step():
+    start = time.perf_counter()
+    sequence, monitor = collatz_conjecture(27)
+    assert time.perf_counter() - start < 1.0
+    assert len(sequence) == 112
+    assert monitor.steps == len(sequence)
+    assert monitor.memory_usage
+
 @pytest.mark.timeout(30)
 def test_aliquot_sequence_long():
     result, _ = aliquot_sequence(276, max_steps=50)
@@ -0,0 +1,64 @@
+"""
+This module contains unit tests for the result_cache module and the plot functions that use precomputed results.
+"""
+
+import numpy as np
+import pytest
+from math_sim.result_cache import ResultCache, estimate_size
+from math_sim.algorithms.aliquot_sequence import aliquot_sequence_viz
+from math_sim.algorithms.collatz_conjecture import collatz_conjecture_viz
+from math_sim.algorithms.collatz_conjecture.collatz_conjecture import collatz_conjecture
+from math_sim.algorithms.aliquot_sequence.aliquot_sequence import trace_aliquot
+from math_sim.algorithms.sieve_of_eratosthenes import sieve_viz
+from math_sim.algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import odd_prime_mask
+
+def test_result_cache_computes_once():
+    cache = ResultCache()
+    calls = []
+    compute = lambda: calls.append(1) or [1, 2, 3]
+    assert cache.get_or_compute(("collatz", 5), compute) == [1, 2, 3]
+    assert cache.get_or_compute(("collatz", 5), compute) == [1, 2, 3]
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=2500)
+    for n in range(3):
+        cache.get_or_compute(("array", n), lambda: np.zeros(1000, dtype=np.uint8))
+    assert ("array", 0) not in cache and ("array", 2) in cache
+    cache.get_or_compute(("array", 1), lambda: pytest.fail("should be cached"))
+    cache.get_or_compute(("array", 3), lambda: np.zeros(1000, dtype=np.uint8))
+    assert ("array", 1) in cache and ("array", 2) not in cache
+    assert cache.current_bytes <= cache.max_bytes
+
+def test_result_cache_skips_results_over_budget():
+    cache = ResultCache(max_bytes=100)
+    cache.get_or_compute(("array", 0), lambda: np.zeros(1000))
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+def test_estimate_size():
+    assert estimate_size(np.zeros(1000)) == 8000
+    assert estimate_size([np.zeros(10), np.zeros(10)]) > 160
+
+def fail(*args, **kwargs):
+    raise AssertionError("plot recomputed its input")
+
+def test_plots_use_precomputed_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result, monitor = trace_aliquot(220)
+    monkeypatch.setattr(aliquot_sequence_viz, "aliquot_sequence", fail)
+    aliquot_sequence_viz.plot_aliquot_sequence(220, sequence=result.sequence, monitor=monitor)
+    sequence, monitor = collatz_conjecture(27)
+    monkeypatch.setattr(collatz_conjecture_viz, "collatz_conjecture", fail)
+    collatz_conjecture_viz.plot_collatz_sequence(27, sequence=sequence, monitor=monitor)
+    mask = odd_prime_mask(1000)
+    monkeypatch.setattr(sieve_viz, "odd_prime_mask", fail)
+    monkeypatch.setattr(sieve_viz, "iter_prime_segments", fail)
+    sieve_viz.plot_prime_spiral(1000, mask=mask)
+    sieve_viz.plot_prime_distribution(1000, mask=mask)
+    assert len(list(tmp_path.glob("*.png"))) == 7
+
+def test_prime_distribution_from_mask_matches_segments():
+    edges, counts = sieve_viz.prime_distribution(10**5, bins=13)
+    mask_edges, mask_counts = sieve_viz.prime_distribution(10**5, bins=13, mask=odd_prime_mask(10**5))
+    assert edges.tolist() == mask_edges.tolist() and counts.tolist() == mask_counts.tolist()
@@ -0,0 +1,154 @@
+"""
+This module contains tests for the JSON service and its client.
+"""
+
+import asyncio
+import json
+import pytest
+from math_sim import metrics
+from math_sim.serve import MathService, parse_request, serve
+from math_sim.serve_client import ServeClient, ServeError, load_test
+
+@pytest.fixture(scope="module")
+def service():
+    service = MathService(workers=1, timeout=10, spf_limit=1 << 16, collatz_limit=1 << 12)
+    service.warm_up()
+    yield service
+    service.close()
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.enable()
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+def run_with_server(service, tmp_path, scenario):
+    # Run scenario(client, path) against a server listening on a Unix socket
+    path = str(tmp_path / "serve.sock")
+
+    async def main():
+        service.cache.clear()
+        server = await serve(service, unix_path=path)
+        async with server:
+            async with await ServeClient.connect(unix_path=path) as client:
+                return await scenario(client, path)
+    return asyncio.run(main())
+
+def test_parse_request():
+    assert parse_request({"op": "aliquot", "n": 12}) == ("aliquot", (12, 1000))
+    assert parse_request({"op": "fibonacci", "n": 10, "modulus": 7}) == ("fibonacci", (10, 7))
+    for request in ({"op": "factorize", "n": 0}, {"op": "factorize"}, {"op": "factorize", "n": "84"},
+                    {"op": "factorize", "n": True}, {"op": "prime_count", "lo": 5, "hi": 2}, {"op": "sieve"}):
+        with pytest.raises(ValueError):
+            parse_request(request)
+    with pytest.raises(TypeError):
+        parse_request([1, 2])
+
+@pytest.mark.timeout(60)
+def test_operations(service, tmp_path):
+    async def scenario(client, path):
+        return await asyncio.gather(
+            client.request("factorize", n=84),
+            client.request("factorize", n=1000000007 * 998244353),
+            client.request("collatz", n=27),
+            client.request("collatz", n=2**100 + 1),
+            client.request("aliquot", n=12),
+            client.request("prime_count", lo=0, hi=10**6),
+            client.request("fibonacci", n=100),
+            client.request("fibonacci", n=10**18, modulus=10**9 + 7),
+        )
+
+    results = run_with_server(service, tmp_path, scenario)
+    assert results[0] == [2, 2, 3, 7]
+    assert results[1] == [998244353, 1000000007]
+    assert results[2] == {"steps": 111, "odd_steps": 41, "peak": 9232}
+    assert results[3]["steps"] > 100
+    assert results[4] == {"sequence": [12, 16, 15, 9, 4, 3, 1, 0], "outcome": "TERMINATED", "period": 0}
+    assert results[5] == 78498
+    assert results[6] == 354224848179261915075
+    assert results[7] == 209783453
+
+@pytest.mark.timeout(60)
+def test_identical_requests_are_computed_once(service, tmp_path):
+    async def scenario(client, path):
+        return await asyncio.gather(*(client.request("aliquot", n=138, max_steps=100) for _ in range(20)))
+
+    results = run_with_server(service, tmp_path, scenario)
+    assert all(result == results[0] for result in results)
+    counters = metrics.registry.counters
+    assert counters["serve.computations.aliquot"] == 1
+    assert counters.get("serve.coalesced", 0) + counters.get("serve.cache_hits", 0) == 19
+
+@pytest.mark.timeout(60)
+def test_small_requests_are_micro_batched(service, tmp_path):
+    numbers = list(range(2, 402))
+
+    async def scenario(client, path):
+        return await asyncio.gather(*(client.request(op, n=n) for n in numbers for op in ("factorize", "collatz")))
+
+    results = run_with_server(service, tmp_path, scenario)
+    assert results[2 * (84 - 2)] == [2, 2, 3, 7]
+    assert results[2 * (27 - 2) + 1]["peak"] == 9232
+    counters = metrics.registry.counters
+    assert counters["serve.computations.factorize"] == len(numbers)
+    assert counters["serve.factorize.batches"] < len(numbers) // 10
+    assert counters["serve.collatz.batches"] < len(numbers) // 10
+    # Everything was answered from the tables
+    assert "executor.tasks" not in counters
+
+@pytest.mark.timeout(60)
+def test_errors_keep_the_connection_usable(service, tmp_path):
+    async def scenario(client, path):
+        with pytest.raises(ServeError) as failure:
+            await client.request("factorize", n=-4)
+        assert failure.value.error == "ValueError"
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b"not json\n[1]\n")
+        responses = [json.loads(await reader.readline()) for _ in range(2)]
+        writer.close()
+        return failure.value, responses, await client.request("factorize", n=12)
+
+    error, responses, result = run_with_server(service, tmp_path, scenario)
+    assert {response["error"] for response in responses} == {"ValueError", "TypeError"}
+    assert result == [2, 2, 3]
+
+@pytest.mark.timeout(60)
+def test_requests_over_the_memory_budget_are_rejected(service, tmp_path):
+    async def scenario(client, path):
+        with pytest.raises(ServeError) as failure:
+            await client.request("fibonacci", n=10**15)
+        return failure.value, await client.request("fibonacci", n=10**15, modulus=10**9 + 7)
+
+    error, residue = run_with_server(service, tmp_path, scenario)
+    assert error.error == "MemoryBudgetExceeded"
+    assert isinstance(residue, int)
+    assert "serve.computations.fibonacci" in metrics.registry.counters
+
+@pytest.mark.timeout(60)
+def test_stats(service, tmp_path):
+    async def scenario(client, path):
+        await client.request("factorize", n=84)
+        await client.request("factorize", n=84)
+        return await client.request("stats")
+
+    stats = run_with_server(service, tmp_path, scenario)
+    assert stats["metrics"]["counters"]["serve.cache_hits"] == 1
+    assert stats["cache"]["entries"] == 1
+    assert stats["inflight"] == 0
+
+@pytest.mark.timeout(60)
+def test_load_test(service, tmp_path):
+    async def scenario(client, path):
+        return await load_test("collatz", 500, distinct=50, connections=2, concurrency=8, unix_path=path)
+
+    report = run_with_server(service, tmp_path, scenario)
+    assert report["requests"] == 500
+    assert report["errors"] == 0
+    assert report["latency"]["p50"] <= report["latency"]["p99"] <= report["latency"]["max"]
+    # The load test's own closing stats request is counted too
+    assert report["service"]["serve.requests"] == 501
+    assert report["service"]["serve.computations.collatz"] == 50
+
+if __name__ == "__main__":
+    pytest.main(["-v", "--tb=short"])
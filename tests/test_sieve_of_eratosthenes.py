@@ -0,0 +1,116 @@
+"""
+This module contains unit tests for the sieve_of_eratosthenes module.
+"""
+
+import numpy as np
+import pytest
+from math_sim.algorithms.sieve_of_eratosthenes.sieve_of_eratosthenes import sieve_of_eratosthenes, odd_prime_mask
+from math_sim.algorithms.sieve_of_eratosthenes.segmented_sieve import iter_prime_segments, iter_primes, count_primes
+from math_sim.algorithms.sieve_of_eratosthenes.prime_count import prime_count
+from math_sim.algorithms.sieve_of_eratosthenes.sieve_viz import (ulam_coordinates, prime_spiral_image, prime_distribution,
+                                                            logarithmic_integral)
+
+def is_prime(n):
+    return n > 1 and all(n % d for d in range(2, int(n**0.5) + 1))
+
+@pytest.mark.parametrize("limit", [0, 1, 2, 3, 4, 9, 25, 49, 50, 1000, 3000001])
+def test_sieve_matches_trial_division(limit):
+    primes, _ = sieve_of_eratosthenes(limit)
+    expected_count = {3000001: 216816}.get(limit)
+    if expected_count is None:
+        assert primes == [n for n in range(limit + 1) if is_prime(n)]
+    else:
+        assert len(primes) == expected_count
+        assert all(is_prime(p) for p in primes[-100:])
+
+def test_sieve_as_array():
+    primes, _ = sieve_of_eratosthenes(100, as_array=True)
+    assert isinstance(primes, np.ndarray)
+    assert primes.dtype == np.int64
+    assert primes.tolist() == sieve_of_eratosthenes(100)[0]
+
+def test_odd_prime_mask_layout():
+    mask = odd_prime_mask(20)
+    assert mask.dtype == np.bool_
+    assert mask.size == 10
+    assert [2 * i + 1 for i in np.flatnonzero(mask)] == [3, 5, 7, 11, 13, 17, 19]
+
+def test_sieve_rejects_negative_limit():
+    with pytest.raises(ValueError):
+        sieve_of_eratosthenes(-1)
+
+@pytest.mark.parametrize("lo, hi, segment_size", [
+    (0, 100, 4),
+    (0, 200000, 1000),
+    (2, 3, 8),
+    (3, 4, 8),
+    (50, 50, 8),
+    (99991, 199999, 7),
+    (123456, 654321, 1 << 18),
+])
+def test_segmented_sieve_matches_full_sieve(lo, hi, segment_size):
+    primes, _ = sieve_of_eratosthenes(hi, as_array=True)
+    expected = primes[(primes >= lo) & (primes < hi)]
+    segments = list(iter_prime_segments(lo, hi, segment_size))
+    assert np.array_equal(np.concatenate(segments) if segments else np.array([], dtype=np.int64), expected)
+
+@pytest.mark.timeout(30)
+def test_count_primes_in_high_window():
+    # pi(10^12 + 10^6) - pi(10^12)
+    assert count_primes(10**12, 10**12 + 10**6) == 36249
+    assert next(iter_prime_segments(10**12, 10**12 + 100))[0] == 1000000000039
+
+def test_iter_primes():
+    primes, _ = sieve_of_eratosthenes(10**5)
+    assert list(iter_primes(10, 10**5)) == [p for p in primes if p >= 10]
+    endless = iter_primes(0, segment_size=64)
+    assert [next(endless) for _ in range(len(primes))] == primes
+
+def test_segmented_sieve_rejects_bad_range():
+    with pytest.raises(ValueError):
+        next(iter_prime_segments(10, 5))
+
+def walk_ulam_spiral(limit):
+    positions, x, y, n, step, direction = [(0, 0)], 0, 0, 1, 1, 0
+    moves = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+    while n < limit:
+        for _ in range(2):
+            for _ in range(step):
+                x, y, n = x + moves[direction][0], y + moves[direction][1], n + 1
+                positions.append((x, y))
+            direction = (direction + 1) % 4
+        step += 1
+    return positions[:limit]
+
+def test_ulam_coordinates_match_walk():
+    x, y = ulam_coordinates(np.arange(1, 5001))
+    assert list(zip(x.tolist(), y.tolist())) == walk_ulam_spiral(5000)
+
+def test_prime_spiral_image():
+    image, scale = prime_spiral_image(1000)
+    assert scale == 1 and image.shape == (33, 33)
+    assert image.sum() == 168
+    assert image[16, 17] == 1 and image[15, 17] == 1  # 2 and 3 next to 1 at the centre
+    image, scale = prime_spiral_image(10**6, resolution=100)
+    assert image.shape[0] <= 100 and scale == 11
+    assert image.sum() == 78498
+
+def test_prime_distribution_bins():
+    edges, counts = prime_distribution(10**6, bins=7)
+    assert edges[0] == 0 and edges[-1] == 10**6 + 1
+    assert counts.sum() == 78498
+    primes, _ = sieve_of_eratosthenes(10**6, as_array=True)
+    assert counts.tolist() == np.histogram(primes, bins=edges)[0].tolist()
+
+def test_logarithmic_integral():
+    values = logarithmic_integral([2, 10, 10**6, 10**12])
+    assert values == pytest.approx([1.045163780117, 6.165599504787, 78627.54915557, 37607950280.80], rel=1e-9)
+
+def test_prime_count_matches_sieve():
+    primes, _ = sieve_of_eratosthenes(10**6, as_array=True)
+    for x in list(range(-1, 3000)) + [10**5, 999982, 999983, 10**6]:
+        assert prime_count(x) == np.searchsorted(primes, x, side="right")
+
+@pytest.mark.parametrize("x, expected", [(10**9, 50847534), (10**10, 455052511), (2**32, 203280221)])
+def test_prime_count_known_values(x, expected):
+    assert prime_count(x) == expected
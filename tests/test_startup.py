@@ -0,0 +1,48 @@
+"""
+This module guards the import cost of the math_sim CLI with python -X importtime.
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous budget for importing math_sim.main; without lazy imports it takes several times this
+MAIN_IMPORT_BUDGET_US = 150_000
+
+def import_times(*args):
+    """
+    Run the CLI under -X importtime and collect the cumulative import time of every module.
+    """
+    # Import math_sim.main explicitly so it shows up under its own name rather than as __main__
+    script = f"import sys; import math_sim.main as cli; sys.argv = ['math_sim'] + {list(args)!r}; cli.main()"
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                               cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times, completed.stdout
+
+@pytest.mark.parametrize("args", [["--factorize", "84"], ["--prime-count", "1000"], ["--collatz", "27", "--no-plot"]])
+def test_cli_does_not_import_plotting(args):
+    times, _ = import_times(*args)
+    assert "math_sim.main" in times
+    assert not any(name.split(".")[0] == "matplotlib" for name in times)
+
+def test_factorize_does_not_import_numpy():
+    times, stdout = import_times("--factorize", "84")
+    assert "Factors: [2, 2, 3, 7]" in stdout
+    assert "numpy" not in times
+    assert times["math_sim.main"] < MAIN_IMPORT_BUDGET_US
+
+def test_sieve_no_plot_skips_plots(tmp_path):
+    completed = subprocess.run([sys.executable, "-m", "math_sim.main", "--sieve", "100", "--no-plot"],
+                               cwd=tmp_path, env={**os.environ, "PYTHONPATH": ROOT},
+                               capture_output=True, text=True, check=True)
+    assert "Number of primes found: 25" in completed.stdout
+    assert not list(tmp_path.glob("*.png"))
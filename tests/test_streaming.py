@@ -0,0 +1,53 @@
+"""
+This module contains unit tests for the streaming module.
+"""
+
+import io
+import json
+from itertools import count
+from math_sim.algorithms.fibonacci_sequence.fibonacci_sequence import fibonacci_nth, iter_fibonacci
+from math_sim.streaming import write_ndjson, read_ndjson, write_length_prefixed, read_length_prefixed, stream_terms
+
+def test_write_ndjson():
+    stream = io.StringIO()
+    assert write_ndjson([0, 1, 2**100], stream) == 3
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines == [{"index": 0, "value": 0}, {"index": 1, "value": 1}, {"index": 2, "value": 2**100}]
+
+def test_ndjson_round_trip_beyond_the_int_str_limit(tmp_path):
+    # F(21000) has 4389 digits, more than json.dumps and int() accept by default
+    path = str(tmp_path / "fibonacci.ndjson")
+    assert stream_terms(iter_fibonacci(20990, 21001), path) == 11
+    with open(path) as stream:
+        terms = list(read_ndjson(stream))
+    assert terms[-1] == fibonacci_nth(21000)[0]
+    assert terms[0] + terms[1] == terms[2]
+
+def test_length_prefixed_round_trip():
+    terms = [0, 1, 255, 256, 2**64 + 1, 3**500]
+    stream = io.BytesIO()
+    assert write_length_prefixed(terms, stream) == len(terms)
+    assert stream.getvalue()[:5] == b"\x01\x00\x00\x00\x00"
+    stream.seek(0)
+    assert list(read_length_prefixed(stream)) == terms
+
+def test_write_ndjson_flushes_while_terms_are_produced(tmp_path):
+    path = tmp_path / "terms.ndjson"
+    seen_by_reader = []
+
+    def terms():
+        for n in count():
+            seen_by_reader.append(len(path.read_text().splitlines()))
+            if n == 5:
+                return
+            yield n
+
+    with open(path, "w") as stream:
+        assert write_ndjson(terms(), stream, flush_interval=0) == 5
+    assert seen_by_reader == [0, 1, 2, 3, 4, 5]
+
+def test_stream_terms_to_file(tmp_path):
+    path = tmp_path / "terms.bin"
+    assert stream_terms(iter(range(1000)), str(path), "binary") == 1000
+    with open(path, "rb") as stream:
+        assert list(read_length_prefixed(stream)) == list(range(1000))